@@ -2,21 +2,35 @@ import streamlit as st
 import pandas as pd
 import time
 from datetime import datetime, timedelta
+from datetime import time as dt_time
 import os
 import re
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.chrome.options import Options
 import plotly.express as px
+import plotly.io as pio
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import threading
 import pytz
+from alerts import AlertEngine, MemorySink, build_sinks, load_rules
+from option_snapshot import MARKET_FIELDS, chain_to_frame, diff_snapshots, filter_chain_frame, paginate
+from oi_analytics import BUILDUP_LABELS, chain_analytics
+from data_quality import ROW_CHECKS, DataQualityMonitor
+from nse_scraper import BROWSER_PROFILES, CAPTURE_MODES, NSE_OPTION_CHAIN_URL, NSEScraper, ScraperError, running_browser_pids
+from scrape_workers import ScrapeDispatcher
+from expiry_catalog import ExpiryCatalog, scraper_expiry_fetcher
+from resource_monitor import FetchCostLog
+from snapshot_log import SnapshotLog
+from query_api import QueryService, serve_in_thread as serve_query_api
+from checkpoint import CheckpointStore
+from shared_snapshot import SharedSnapshotHub
+from session_registry import SessionRegistry
+from rerun_profiler import ProfileBuffer, SamplingProfiler
+from bar_rollups import RESOLUTIONS, RollupEngine
+from chart_history import DOWNSAMPLE_METHODS, METRICS, FigureCache, QuoteHistory, build_timeseries_figure
+from rate_limiter import PRIORITY_EXPIRY, PRIORITY_MANUAL, PRIORITY_SCHEDULED, build_limiter
+from refresh_scheduler import RefreshScheduler, TradingCalendar, load_holidays
 
 # Page configuration
 st.set_page_config(
@@ -106,22 +120,243 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_scrape_dispatcher(pool_size, scraper_options):
+    """Process-wide scrape worker pool shared by all sessions (None when disabled)"""
+    if pool_size <= 0:
+        return None
+    dispatcher = ScrapeDispatcher(pool_size=pool_size, scraper_options=scraper_options)
+    dispatcher.start()
+    return dispatcher
+
+
+@st.cache_resource
+def get_politeness_limiter(rate_per_minute, burst, lock_file):
+    """Process-wide NSE request budget (shared across processes when lock_file is set)"""
+    return build_limiter(rate_per_minute, burst, lock_file)
+
+
+def build_trading_calendar(data_dir):
+    """Trading calendar with the holidays file and the optional close time override"""
+    holidays_file = os.environ.get("MARKET_HOLIDAYS_FILE", os.path.join(data_dir, "market_holidays.txt"))
+    # MARKET_CLOSE_TIME (HH:MM) overrides the DST-dependent 23:30/23:55 IST close
+    close_time = None
+    if os.environ.get("MARKET_CLOSE_TIME"):
+        close_hour, close_minute = os.environ["MARKET_CLOSE_TIME"].split(":")
+        close_time = dt_time(int(close_hour), int(close_minute))
+    return TradingCalendar(close_time=close_time, holidays=load_holidays(holidays_file))
+
+
+@st.cache_resource
+def get_expiry_catalog(file_path, commodity, pool_size, wait_timeout, scraper_options, _limiter=None):
+    """Process-wide expiry catalog, prefetched in the background from startup"""
+    fetcher = scraper_expiry_fetcher(
+        get_scrape_dispatcher(pool_size, scraper_options),
+        wait_timeout=wait_timeout,
+        **scraper_options
+    )
+    
+    def limited_fetcher(commodity):
+        # Background prefetches have the lowest priority and keep the cached list when the budget is spent
+        if _limiter is not None and not _limiter.acquire(PRIORITY_EXPIRY, timeout=60):
+            raise RuntimeError("NSE request budget exhausted")
+        return fetcher(commodity)
+    
+    # Weekends and holidays never make the catalog stale, so they never start a browser
+    calendar = build_trading_calendar(os.path.dirname(file_path))
+    catalog = ExpiryCatalog(file_path, fetcher=limited_fetcher, calendar=calendar)
+    catalog.start_background([commodity])
+    return catalog
+
+
+@st.cache_resource
+def get_rollup_engine(db_path):
+    """Process-wide OHLC rollup engine backed by SQLite, flushing its open bars periodically and at exit"""
+    return RollupEngine(db_path).start_flusher()
+
+
+@st.cache_resource
+def get_snapshot_log(db_path):
+    """Process-wide keyframe + delta snapshot log used by replay mode"""
+    return SnapshotLog(db_path)
+
+
+@st.cache_resource
+def get_query_api(data_dir, host, port):
+    """Process-wide local query API over the snapshot log and bars, returns its base URL"""
+    service = QueryService(
+        get_snapshot_log(os.path.join(data_dir, "snapshots.sqlite")),
+        get_rollup_engine(os.path.join(data_dir, "bars.sqlite"))
+    )
+    _, base_url = serve_query_api(service, host, port)
+    return base_url
+
+
+@st.cache_resource
+def get_shared_snapshot_hub(directory):
+    """Process-wide view of the snapshots shared between replicas on this host"""
+    return SharedSnapshotHub(directory)
+
+
+# Large per-session values dropped when an abandoned session is evicted, with their empty values
+RELEASED_SESSION_VALUES = {
+    'option_data': {},
+    'last_fetch_time': None,
+    'display_cache': None,
+    'oi_analytics_cache': None,
+    'quote_history': None,
+    'figure_cache': None,
+    'chain_store': {},
+    'chain_frame_cache': {},
+    'quarantine': {},
+    'profiles': None,
+    'shared_version': None,
+    'restored_from_checkpoint': None,
+    'replay_playing': False,
+}
+
+
+def release_session(state, reason):
+    """Quit an evicted session's browser and drop its snapshot data (runs on the sweeper thread)"""
+    scraper = state['scraper']
+    if scraper is not None:
+        scraper.close()
+    state['scraper'] = None
+    state['driver_initialized'] = False
+    for key, value in RELEASED_SESSION_VALUES.items():
+        state[key] = value
+    state['data_version'] = state['data_version'] + 1
+    state['session_released'] = {'time': time.time(), 'reason': reason}
+    # A returning viewer gets fresh data without having to click refresh
+    state['pending_warm_refresh'] = bool(state['strikes_loaded'] or state['full_chain_mode'])
+
+
+def trim_session(state):
+    """Bring a session under the memory cap: drop rebuildable caches and halve the quote history"""
+    state['display_cache'] = None
+    state['oi_analytics_cache'] = None
+    state['chain_frame_cache'] = {}
+    state['profiles'] = None
+    if state['figure_cache'] is not None:
+        state['figure_cache'] = FigureCache()
+    history = state['quote_history']
+    if history is not None:
+        longest = max((series.size for series in history.series.values()), default=0)
+        history.compact(max(100, longest // 2))
+
+
+def session_browser_pids(state):
+    scraper = state['scraper']
+    return scraper.browser_pids() if scraper is not None and scraper.is_running else []
+
+
+def session_connected(session_id):
+    """False once the browser tab of a session has gone (always True outside a server)"""
+    return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+
+@st.cache_resource
+def get_session_registry(idle_timeout, max_session_bytes, reap_orphans):
+    """Process-wide session lifecycle tracking with its background sweeper"""
+    registry = SessionRegistry(
+        release_session,
+        trim=trim_session,
+        browser_pids=session_browser_pids,
+        is_connected=session_connected,
+        known_browser_pids=running_browser_pids,
+        idle_timeout=idle_timeout,
+        max_session_bytes=max_session_bytes,
+        reap_orphans=reap_orphans
+    )
+    return registry.start()
+
+
+@st.cache_resource
+def get_checkpoint_store(file_path):
+    """Process-wide warm-start checkpoint of the latest snapshot and session config"""
+    return CheckpointStore(file_path)
+
+
 class NSEOptionChainStreamlit:
     def __init__(self):
         """Initialize the NSE Option Chain Monitor"""
         # Configuration
         self.commodity_symbol = "SILVER"
         self.wait_timeout = 20
+        self.max_stored_expiries = 6
+        # Number of scrape worker processes; 0 scrapes inside the Streamlit process
+        self.scrape_workers = int(os.environ.get("SCRAPE_WORKERS", "0"))
+        memory_cap = os.environ.get("BROWSER_MEMORY_CAP_MB")
+        self.memory_cap_mb = int(memory_cap) if memory_cap else None
+        # Browser settings shared by the worker pool and the expiry catalog
+        self.scraper_options = {
+            'url': os.environ.get("NSE_OPTION_CHAIN_URL", NSE_OPTION_CHAIN_URL),
+            'profile': os.environ.get("BROWSER_PROFILE", "standard"),
+            'memory_cap_mb': self.memory_cap_mb,
+            'capture_mode': os.environ.get("CAPTURE_MODE", "dom")
+        }
+        self.data_dir = os.environ.get("SILVER_DATA_DIR", os.path.join(os.path.expanduser("~"), ".silver_automation"))
         self.strike_file_path = "/Users/rupeshk/Desktop/Aa_Code/Silver_Automation/SilverStrikes.txt"
+        # Request budget for nseindia.com; every page flow takes one token
+        self.limiter = get_politeness_limiter(
+            float(os.environ.get("NSE_REQUESTS_PER_MINUTE", "6")),
+            int(os.environ.get("NSE_REQUEST_BURST", "3")),
+            os.environ.get("NSE_LIMITER_LOCK_FILE") or None
+        )
+        # Seconds a request may wait in the limiter queue before cached data is used
+        self.limiter_wait = {PRIORITY_MANUAL: 20, PRIORITY_SCHEDULED: 5, PRIORITY_EXPIRY: 20}
+        
+        # SILVER_PROFILE=1 profiles every rerun; ?debug=1 shows the profiler toggle without it
+        self.profile_by_default = os.environ.get("SILVER_PROFILE", "").lower() in ("1", "true", "yes")
+        # QUERY_API_PORT serves the stored history to notebooks and other local tools
+        query_api_port = os.environ.get("QUERY_API_PORT")
+        self.query_api_url = None
+        if query_api_port:
+            try:
+                self.query_api_url = get_query_api(
+                    self.data_dir, os.environ.get("QUERY_API_HOST", "127.0.0.1"), int(query_api_port)
+                )
+            except OSError as e:
+                st.warning(f"⚠️ Could not start the query API on port {query_api_port}: {e}")
+        # SHARED_SNAPSHOT=1: one replica scrapes and publishes, the others read its snapshots
+        self.shared_hub = None
+        if os.environ.get("SHARED_SNAPSHOT", "").lower() in ("1", "true", "yes"):
+            self.shared_hub = get_shared_snapshot_hub(
+                os.environ.get("SHARED_SNAPSHOT_DIR") or os.path.join(self.data_dir, "shared")
+            )
+        # Older published snapshots are treated as abandoned and this replica scrapes itself
+        self.shared_max_age = int(os.environ.get("SHARED_SNAPSHOT_MAX_AGE", "900"))
+        self.checkpoint = get_checkpoint_store(os.path.join(self.data_dir, "checkpoint.bin"))
         
         # Initialize session state
+        fresh_session = 'option_data' not in st.session_state
         self._initialize_session_state()
+        if fresh_session:
+            self.restore_checkpoint()
+        
+        # Sessions without a rerun for SESSION_IDLE_TIMEOUT seconds give back their browser and data
+        session_cap_mb = int(os.environ.get("SESSION_MEMORY_CAP_MB", "512"))
+        self.session_registry = get_session_registry(
+            int(os.environ.get("SESSION_IDLE_TIMEOUT", "1800")),
+            session_cap_mb * 1024 * 1024 if session_cap_mb > 0 else None,
+            os.environ.get("BROWSER_REAPER", "1").lower() in ("1", "true", "yes")
+        )
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            self.session_registry.touch(ctx.session_id, ctx.session_state)
+        self.expiry_catalog = get_expiry_catalog(
+            os.path.join(self.data_dir, "expiry_catalog.json"),
+            self.commodity_symbol,
+            self.scrape_workers,
+            self.wait_timeout,
+            self.scraper_options,
+            _limiter=self.limiter
+        )
+        self.load_expiry_dates_from_catalog()
         
         # Load data from session state
         self.ce_strikes = st.session_state.ce_strikes
         self.pe_strikes = st.session_state.pe_strikes
-        self.driver = None
-        self.wait = None
         self.driver_lock = threading.Lock()
     
     def _initialize_session_state(self):
@@ -141,7 +376,62 @@ class NSEOptionChainStreamlit:
             'next_refresh_time': None,
             'is_fetching': False,
             'last_page_refresh': None,
-            'driver_initialized': False
+            'driver_initialized': False,
+            'scraper': None,
+            'browser_profile': os.environ.get("BROWSER_PROFILE", "standard"),
+            'fetch_costs': None,
+            'incremental_capture': True,
+            'capture_mode': os.environ.get("CAPTURE_MODE", "dom"),
+            'last_change_count': None,
+            'data_version': 0,
+            'display_cache': None,
+            'oi_analytics_cache': None,
+            'quality_monitor': None,
+            'quarantine': {},
+            'shared_version': None,
+            'session_released': None,
+            'schema_events': [],
+            'restored_from_checkpoint': None,
+            'checkpoint_saved_key': None,
+            'profiling': self.profile_by_default,
+            'profiles': None,
+            'profile_top_n': 25,
+            'pending_warm_refresh': False,
+            'replay_mode': False,
+            'replay_playing': False,
+            'replay_speed': 10,
+            'replay_time': None,
+            'replay_wall': None,
+            'replay_expiry': None,
+            'schema_event_counts': {'drift': 0, 'fallback': 0},
+            'quote_history': None,
+            'figure_cache': None,
+            'ts_strikes': [],
+            'ts_sides': ['CE', 'PE'],
+            'ts_metric': 'Mid',
+            'ts_window': 'Session',
+            'ts_method': 'lttb',
+            'ts_max_points': 1000,
+            'refresh_scheduler': None,
+            'adaptive_refresh': True,
+            'min_refresh_interval': 30,
+            'max_refresh_interval': 900,
+            'alert_rules_path': '',
+            'alert_log_path': '',
+            'alert_webhook_url': '',
+            'alert_cooldown': 300,
+            'alert_engine': None,
+            'alert_sink': None,
+            'full_chain_mode': False,
+            'chain_store': {},
+            'chain_frame_cache': {},
+            'chain_side': 'Both',
+            'chain_sort_by': 'Strike_Value',
+            'chain_ascending': True,
+            'chain_only_watched': False,
+            'chain_only_quoted': False,
+            'chain_page_size': 50,
+            'chain_page': 1
         }
         
         for key, value in defaults.items():
@@ -149,41 +439,46 @@ class NSEOptionChainStreamlit:
                 st.session_state[key] = value
 
 
+    def get_dispatcher(self):
+        """Get the shared scrape worker pool, None when scraping in-process"""
+        return get_scrape_dispatcher(self.scrape_workers, self.scraper_options)
+    
+    def get_scraper(self):
+        """Get the per-session browser scraper, kept across reruns"""
+        if st.session_state.scraper is None:
+            scraper_options = dict(
+                self.scraper_options,
+                profile=st.session_state.browser_profile,
+                capture_mode=st.session_state.capture_mode
+            )
+            st.session_state.scraper = NSEScraper(
+                commodity_symbol=self.commodity_symbol,
+                wait_timeout=self.wait_timeout,
+                **scraper_options
+            )
+        return st.session_state.scraper
+    
     def setup_driver_once(self):
         """Setup Chrome WebDriver using webdriver-manager"""
         with self.driver_lock:
-            if st.session_state.driver_initialized and self.driver:
+            scraper = self.get_scraper()
+            if st.session_state.driver_initialized and scraper.is_running:
                 return True
-                
-            chrome_options = Options()
-            chrome_options.add_argument("--headless=new")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--remote-debugging-port=9222")
             
             try:
-                # Use webdriver-manager to automatically handle ChromeDriver
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                self.wait = WebDriverWait(self.driver, self.wait_timeout)
+                scraper.start()
                 st.session_state.driver_initialized = True
                 return True
-            except Exception as e:
-                st.error(f"WebDriver setup failed: {e}")
+            except ScraperError as e:
+                st.error(str(e))
                 return False
                 
     def close_driver(self):
         """Close the WebDriver if it exists"""
         with self.driver_lock:
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    self.driver = None
-                    st.session_state.driver_initialized = False
-                except:
-                    pass
+            if st.session_state.scraper is not None:
+                st.session_state.scraper.close()
+            st.session_state.driver_initialized = False
     
     def load_strikes_from_file(self, file_path=None):
         """Load CE and PE strikes from the specified file"""
@@ -226,6 +521,7 @@ class NSEOptionChainStreamlit:
             self.ce_strikes = st.session_state.ce_strikes
             self.pe_strikes = st.session_state.pe_strikes
             st.session_state.strikes_loaded = True
+            self.save_checkpoint()
             
             st.success(f"✅ Successfully loaded {len(st.session_state.ce_strikes)} CE strikes and {len(st.session_state.pe_strikes)} PE strikes!")
             return True
@@ -290,103 +586,65 @@ class NSEOptionChainStreamlit:
     def navigate_and_setup(self):
         """Navigate to NSE and setup commodities page"""
         try:
-            self.driver.get("https://www.nseindia.com/option-chain")
-            time.sleep(3)
-            
-            # Click commodities tab
-            commodities_tab = self.wait.until(EC.element_to_be_clickable((By.ID, "goldmChain")))
-            self.driver.execute_script("arguments[0].scrollIntoView(true);", commodities_tab)
-            time.sleep(1)
-            
-            try:
-                commodities_tab.click()
-            except:
-                self.driver.execute_script("arguments[0].click();", commodities_tab)
-            
-            time.sleep(2)
+            self.get_scraper().navigate_and_setup()
             return True
-        except Exception as e:
-            st.error(f"Navigation failed: {e}")
+        except ScraperError as e:
+            st.error(str(e))
             return False
     
     def select_commodity_and_expiry(self):
         """Select commodity and user-selected expiry date"""
         try:
-            # Select commodity
-            dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "goldmSelect")))
-            Select(dropdown).select_by_value(self.commodity_symbol)
-            time.sleep(2)
-            
-            # Select user-chosen expiry
-            if st.session_state.selected_expiry_date:
-                expiry_dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "goldmExpirySelect")))
-                select_expiry = Select(expiry_dropdown)
-                select_expiry.select_by_value(st.session_state.selected_expiry_date)
-                time.sleep(2)
-                return True
-            else:
-                # Fallback to nearest expiry if no selection
-                selected_expiry = self._select_nearest_expiry()
-                st.session_state.selected_expiry_date = selected_expiry
-                time.sleep(2)
-                return True
-        except Exception as e:
-            st.error(f"Commodity/Expiry selection failed: {e}")
+            # Falls back to the nearest expiry if no selection
+            st.session_state.selected_expiry_date = self.get_scraper().select_commodity_and_expiry(
+                st.session_state.selected_expiry_date
+            )
+            return True
+        except ScraperError as e:
+            st.error(str(e))
             return False
     
-    def _select_nearest_expiry(self):
-        """Select the nearest (first) expiry date"""
-        expiry_selectors = [
-            "select[id*='expiry']", "select[id*='Expiry']", 
-            "#goldmExpirySelect", "select:nth-of-type(2)"
-        ]
-        
-        for selector in expiry_selectors:
-            try:
-                expiry_dropdown = self.driver.find_element(By.CSS_SELECTOR, selector)
-                select_expiry = Select(expiry_dropdown)
-                options = select_expiry.options[1:] if len(select_expiry.options) > 1 else select_expiry.options
-                
-                if options:
-                    nearest_expiry = options[0]
-                    nearest_expiry.click()
-                    return nearest_expiry.text or nearest_expiry.get_attribute("value")
-                    
-            except Exception:
-                continue
+    def load_expiry_dates_from_catalog(self):
+        """Populate the expiry dropdown from the cached catalog without starting a browser"""
+        expiry_dates, _ = self.expiry_catalog.get(self.commodity_symbol)
+        if not expiry_dates or expiry_dates == st.session_state.available_expiry_dates:
+            return False
         
-        raise Exception("Could not find or select nearest expiry")
+        st.session_state.available_expiry_dates = expiry_dates
+        if st.session_state.selected_expiry_date not in expiry_dates:
+            st.session_state.selected_expiry_date = expiry_dates[0]
+        return True
     
     def fetch_available_expiry_dates(self):
         """Fetch available expiry dates from NSE website - optimized version"""
+        if not self.limiter.acquire(PRIORITY_EXPIRY, timeout=self.limiter_wait[PRIORITY_EXPIRY]):
+            expiry_dates, fetched_at = self.expiry_catalog.get(self.commodity_symbol)
+            if expiry_dates:
+                st.session_state.available_expiry_dates = expiry_dates
+                if not st.session_state.selected_expiry_date:
+                    st.session_state.selected_expiry_date = expiry_dates[0]
+                fetched_ist = fetched_at.astimezone(pytz.timezone('Asia/Kolkata')).strftime('%d-%b %H:%M')
+                st.info(f"⏳ NSE request budget exhausted, using the cached expiry list from {fetched_ist} IST")
+                return True
+            st.warning("⏳ NSE request budget exhausted and no cached expiry list, try again shortly")
+            return False
+        
         try:
-            if not self.setup_driver_once():
-                return False
-            
-            if not self.navigate_and_setup():
-                return False
-            
-            # Select commodity first to load expiry options
-            dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "goldmSelect")))
-            Select(dropdown).select_by_value(self.commodity_symbol)
-            time.sleep(2)
-            
-            # Get expiry dropdown options
-            expiry_dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "goldmExpirySelect")))
-            select_expiry = Select(expiry_dropdown)
-            
-            # Extract all expiry options (skip first "Select" option)
-            expiry_dates = []
-            for option in select_expiry.options[1:]:  # Skip first "Select" option
-                expiry_value = option.get_attribute("value")
-                if expiry_value:
-                    expiry_dates.append(expiry_value)
+            dispatcher = self.get_dispatcher()
+            if dispatcher is not None:
+                expiry_dates = dispatcher.fetch_expiry_dates(self.commodity_symbol)
+            else:
+                if not self.setup_driver_once():
+                    return False
+                expiry_dates = self.get_scraper().fetch_expiry_dates()
             
             if expiry_dates:
+                self.expiry_catalog.put(self.commodity_symbol, expiry_dates)
                 st.session_state.available_expiry_dates = expiry_dates
                 # Set first expiry as default if none selected
                 if not st.session_state.selected_expiry_date:
                     st.session_state.selected_expiry_date = expiry_dates[0]
+                self.save_checkpoint()
                 return True
             else:
                 st.error("No expiry dates found")
@@ -399,88 +657,147 @@ class NSEOptionChainStreamlit:
     def wait_for_data(self):
         """Wait for option chain data to load"""
         try:
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table, .option-chain-table, [class*='option']")))
-            time.sleep(2)
+            self.get_scraper().wait_for_data()
             return True
-        except Exception as e:
-            st.error(f"Data loading timeout: {e}")
+        except ScraperError as e:
+            st.error(str(e))
             return False
     
-    def safe_get_text(self, cell):
-        """Safely extract text from cell"""
-        try:
-            text = cell.text.strip()
-            return text if text and text != "-" else "NA"
-        except:
-            return "NA"
-    
     def extract_option_data(self):
         """Extract option chain data for all available strikes - optimized"""
         try:
-            table = self.driver.find_element(By.ID, "optionChainTable-goldm")
-            rows = table.find_elements(By.TAG_NAME, "tr")
-            
-            all_strikes_data = {}
-            
-            for row in rows:
-                cells = row.find_elements(By.TAG_NAME, "td")
-                if len(cells) >= 21:
-                    strike_text = self.safe_get_text(cells[10])
-                    if strike_text != "NA" and "," in strike_text:
-                        strike_data = {
-                            'Strike': strike_text,
-                            'CE_Volume': self.safe_get_text(cells[2]),
-                            'CE_Bid_Qty': self.safe_get_text(cells[6]),
-                            'CE_Bid': self.safe_get_text(cells[7]),
-                            'CE_Ask': self.safe_get_text(cells[8]),
-                            'CE_Ask_Qty': self.safe_get_text(cells[9]),
-                            'PE_Bid_Qty': self.safe_get_text(cells[11]),
-                            'PE_Bid': self.safe_get_text(cells[12]),
-                            'PE_Ask': self.safe_get_text(cells[13]),
-                            'PE_Ask_Qty': self.safe_get_text(cells[14]),
-                            'PE_Volume': self.safe_get_text(cells[18])
-                        }
-                        all_strikes_data[strike_text] = strike_data
-            
-            return all_strikes_data
-            
-        except Exception as e:
-            st.error(f"Error extracting data: {e}")
+            return self.get_scraper().extract_option_data()
+        except ScraperError as e:
+            st.error(str(e))
             return {}
     
-    def fetch_data(self):
+    def fetch_option_snapshot(self):
+        """Fetch the option chain for the selected expiry, through the worker pool when enabled"""
+        dispatcher = self.get_dispatcher()
+        if dispatcher is not None:
+            try:
+                expiry, all_data, cost = dispatcher.fetch_snapshot(
+                    self.commodity_symbol, st.session_state.selected_expiry_date
+                )
+                st.session_state.selected_expiry_date = expiry
+                self.record_fetch_cost(cost)
+                self.record_schema_events(dispatcher.drain_schema_events())
+                return all_data
+            except Exception as e:
+                st.error(f"❌ Scrape worker failed: {e}")
+                return None
+        
+        if not self.setup_driver_once():
+            return None
+        
+        scraper = self.get_scraper()
+        if scraper.capture_mode == 'network' or not st.session_state.incremental_capture:
+            # The scraper re-queries a reused page and never returns its previous rows
+            try:
+                expiry, all_data = scraper.fetch_snapshot(
+                    st.session_state.selected_expiry_date, self.commodity_symbol
+                )
+            except ScraperError as e:
+                st.error(str(e))
+                return None
+            st.session_state.driver_initialized = True
+            st.session_state.selected_expiry_date = expiry
+            st.session_state.last_change_count = None
+            self.record_fetch_cost(scraper.last_fetch_cost)
+            self.record_schema_events(scraper.schema.drain_events())
+            return all_data
+        
+        try:
+            expiry, all_data, changes = scraper.fetch_changes(
+                st.session_state.option_data,
+                st.session_state.selected_expiry_date,
+                self.commodity_symbol
+            )
+        except ScraperError as e:
+            st.error(str(e))
+            return None
+        st.session_state.driver_initialized = True
+        st.session_state.selected_expiry_date = expiry
+        st.session_state.last_change_count = None if changes is None else changes['changed']
+        self.record_fetch_cost(scraper.last_fetch_cost)
+        self.record_schema_events(scraper.schema.drain_events())
+        return all_data
+    
+    def record_schema_events(self, events):
+        """Keep option chain layout events and warn when the column map changed"""
+        for event in events:
+            st.session_state.schema_event_counts[event['kind']] += 1
+            st.session_state.schema_events.append(event)
+            if event['kind'] == 'drift':
+                st.warning(f"⚠️ Option chain layout changed, columns re-mapped: {event['message']}")
+            else:
+                st.warning(f"⚠️ Could not map option chain columns, using built-in positions: {event['message']}")
+        del st.session_state.schema_events[:-20]
+    
+    def record_fetch_cost(self, cost):
+        """Keep the resource cost of a fetch for the resources panel"""
+        if st.session_state.fetch_costs is None:
+            st.session_state.fetch_costs = FetchCostLog()
+        st.session_state.fetch_costs.add(cost)
+    
+    def fetch_data(self, priority=PRIORITY_MANUAL):
         """Main data fetching function - optimized"""
-        if not st.session_state.strikes_loaded:
+        if not st.session_state.strikes_loaded and not st.session_state.full_chain_mode:
             st.error("❌ Please load strikes first!")
             return False
         
+        # Followers take the fetch owner's published snapshot without touching NSE
+        shared_data = self.read_shared_snapshot()
+        if shared_data is None and not self.limiter.acquire(priority, timeout=self.limiter_wait[priority]):
+            self.serve_cached_data()
+            return False
+        
         # Set fetching flag
         st.session_state.is_fetching = True
         
         with st.spinner("🔄 Fetching option chain data..."):
             try:
-                if not self.setup_driver_once():
-                    return False
-                
-                if not self.select_commodity_and_expiry():
-                    return False
-                
-                if not self.wait_for_data():
+                # Extract data
+                all_data = shared_data if shared_data is not None else self.fetch_option_snapshot()
+                if all_data is None:
                     return False
                 
-                # Extract data
-                all_data = self.extract_option_data()
+                if shared_data is None and all_data and all_data is not st.session_state.option_data:
+                    all_data = self.validate_snapshot(all_data)
+                    if all_data is None:
+                        return False
                 
                 if all_data:
                     # Use UTC time to avoid timezone issues
                     current_time = datetime.now(pytz.UTC)
-                    st.session_state.option_data = all_data
+                    previous_data = st.session_state.option_data
+                    if all_data is previous_data:
+                        # Nothing changed: skip matching and table rebuilds, only standing alerts are re-checked
+                        change_ratio = 0.0
+                        self.touch_full_chain(current_time)
+                        self.evaluate_alerts(previous_data, all_data)
+                    else:
+                        change_ratio = self.compute_change_ratio(previous_data, all_data)
+                        st.session_state.option_data = all_data
+                        st.session_state.data_version += 1
+                        self.evaluate_alerts(previous_data, all_data)
+                        self.store_full_chain(all_data, current_time)
+                    self.get_quote_history().append(current_time, all_data)
+                    if shared_data is None:
+                        # A follower's copy was already folded in by the fetch owner
+                        self.update_rollups(current_time, all_data)
+                    if all_data is not previous_data:
+                        self.log_snapshot(current_time, all_data)
+                    if shared_data is None:
+                        self.publish_shared_snapshot(all_data, changed=all_data is not previous_data)
                     st.session_state.last_fetch_time = current_time
                     st.session_state.refresh_counter += 1
+                    st.session_state.restored_from_checkpoint = None
+                    st.session_state.session_released = None
+                    self.save_checkpoint()
                     
                     # Set next refresh time
-                    if st.session_state.auto_refresh:
-                        st.session_state.next_refresh_time = current_time + timedelta(seconds=st.session_state.refresh_interval)
+                    self.schedule_next_refresh(current_time, change_ratio)
                     
                     st.success("✅ Data fetched successfully!")
                     return True
@@ -494,6 +811,280 @@ class NSEOptionChainStreamlit:
             finally:
                 st.session_state.is_fetching = False
     
+    def is_fetch_owner(self):
+        """True when this replica scrapes NSE itself (always without snapshot sharing)"""
+        return self.shared_hub is None or self.shared_hub.ownership.try_acquire()
+    
+    def read_shared_snapshot(self):
+        """The fetch owner's latest snapshot for the selected expiry, None when this replica should scrape"""
+        if self.is_fetch_owner():
+            return None
+        record = self.shared_hub.latest(st.session_state.selected_expiry_date)
+        if record is None or time.time() - record['published_at'] > self.shared_max_age:
+            return None
+        if record['version'] == st.session_state.shared_version and st.session_state.option_data:
+            # Returning the current object marks the refresh as unchanged
+            return st.session_state.option_data
+        st.session_state.shared_version = record['version']
+        return record['snapshot']
+    
+    def shared_update_available(self):
+        """Header-only check whether the fetch owner published a newer snapshot"""
+        if self.shared_hub is None or self.shared_hub.ownership.is_owner:
+            return False
+        version = self.shared_hub.version(st.session_state.selected_expiry_date)
+        return version is not None and version != st.session_state.shared_version
+    
+    def publish_shared_snapshot(self, all_data, changed=True):
+        """Publish an accepted snapshot to the other replicas when this replica is the fetch owner"""
+        if self.shared_hub is None or not self.shared_hub.ownership.is_owner:
+            return
+        expiry = st.session_state.selected_expiry_date
+        try:
+            if changed or self.shared_hub.version(expiry) is None:
+                st.session_state.shared_version = self.shared_hub.publish(expiry, all_data)
+            else:
+                self.shared_hub.touch(expiry)
+        except Exception as e:
+            st.warning(f"⚠️ Could not publish the snapshot to other replicas: {e}")
+    
+    def get_quality_monitor(self):
+        """Get the per-session data quality monitor"""
+        if st.session_state.quality_monitor is None:
+            st.session_state.quality_monitor = DataQualityMonitor()
+        return st.session_state.quality_monitor
+    
+    def validate_snapshot(self, all_data):
+        """Quarantine bad rows of a fetched snapshot, None when the whole snapshot is rejected"""
+        result = self.get_quality_monitor().validate(all_data, st.session_state.selected_expiry_date)
+        if not result.accepted:
+            st.warning(f"⚠️ Snapshot rejected, keeping the previous data: {result.rejected}")
+            scraper = st.session_state.scraper
+            if scraper is not None:
+                # The change log was consumed by the rejected fetch, so rescrape the whole table next time
+                scraper.reset_change_capture()
+            self.schedule_next_refresh(datetime.now(pytz.UTC))
+            return None
+        
+        st.session_state.quarantine = result.quarantined
+        if result.quarantined:
+            st.warning(f"⚠️ {len(result.quarantined)} rows quarantined by validation (see 🩺 Data Quality)")
+        return result.clean
+    
+    def save_checkpoint(self):
+        """Persist the latest snapshot, expiries and strike lists for the next warm start"""
+        config = {
+            'ce_strikes': st.session_state.ce_strikes,
+            'pe_strikes': st.session_state.pe_strikes,
+            'strikes_loaded': st.session_state.strikes_loaded,
+            'full_chain_mode': st.session_state.full_chain_mode,
+            'selected_expiry_date': st.session_state.selected_expiry_date,
+            'available_expiry_dates': st.session_state.available_expiry_dates
+        }
+        # Unchanged refreshes would re-encode and fsync the same snapshot every time
+        saved_key = (st.session_state.data_version, repr(config))
+        if saved_key == st.session_state.checkpoint_saved_key:
+            return
+        
+        last_fetch_time = st.session_state.last_fetch_time
+        metadata = dict(
+            config,
+            saved_at=time.time(),
+            fetched_at=last_fetch_time.timestamp() if last_fetch_time else None
+        )
+        try:
+            self.checkpoint.save(metadata, st.session_state.option_data)
+            st.session_state.checkpoint_saved_key = saved_key
+        except Exception as e:
+            st.warning(f"⚠️ Could not write warm-start checkpoint: {e}")
+    
+    def restore_checkpoint(self):
+        """Seed the first session after process start from the checkpoint and queue a refresh behind it"""
+        metadata, snapshot = self.checkpoint.load_once()
+        if not metadata:
+            return False
+        
+        for key in ('ce_strikes', 'pe_strikes', 'strikes_loaded', 'full_chain_mode',
+                    'selected_expiry_date', 'available_expiry_dates'):
+            if metadata.get(key) is not None:
+                st.session_state[key] = metadata[key]
+        if snapshot and metadata.get('fetched_at'):
+            fetched_at = datetime.fromtimestamp(metadata['fetched_at'], pytz.UTC)
+            st.session_state.option_data = snapshot
+            st.session_state.last_fetch_time = fetched_at
+            st.session_state.data_version += 1
+            st.session_state.restored_from_checkpoint = fetched_at
+            st.session_state.pending_warm_refresh = (
+                st.session_state.strikes_loaded or st.session_state.full_chain_mode
+            )
+        return True
+    
+    def warm_refresh(self):
+        """Refresh restored checkpoint data after the stale view has been rendered"""
+        st.session_state.pending_warm_refresh = False
+        if self.fetch_data(priority=PRIORITY_SCHEDULED):
+            st.rerun()
+    
+    def get_quote_history(self):
+        """Get the per-session quote history used by the time-series charts"""
+        if st.session_state.quote_history is None:
+            st.session_state.quote_history = QuoteHistory()
+            st.session_state.figure_cache = FigureCache()
+        return st.session_state.quote_history
+    
+    def update_rollups(self, fetch_time, all_data):
+        """Fold a fetched snapshot into the OHLC bars of the selected expiry"""
+        try:
+            engine = get_rollup_engine(os.path.join(self.data_dir, "bars.sqlite"))
+            engine.update(fetch_time, all_data, st.session_state.selected_expiry_date or 'Unknown')
+        except Exception as e:
+            st.warning(f"⚠️ Could not update OHLC bars: {e}")
+    
+    def serve_cached_data(self):
+        """Keep showing the last snapshot when the request budget is exhausted"""
+        if st.session_state.option_data and st.session_state.last_fetch_time:
+            fetched_ist = st.session_state.last_fetch_time.astimezone(pytz.timezone('Asia/Kolkata')).strftime('%H:%M:%S')
+            st.info(f"⏳ NSE request budget exhausted, showing cached data from {fetched_ist} IST")
+        else:
+            st.warning("⏳ NSE request budget exhausted, try again shortly")
+        # Retry a scheduled refresh once a token is likely to be available
+        retry_seconds = 60.0 / max(0.1, self.limiter.bucket.rate * 60)
+        st.session_state.next_refresh_time = datetime.now(pytz.UTC) + timedelta(seconds=retry_seconds)
+    
+    def log_snapshot(self, fetch_time, all_data):
+        """Append a changed snapshot to the replay log"""
+        try:
+            log = get_snapshot_log(os.path.join(self.data_dir, "snapshots.sqlite"))
+            log.append(fetch_time, all_data, st.session_state.selected_expiry_date or 'Unknown')
+        except Exception as e:
+            st.warning(f"⚠️ Could not store snapshot for replay: {e}")
+    
+    def get_refresh_scheduler(self):
+        """Get the per-session adaptive refresh scheduler"""
+        if st.session_state.refresh_scheduler is None:
+            st.session_state.refresh_scheduler = RefreshScheduler(
+                calendar=build_trading_calendar(self.data_dir),
+                base_interval=300,
+                min_interval=st.session_state.min_refresh_interval,
+                max_interval=st.session_state.max_refresh_interval,
+                adaptive=st.session_state.adaptive_refresh
+            )
+        return st.session_state.refresh_scheduler
+    
+    def compute_change_ratio(self, previous_data, current_data):
+        """Fraction of strikes that changed between two snapshots, None for the first fetch"""
+        if not previous_data or not current_data:
+            return None
+        delta = diff_snapshots(previous_data, current_data)
+        changed = len(delta['changed']) + len(delta['added']) + len(delta['removed'])
+        return changed / max(1, len(current_data))
+    
+    def schedule_next_refresh(self, current_time, change_ratio=None):
+        """Adapt the interval for the selected expiry and set the next refresh time"""
+        scheduler = self.get_refresh_scheduler()
+        expiry = st.session_state.selected_expiry_date
+        st.session_state.next_refresh_time = scheduler.record_fetch(expiry, current_time, change_ratio)
+        st.session_state.refresh_interval = scheduler.interval(expiry)
+    
+    def load_alert_rules(self):
+        """Load alert rules and build the alert engine with configured sinks"""
+        try:
+            rules_path = st.session_state.alert_rules_path
+            if not rules_path or not os.path.exists(rules_path):
+                st.error(f"❌ Alert rules file not found: {rules_path}")
+                return False
+            
+            rules = load_rules(rules_path)
+            if st.session_state.alert_sink is None:
+                st.session_state.alert_sink = MemorySink()
+            sinks = build_sinks(
+                file_path=st.session_state.alert_log_path or None,
+                webhook_url=st.session_state.alert_webhook_url or None,
+                memory_sink=st.session_state.alert_sink
+            )
+            st.session_state.alert_engine = AlertEngine(
+                rules=rules,
+                sinks=sinks,
+                cooldown_seconds=st.session_state.alert_cooldown
+            )
+            st.success(f"✅ Loaded {len(rules)} alert rules")
+            return True
+        except Exception as e:
+            st.error(f"❌ Error loading alert rules: {e}")
+            return False
+    
+    def evaluate_alerts(self, previous_data, current_data):
+        """Evaluate alert rules against the change between two snapshots"""
+        engine = st.session_state.alert_engine
+        if engine is None:
+            return []
+        
+        try:
+            fired = engine.evaluate(previous_data, current_data)
+        except Exception as e:
+            st.error(f"❌ Alert evaluation failed: {e}")
+            return []
+        
+        for alert in fired:
+            st.toast(f"🔔 {alert['message']}")
+        return fired
+    
+    def store_full_chain(self, all_data, fetch_time):
+        """Keep the full chain per expiry when full-chain mode is enabled"""
+        if not st.session_state.full_chain_mode:
+            return
+        
+        expiry = st.session_state.selected_expiry_date or 'Unknown'
+        chain_store = st.session_state.chain_store
+        chain_store.pop(expiry, None)
+        chain_store[expiry] = {
+            'data': all_data,
+            'fetched_at': fetch_time,
+            'version': st.session_state.data_version
+        }
+        
+        # Drop the oldest expiries beyond the storage limit
+        while len(chain_store) > self.max_stored_expiries:
+            oldest = next(iter(chain_store))
+            chain_store.pop(oldest)
+            st.session_state.chain_frame_cache.pop(oldest, None)
+    
+    def touch_full_chain(self, fetch_time):
+        """Mark the stored chain of the selected expiry as confirmed unchanged"""
+        entry = st.session_state.chain_store.get(st.session_state.selected_expiry_date)
+        if entry:
+            entry['fetched_at'] = fetch_time
+    
+    def get_chain_frame(self, expiry):
+        """Get the typed full-chain frame for an expiry, rebuilt only when the data changed"""
+        entry = st.session_state.chain_store.get(expiry)
+        if not entry:
+            return None
+        
+        cache_key = (
+            entry['version'],
+            tuple(st.session_state.ce_strikes),
+            tuple(st.session_state.pe_strikes)
+        )
+        cached = st.session_state.chain_frame_cache.get(expiry)
+        if cached and cached[0] == cache_key:
+            return cached[1]
+        
+        frame = chain_to_frame(entry['data'], st.session_state.ce_strikes, st.session_state.pe_strikes)
+        st.session_state.chain_frame_cache[expiry] = (cache_key, frame)
+        return frame
+    
+    def get_replay_chain_frame(self, snapshot, replay_key):
+        """Get the typed full-chain frame of a replayed snapshot, rebuilt only when the seek moved"""
+        cache_key = (replay_key, tuple(st.session_state.ce_strikes), tuple(st.session_state.pe_strikes))
+        cached = st.session_state.chain_frame_cache.get('replay')
+        if cached and cached[0] == cache_key:
+            return cached[1]
+        
+        frame = chain_to_frame(snapshot, st.session_state.ce_strikes, st.session_state.pe_strikes)
+        st.session_state.chain_frame_cache['replay'] = (cache_key, frame)
+        return frame
+    
     def get_time_info(self):
         """Get time information for display - fixed timezone handling"""
         # Use UTC time consistently
@@ -537,7 +1128,7 @@ class NSEOptionChainStreamlit:
                 time_until_refresh = next_refresh_time - current_time
                 seconds_until_refresh = max(0, int(time_until_refresh.total_seconds()))
                 should_refresh = seconds_until_refresh <= 0 and not st.session_state.is_fetching
-                progress = min(1.0, (st.session_state.refresh_interval - seconds_until_refresh) / st.session_state.refresh_interval)
+                progress = max(0.0, min(1.0, (st.session_state.refresh_interval - seconds_until_refresh) / st.session_state.refresh_interval))
             else:
                 should_refresh = total_seconds >= st.session_state.refresh_interval and not st.session_state.is_fetching
                 progress = min(1.0, total_seconds / st.session_state.refresh_interval)
@@ -586,6 +1177,12 @@ class NSEOptionChainStreamlit:
             if st.session_state.available_expiry_dates:
                 st.info(f"📋 Available: {len(st.session_state.available_expiry_dates)} expiry dates")
                 
+                _, catalog_time = self.expiry_catalog.get(self.commodity_symbol)
+                if catalog_time:
+                    catalog_time_ist = catalog_time.astimezone(pytz.timezone('Asia/Kolkata')).strftime('%d-%b %H:%M')
+                    freshness = "fresh" if self.expiry_catalog.is_fresh(self.commodity_symbol) else "stale"
+                    st.caption(f"Expiry list cached {catalog_time_ist} IST ({freshness})")
+                
                 # Expiry date selection dropdown
                 st.session_state.selected_expiry_date = st.selectbox(
                     "📅 Select Expiry Date",
@@ -596,6 +1193,8 @@ class NSEOptionChainStreamlit:
                 )
                 
                 st.success(f"📅 Selected: {st.session_state.selected_expiry_date}")
+            elif self.expiry_catalog.is_refreshing(self.commodity_symbol):
+                st.info("⏳ Loading expiry dates in the background...")
             else:
                 st.warning("⚠️ Please fetch expiry dates first")
             
@@ -604,6 +1203,12 @@ class NSEOptionChainStreamlit:
             # Step 2: Strike File Section (SECOND)
             st.header("📁 Step 2: Strike File")
             
+            st.session_state.full_chain_mode = st.checkbox(
+                "🧾 Full-chain mode (strike file optional)",
+                value=st.session_state.full_chain_mode,
+                help="Keep every strike from the option chain; loaded strikes become a highlighted watch list"
+            )
+            
             # File upload or path input
             uploaded_file = st.file_uploader(
                 "📁 Upload Strike File", 
@@ -646,16 +1251,63 @@ class NSEOptionChainStreamlit:
             # Step 3: Auto-refresh settings (THIRD)
             st.header("🔄 Step 3: Data Refresh")
             
+            auto_label = "adaptive" if st.session_state.adaptive_refresh else "5 min"
             st.session_state.auto_refresh = st.checkbox(
-                "Enable Auto Refresh (5 min)", 
+                f"Enable Auto Refresh ({auto_label})", 
                 value=st.session_state.auto_refresh
             )
             
-            # Refresh button - only enabled if both expiry and strikes are ready
-            refresh_disabled = not (st.session_state.strikes_loaded and st.session_state.selected_expiry_date)
+            st.session_state.replay_mode = st.checkbox(
+                "⏪ Replay mode",
+                value=st.session_state.replay_mode,
+                help="Scrub back through stored snapshots or play the session back at 1-100× speed"
+            )
+            
+            with st.expander("⏱️ Refresh Schedule"):
+                st.session_state.adaptive_refresh = st.checkbox(
+                    "Adapt interval to market activity",
+                    value=st.session_state.adaptive_refresh,
+                    help="Refresh faster while strikes keep changing and slower while they are quiet"
+                )
+                st.session_state.min_refresh_interval = st.number_input(
+                    "Fastest interval (seconds)", min_value=10, max_value=3600,
+                    value=int(st.session_state.min_refresh_interval), step=10
+                )
+                st.session_state.max_refresh_interval = st.number_input(
+                    "Slowest interval (seconds)", min_value=10, max_value=7200,
+                    value=int(st.session_state.max_refresh_interval), step=60
+                )
+                self.get_refresh_scheduler().configure(
+                    st.session_state.min_refresh_interval,
+                    st.session_state.max_refresh_interval,
+                    st.session_state.adaptive_refresh
+                )
+            
+            capture_mode = st.selectbox(
+                "📡 Capture mode",
+                options=list(CAPTURE_MODES),
+                index=list(CAPTURE_MODES).index(st.session_state.capture_mode),
+                help="dom reads the rendered table, network reads the JSON response the page fetches"
+            )
+            if capture_mode != st.session_state.capture_mode:
+                # Network capture needs performance logging, which is set at browser start
+                self.close_driver()
+                st.session_state.scraper = None
+                st.session_state.capture_mode = capture_mode
+            
+            if st.session_state.capture_mode == 'dom':
+                st.session_state.incremental_capture = st.checkbox(
+                    "⚡ Incremental capture",
+                    value=st.session_state.incremental_capture,
+                    help="Track changed table cells in the page and only read those on refresh"
+                )
+            
+            # Refresh button - only enabled if both expiry and strikes (or full-chain mode) are ready
+            strikes_ready = st.session_state.strikes_loaded or st.session_state.full_chain_mode
+            refresh_disabled = not (strikes_ready and st.session_state.selected_expiry_date)
             
             if st.button("🔄 Refresh Now", type="secondary", use_container_width=True, disabled=refresh_disabled):
-                if st.session_state.strikes_loaded and st.session_state.selected_expiry_date:
+                if strikes_ready and st.session_state.selected_expiry_date:
                     success = self.fetch_data()
                     if success:
                         st.rerun()
@@ -667,6 +1319,41 @@ class NSEOptionChainStreamlit:
             
             st.divider()
             
+            # Alerts configuration
+            st.header("🔔 Alerts")
+            
+            st.session_state.alert_rules_path = st.text_input(
+                "📂 Alert Rules File",
+                value=st.session_state.alert_rules_path,
+                help="JSON file with rules such as spread_above, bid_vanished, volume_jump, strike_not_found"
+            )
+            st.session_state.alert_cooldown = st.number_input(
+                "Cooldown (seconds)",
+                min_value=0,
+                value=int(st.session_state.alert_cooldown),
+                step=60,
+                help="Suppress repeats of the same alert within this window"
+            )
+            st.session_state.alert_log_path = st.text_input(
+                "📝 Alert Log File (optional)",
+                value=st.session_state.alert_log_path
+            )
+            st.session_state.alert_webhook_url = st.text_input(
+                "🌐 Webhook URL (optional)",
+                value=st.session_state.alert_webhook_url
+            )
+            
+            if st.button("🔔 Load Alert Rules", use_container_width=True):
+                self.load_alert_rules()
+            
+            engine = st.session_state.alert_engine
+            if engine is not None:
+                st.caption(f"Active rules: {len(engine.rules)}")
+                for error in engine.sink_errors[-3:]:
+                    st.caption(f"⚠️ {error}")
+            
+            st.divider()
+            
             # Status information with real-time updates
             st.header("📊 Status")
             
@@ -676,6 +1363,7 @@ class NSEOptionChainStreamlit:
             # Current time display
             current_time_placeholder = st.empty()
             current_time_placeholder.write(f"**Current Time:** {time_info['current_time']}")
+            st.write(f"**Market:** {self.get_market_status()}")
             
             st.write(f"**Last Update:** {time_info['last_update']}")
             st.write(f"**Updated:** {time_info['time_ago']}")
@@ -694,8 +1382,152 @@ class NSEOptionChainStreamlit:
                 st.write("**Status:** 📊 Manual refresh mode")
             
             st.caption(f"Refresh count: {st.session_state.refresh_counter}")
-
-
+            if st.session_state.last_change_count is not None:
+                st.caption(f"Strikes changed in last refresh: {st.session_state.last_change_count}")
+            
+            budget = self.limiter.status()
+            st.caption(
+                f"🚦 NSE budget: {budget['available']:.1f}/{budget['burst']} requests available, "
+                f"{budget['per_minute']:g}/min | {budget['queued']} waiting"
+            )
+            
+            dispatcher = self.get_dispatcher()
+            if dispatcher is not None:
+                pool = dispatcher.status()
+                st.caption(
+                    f"Scrape workers: {pool['alive']}/{pool['pool_size']} alive, {pool['busy']} busy, "
+                    f"{pool['queued']} queued | done {pool['completed']}, failed {pool['failed']}, "
+                    f"timed out {pool['timed_out']}"
+                )
+            
+            self.render_resource_panel()
+            self.render_quality_panel()
+            self.render_session_panel()
+            
+            if self.shared_hub is not None:
+                if self.shared_hub.ownership.is_owner:
+                    role = "fetch owner, publishing"
+                else:
+                    role = f"following pid {self.shared_hub.owner_pid() or '?'}"
+                st.caption(f"🔗 Shared snapshot: {role} | v{st.session_state.shared_version or '-'}")
+            
+            if self.query_api_url:
+                st.caption(f"🔌 Query API: {self.query_api_url}/snapshots")
+            
+            if self.profile_by_default or 'debug' in st.experimental_get_query_params():
+                st.session_state.profiling = st.checkbox(
+                    "🔬 Profile reruns",
+                    value=st.session_state.profiling,
+                    help="Sample the script thread during each rerun and keep the last profiles for download"
+                )
+    
+    def render_resource_panel(self):
+        """Render browser profile selection and per-fetch resource costs"""
+        with st.expander("🧪 Browser Resources"):
+            profile = st.selectbox(
+                "Browser profile",
+                options=list(BROWSER_PROFILES),
+                index=list(BROWSER_PROFILES).index(st.session_state.browser_profile),
+                help="lean blocks images, fonts and analytics and uses a smaller viewport"
+            )
+            if profile != st.session_state.browser_profile:
+                # The profile applies at browser start, so restart on the next fetch
+                self.close_driver()
+                st.session_state.scraper = None
+                st.session_state.browser_profile = profile
+            
+            if self.memory_cap_mb:
+                st.caption(f"Memory cap: {self.memory_cap_mb} MB per browser")
+            
+            cost_log = st.session_state.fetch_costs
+            if cost_log is None or not cost_log.records:
+                st.caption("No fetches measured yet")
+                return
+            
+            last = cost_log.records[-1]
+            st.write(
+                f"**Last fetch:** {last['wall_seconds']:.1f}s wall, {last['cpu_seconds']:.1f}s CPU, "
+                f"{last['peak_rss_mb']:.0f} MB peak RSS ({last['profile']})"
+            )
+            st.dataframe(pd.DataFrame(cost_log.summary()), use_container_width=True, hide_index=True)
+            
+            counts = st.session_state.schema_event_counts
+            st.caption(f"Table schema: {counts['drift']} layout changes, {counts['fallback']} fallbacks")
+            if st.session_state.schema_events:
+                last_event = st.session_state.schema_events[-1]
+                st.caption(f"Last schema event: {last_event['message']}")
+    
+    def render_quality_panel(self):
+        """Render validation counters and recently quarantined rows"""
+        monitor = st.session_state.quality_monitor
+        with st.expander("🩺 Data Quality"):
+            if monitor is None:
+                st.caption("No snapshots validated yet")
+                return
+            
+            stats = monitor.stats()
+            st.caption(
+                f"Snapshots: {stats['snapshots_checked']} checked, {stats['snapshots_rejected']} rejected | "
+                f"Rows: {stats['rows_checked']} checked, {stats['rows_quarantined']} quarantined | "
+                f"last check {stats['check_ms']:.1f} ms"
+            )
+            st.dataframe(
+                pd.DataFrame({'Check': list(ROW_CHECKS), 'Rows': [stats['checks'][check] for check in ROW_CHECKS]}),
+                use_container_width=True,
+                hide_index=True
+            )
+            if stats['last_rejection']:
+                rejected_ist = datetime.fromtimestamp(stats['last_rejection']['time'], pytz.timezone('Asia/Kolkata'))
+                st.caption(f"Last rejection {rejected_ist.strftime('%H:%M:%S')} IST: {stats['last_rejection']['reason']}")
+            
+            recent = monitor.recent_quarantine()
+            if recent:
+                st.dataframe(
+                    pd.DataFrame(list(reversed(recent)))[['strike', 'reasons', 'expiry']],
+                    use_container_width=True,
+                    hide_index=True
+                )
+    
+    def render_session_panel(self):
+        """Render live sessions, browsers and memory held by this server process"""
+        with st.expander("🧹 Sessions"):
+            stats = self.session_registry.stats()
+            if stats['last_sweep'] is None:
+                st.caption(f"First sweep within {self.session_registry.sweep_interval}s")
+                return
+            
+            swept_ist = datetime.fromtimestamp(stats['last_sweep'], pytz.timezone('Asia/Kolkata'))
+            st.caption(
+                f"{stats['live_sessions']} live sessions holding {stats['bytes'] / (1024 * 1024):.1f} MB | "
+                f"{stats['browsers']} session browsers, {stats['browser_processes']} browser processes "
+                f"({stats['browser_rss'] / (1024 * 1024):.0f} MB RSS) | swept {swept_ist.strftime('%H:%M:%S')} IST"
+            )
+            st.caption(
+                f"Evicted {stats['evicted_idle']} idle and {stats['evicted_closed']} closed sessions, "
+                f"trimmed {stats['trimmed']} over the memory cap | reaped {stats['orphans_reaped']} orphaned "
+                f"browsers ({stats['processes_reaped']} processes)"
+            )
+            if stats['sessions']:
+                sessions = pd.DataFrame(stats['sessions'])
+                sessions['MB'] = (sessions.pop('bytes') / (1024 * 1024)).round(1)
+                st.dataframe(sessions, use_container_width=True, hide_index=True)
+    
+    def get_market_status(self):
+        """Describe whether the commodity market is open, in IST"""
+        scheduler = self.get_refresh_scheduler()
+        current_time = datetime.now(pytz.UTC)
+        ist = pytz.timezone('Asia/Kolkata')
+        
+        if scheduler.market_open(current_time):
+            close_time = scheduler.calendar.session_close(current_time).strftime('%H:%M')
+            interval = int(scheduler.interval(st.session_state.selected_expiry_date))
+            return f"🟢 Open until {close_time} IST | refresh every {interval}s"
+        
+        next_open = scheduler.calendar.next_open(current_time)
+        if next_open:
+            return f"🔴 Closed, opens {next_open.astimezone(ist).strftime('%a %d-%b %H:%M')} IST"
+        return "🔴 Closed"
+    
     def create_summary_metrics(self, filtered_data):
         """Create summary metrics"""
         ce_data = filtered_data[filtered_data['Type'] == 'CE']
@@ -719,9 +1551,12 @@ class NSEOptionChainStreamlit:
             'total_strikes': total_ce + total_pe
         }
     
-    def prepare_display_data(self):
+    def prepare_display_data(self, all_data=None, quarantine=None):
         """Prepare data for display"""
-        all_data = st.session_state.option_data
+        if all_data is None:
+            all_data = st.session_state.option_data
+        if quarantine is None:
+            quarantine = st.session_state.quarantine
         display_data = []
         matches_found = 0
         
@@ -739,10 +1574,12 @@ class NSEOptionChainStreamlit:
                     'Bid': data['CE_Bid'],
                     'Ask': data['CE_Ask'],
                     'Ask_Qty': data['CE_Ask_Qty'],
+                    **{field: data.get(f'CE_{field}', 'NA') for field in MARKET_FIELDS},
                     'Match_Status': 'Found' if matching_strike == strike else f'Matched to {matching_strike}'
                 })
                 matches_found += 1
             else:
+                quarantined = self.find_matching_strike(strike, quarantine.keys())
                 display_data.append({
                     'Strike': self.format_strike_for_display(strike),
                     'Type': 'CE',
@@ -751,7 +1588,11 @@ class NSEOptionChainStreamlit:
                     'Bid': 'NA',
                     'Ask': 'NA',
                     'Ask_Qty': 'NA',
-                    'Match_Status': 'Not Found'
+                    **{field: 'NA' for field in MARKET_FIELDS},
+                    'Match_Status': (
+                        f"Quarantined ({', '.join(quarantine[quarantined]['reasons'])})"
+                        if quarantined else 'Not Found'
+                    )
                 })
         
         # Process PE strikes
@@ -768,10 +1609,12 @@ class NSEOptionChainStreamlit:
                     'Bid': data['PE_Bid'],
                     'Ask': data['PE_Ask'],
                     'Ask_Qty': data['PE_Ask_Qty'],
+                    **{field: data.get(f'PE_{field}', 'NA') for field in MARKET_FIELDS},
                     'Match_Status': 'Found' if matching_strike == strike else f'Matched to {matching_strike}'
                 })
                 matches_found += 1
             else:
+                quarantined = self.find_matching_strike(strike, quarantine.keys())
                 display_data.append({
                     'Strike': self.format_strike_for_display(strike),
                     'Type': 'PE',
@@ -780,11 +1623,31 @@ class NSEOptionChainStreamlit:
                     'Bid': 'NA',
                     'Ask': 'NA',
                     'Ask_Qty': 'NA',
-                    'Match_Status': 'Not Found'
+                    **{field: 'NA' for field in MARKET_FIELDS},
+                    'Match_Status': (
+                        f"Quarantined ({', '.join(quarantine[quarantined]['reasons'])})"
+                        if quarantined else 'Not Found'
+                    )
                 })
         
         return display_data, matches_found
     
+    def get_display_frame(self, all_data=None, data_key=None, quarantine=None):
+        """Get the display frame and match count, rebuilt only when data or strikes changed"""
+        cache_key = (
+            st.session_state.data_version if data_key is None else data_key,
+            tuple(st.session_state.ce_strikes),
+            tuple(st.session_state.pe_strikes)
+        )
+        cached = st.session_state.display_cache
+        if cached and cached[0] == cache_key:
+            return cached[1], cached[2]
+        
+        display_data, matches_found = self.prepare_display_data(all_data, quarantine)
+        df = pd.DataFrame(display_data)
+        st.session_state.display_cache = (cache_key, df, matches_found)
+        return df, matches_found
+    
     def render_data_tables(self, df):
         """Render the data tables"""
         # Show match status summary for not found strikes only
@@ -795,6 +1658,12 @@ class NSEOptionChainStreamlit:
             for type_val, strike_val in not_found_strikes:
                 st.write(f"- {type_val} {strike_val}")
         
+        quarantined = df[df['Match_Status'].str.startswith('Quarantined')]
+        if len(quarantined) > 0:
+            st.warning(f"🩺 {len(quarantined)} strikes held back by validation:")
+            for type_val, strike_val, status in quarantined[['Type', 'Strike', 'Match_Status']].values.tolist():
+                st.write(f"- {type_val} {strike_val}: {status}")
+        
         # Split into CE and PE tables
         col1, col2 = st.columns(2)
         
@@ -813,6 +1682,11 @@ class NSEOptionChainStreamlit:
                         "Bid": st.column_config.TextColumn("Bid", width="small"),
                         "Ask": st.column_config.TextColumn("Ask", width="small"),
                         "Ask_Qty": st.column_config.TextColumn("Ask Qty", width="small"),
+                        "OI": st.column_config.TextColumn("OI", width="small"),
+                        "Chng_OI": st.column_config.TextColumn("Chng in OI", width="small"),
+                        "LTP": st.column_config.TextColumn("LTP", width="small"),
+                        "Chng": st.column_config.TextColumn("Chng", width="small"),
+                        "IV": st.column_config.TextColumn("IV", width="small"),
                     }
                 )
             else:
@@ -833,6 +1707,11 @@ class NSEOptionChainStreamlit:
                         "Bid": st.column_config.TextColumn("Bid", width="small"),
                         "Ask": st.column_config.TextColumn("Ask", width="small"),
                         "Ask_Qty": st.column_config.TextColumn("Ask Qty", width="small"),
+                        "OI": st.column_config.TextColumn("OI", width="small"),
+                        "Chng_OI": st.column_config.TextColumn("Chng in OI", width="small"),
+                        "LTP": st.column_config.TextColumn("LTP", width="small"),
+                        "Chng": st.column_config.TextColumn("Chng", width="small"),
+                        "IV": st.column_config.TextColumn("IV", width="small"),
                     }
                 )
             else:
@@ -955,31 +1834,53 @@ class NSEOptionChainStreamlit:
     
     def display_main_content(self):
         """Display the main content area"""
-        if not st.session_state.strikes_loaded:
+        if not st.session_state.strikes_loaded and not st.session_state.full_chain_mode:
             st.info("📋 **Please load the strikes file first using the sidebar.**")
             st.markdown("### Expected File Format:")
             st.code("""CE STRIKE = ['112,250', '112,750', '113,250']
 PE STRIKE = ['113,750', '113,250', '112,750']""")
             return
         
+        if st.session_state.replay_mode:
+            self.render_replay()
+            return
+        
+        if st.session_state.restored_from_checkpoint and st.session_state.option_data:
+            restored_ist = st.session_state.restored_from_checkpoint.astimezone(pytz.timezone('Asia/Kolkata'))
+            refreshing = " - refreshing in the background" if st.session_state.pending_warm_refresh else ""
+            st.warning(f"🕰️ Showing data restored from the checkpoint of {restored_ist.strftime('%d-%b %H:%M:%S')} IST{refreshing}")
+        
+        released = st.session_state.session_released
+        if released and not st.session_state.option_data:
+            released_ist = datetime.fromtimestamp(released['time'], pytz.timezone('Asia/Kolkata'))
+            cause = "was idle" if released['reason'] == 'idle' else "lost its connection"
+            st.info(f"💤 This session {cause} and released its data and browser at {released_ist.strftime('%H:%M:%S')} IST.")
+        
         # Display data if available
         if st.session_state.option_data:
             self.display_option_data()
         else:
             st.info("📊 **Click 'Refresh Now' to fetch the latest option chain data.**")
     
-    def display_option_data(self):
-        """Display the fetched option chain data"""
-        all_data = st.session_state.option_data
+    def display_option_data(self, all_data=None, data_key=None, replay=False):
+        """Display the fetched (or replayed) option chain data"""
+        if all_data is None:
+            all_data = st.session_state.option_data
         
         if not all_data:
             st.warning("⚠️ No option chain data available.")
             return
         
-        # Prepare data for display
-        display_data, matches_found = self.prepare_display_data()
+        # Full-chain mode without a strike file: the chain is the whole view
+        if not st.session_state.strikes_loaded:
+            self.render_full_chain(all_data if replay else None, data_key)
+            return
+        
+        # Prepare data for display; a replayed snapshot holds only rows that passed validation
+        # back then, so the current session's quarantine says nothing about its missing strikes
+        df, matches_found = self.get_display_frame(all_data, data_key, quarantine={} if replay else None)
         
-        if not display_data:
+        if len(df) == 0:
             st.warning("⚠️ No strike data could be processed.")
             return
         
@@ -987,8 +1888,6 @@ PE STRIKE = ['113,750', '113,250', '112,750']""")
         total_strikes = len(st.session_state.ce_strikes) + len(st.session_state.pe_strikes)
         st.info(f"📊 **Match Summary:** {matches_found}/{total_strikes} strikes found on website")
         
-        df = pd.DataFrame(display_data)
-        
         # Summary metrics
         metrics = self.create_summary_metrics(df)
         
@@ -1011,14 +1910,444 @@ PE STRIKE = ['113,750', '113,250', '112,750']""")
         if st.session_state.selected_expiry_date:
             st.info(f"🗓️ **Selected Expiry Date:** {st.session_state.selected_expiry_date}")
         
+        if replay:
+            tabs = st.tabs(["📊 Data Table", "📈 Charts", "🧮 OI Analytics"])
+            with tabs[0]:
+                self.render_data_tables(df)
+            with tabs[1]:
+                self.create_charts(df)
+            with tabs[2]:
+                self.render_oi_analytics(all_data, data_key)
+            return
+        
         # Tabs for different views
-        tab1, tab2 = st.tabs(["📊 Data Table", "📈 Charts"])
+        tab_names = ["📊 Data Table", "📈 Charts", "🧮 OI Analytics", "📉 Time Series", "🔔 Alerts"]
+        if st.session_state.full_chain_mode:
+            tab_names.append("🧾 Full Chain")
+        tabs = st.tabs(tab_names)
         
-        with tab1:
+        with tabs[0]:
             self.render_data_tables(df)
         
-        with tab2:
+        with tabs[1]:
             self.create_charts(df)
+        
+        with tabs[2]:
+            self.render_oi_analytics()
+        
+        with tabs[3]:
+            self.render_timeseries()
+        
+        with tabs[4]:
+            self.render_alerts()
+        
+        if st.session_state.full_chain_mode:
+            with tabs[5]:
+                self.render_full_chain()
+    
+    def render_replay(self):
+        """Scrub or play back stored snapshots through the regular tables and metrics"""
+        log = get_snapshot_log(os.path.join(self.data_dir, "snapshots.sqlite"))
+        expiries = log.expiries()
+        if not expiries:
+            st.info("⏪ **No stored snapshots yet. Snapshots are recorded with every refresh.**")
+            return
+        
+        ist = pytz.timezone('Asia/Kolkata')
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            default_expiry = st.session_state.replay_expiry or st.session_state.selected_expiry_date
+            expiry = st.selectbox(
+                "🗓️ Replay expiry", options=expiries,
+                index=expiries.index(default_expiry) if default_expiry in expiries else len(expiries) - 1
+            )
+        first_ts, last_ts, frame_count = log.time_range(expiry)
+        if expiry != st.session_state.replay_expiry or st.session_state.replay_time is None:
+            st.session_state.replay_expiry = expiry
+            st.session_state.replay_time = first_ts
+        with col2:
+            st.session_state.replay_speed = st.select_slider(
+                "Speed (×)", options=[1, 10, 25, 50, 100], value=st.session_state.replay_speed
+            )
+        with col3:
+            st.write("")
+            if st.session_state.replay_playing:
+                if st.button("⏸️ Pause", use_container_width=True):
+                    st.session_state.replay_playing = False
+                    st.session_state.replay_wall = None
+            elif st.button("▶️ Play", use_container_width=True):
+                if st.session_state.replay_time >= last_ts:
+                    st.session_state.replay_time = first_ts
+                st.session_state.replay_playing = True
+                st.session_state.replay_wall = time.monotonic()
+        
+        # Advance playback by the wall time since the last rerun
+        if st.session_state.replay_playing:
+            now = time.monotonic()
+            if st.session_state.replay_wall is not None:
+                st.session_state.replay_time += (now - st.session_state.replay_wall) * st.session_state.replay_speed
+            st.session_state.replay_wall = now
+            if st.session_state.replay_time >= last_ts:
+                st.session_state.replay_time = last_ts
+                st.session_state.replay_playing = False
+                st.session_state.replay_wall = None
+        
+        start = datetime.fromtimestamp(first_ts, ist)
+        end = datetime.fromtimestamp(last_ts, ist)
+        if end > start:
+            position = st.slider(
+                "Time (IST)",
+                min_value=start,
+                max_value=end,
+                value=datetime.fromtimestamp(min(max(st.session_state.replay_time, first_ts), last_ts), ist),
+                step=timedelta(seconds=1),
+                format="HH:mm:ss",
+                disabled=st.session_state.replay_playing
+            )
+            if not st.session_state.replay_playing:
+                st.session_state.replay_time = position.timestamp()
+        
+        frame_ts, snapshot = log.seek(expiry, st.session_state.replay_time)
+        if frame_ts is None:
+            st.warning("⚠️ No snapshot stored at this time.")
+            return
+        
+        st.caption(
+            f"⏪ Replaying {expiry} at {datetime.fromtimestamp(frame_ts, ist).strftime('%d-%b %H:%M:%S')} IST | "
+            f"{frame_count:,} stored frames"
+        )
+        self.display_option_data(snapshot, ('replay', expiry, frame_ts), replay=True)
+    
+    def render_timeseries(self):
+        """Render downsampled quote history for selected strikes"""
+        history = self.get_quote_history()
+        latest = history.latest_time()
+        if latest is None:
+            st.info("📉 **History builds up with every refresh. Click 'Refresh Now' to start.**")
+            return
+        
+        strikes = history.strikes()
+        watched = [s for s in list(st.session_state.ce_strikes) + list(st.session_state.pe_strikes) if s in strikes]
+        default_strikes = [s for s in st.session_state.ts_strikes if s in strikes] or list(dict.fromkeys(watched))[:10]
+        
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            st.session_state.ts_strikes = st.multiselect("Strikes", options=strikes, default=default_strikes)
+        with col2:
+            st.session_state.ts_sides = st.multiselect("Side", options=['CE', 'PE'], default=st.session_state.ts_sides)
+        with col3:
+            st.session_state.ts_metric = st.selectbox(
+                "Metric", options=list(METRICS), index=METRICS.index(st.session_state.ts_metric)
+            )
+        
+        col1, col2, col3 = st.columns(3)
+        windows = {'Last 15 min': 15 * 60, 'Last 1 hour': 60 * 60, 'Session': None, 'All': None}
+        window_names = list(windows.keys())
+        with col1:
+            st.session_state.ts_window = st.selectbox(
+                "Window", options=window_names, index=window_names.index(st.session_state.ts_window)
+            )
+        with col2:
+            st.session_state.ts_method = st.selectbox(
+                "Downsampling", options=list(DOWNSAMPLE_METHODS),
+                index=DOWNSAMPLE_METHODS.index(st.session_state.ts_method),
+                help="lttb keeps the visual shape, minmax keeps every bucket's high and low"
+            )
+        with col3:
+            st.session_state.ts_max_points = st.select_slider(
+                "Points per series", options=[250, 500, 1000, 2000, 5000],
+                value=st.session_state.ts_max_points
+            )
+        
+        if not st.session_state.ts_strikes or not st.session_state.ts_sides:
+            st.info("Select at least one strike and side.")
+            return
+        
+        # Windows are anchored at the newest snapshot so the cache key stays stable between refreshes
+        span = windows[st.session_state.ts_window]
+        start = latest - span if span else None
+        if st.session_state.ts_window == 'Session':
+            latest_ist = datetime.fromtimestamp(latest, pytz.timezone('Asia/Kolkata'))
+            start = self.get_refresh_scheduler().calendar.session_bounds(latest_ist.date())[0].timestamp()
+        cache_key = (
+            tuple(st.session_state.ts_strikes),
+            tuple(st.session_state.ts_sides),
+            st.session_state.ts_metric,
+            st.session_state.ts_window,
+            st.session_state.ts_method,
+            st.session_state.ts_max_points,
+            history.version
+        )
+        cached = st.session_state.figure_cache.get(cache_key)
+        if cached is None:
+            fig, raw_points, plotted_points = build_timeseries_figure(
+                history,
+                st.session_state.ts_strikes,
+                st.session_state.ts_sides,
+                st.session_state.ts_metric,
+                start=start,
+                max_points=st.session_state.ts_max_points,
+                method=st.session_state.ts_method
+            )
+            cached = {'json': fig.to_json(), 'raw_points': raw_points, 'plotted_points': plotted_points}
+            st.session_state.figure_cache.put(cache_key, cached)
+        
+        st.plotly_chart(pio.from_json(cached['json'], skip_invalid=True), use_container_width=True)
+        st.caption(
+            f"{cached['plotted_points']:,} of {cached['raw_points']:,} points plotted | "
+            f"figure {len(cached['json']) / 1024:.0f} KB | "
+            f"{history.point_count():,} points in history"
+        )
+        
+        with st.expander("🕯️ OHLC Bars"):
+            self.render_bars()
+    
+    def render_bars(self):
+        """Render OHLC bars of one strike from the rollup store"""
+        engine = get_rollup_engine(os.path.join(self.data_dir, "bars.sqlite"))
+        expiry = st.session_state.selected_expiry_date or 'Unknown'
+        strikes = self.get_quote_history().strikes()
+        if not strikes:
+            return
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            default = st.session_state.ts_strikes[0] if st.session_state.ts_strikes else strikes[0]
+            strike = st.selectbox("Bar strike", options=strikes, index=strikes.index(default) if default in strikes else 0)
+        with col2:
+            side = st.selectbox("Bar side", options=['CE', 'PE'])
+        with col3:
+            resolution = st.selectbox("Resolution", options=list(RESOLUTIONS.keys()))
+        
+        bars = engine.query(expiry, strike, side, resolution)
+        if bars.empty:
+            st.info("No bars yet for this strike.")
+            return
+        
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+        fig.add_trace(
+            go.Candlestick(
+                x=bars.index, open=bars['mid_open'], high=bars['mid_high'],
+                low=bars['mid_low'], close=bars['mid_close'], name='Mid'
+            ),
+            row=1, col=1
+        )
+        fig.add_trace(go.Bar(x=bars.index, y=bars['volume'], name='Volume', marker_color='#2a5298'), row=2, col=1)
+        fig.update_layout(height=500, showlegend=False, xaxis_rangeslider_visible=False,
+                          title_text=f"{strike} {side} {resolution} bars")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        stats = engine.stats()
+        st.caption(f"{len(bars)} bars | {stats['stored_bars']:,} stored | {stats['open_bars']:,} open")
+        st.download_button(
+            label="📥 Download bars (CSV)",
+            data=bars.to_csv(),
+            file_name=f"bars_{strike}_{side}_{resolution}.csv".replace(',', ''),
+            mime="text/csv"
+        )
+    
+    def render_full_chain(self, replay_data=None, replay_key=None):
+        """Render the full option chain with server-side filtering, sorting and pagination.
+        
+        With ``replay_data`` the replayed snapshot is rendered instead of the live chain store.
+        """
+        chain_store = st.session_state.chain_store
+        if replay_data is not None:
+            expiry = None
+            frame = self.get_replay_chain_frame(replay_data, replay_key)
+        else:
+            if not chain_store:
+                st.info("🧾 **Click 'Refresh Now' to fetch the full option chain.**")
+                return
+            
+            expiries = list(chain_store.keys())
+            default_expiry = st.session_state.selected_expiry_date
+            expiry = st.selectbox(
+                "🗓️ Expiry",
+                options=expiries,
+                index=expiries.index(default_expiry) if default_expiry in expiries else len(expiries) - 1
+            )
+            
+            frame = self.get_chain_frame(expiry)
+        if frame is None or len(frame) == 0:
+            st.warning("⚠️ No strikes stored for this expiry.")
+            return
+        
+        # Filter and sort controls
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            side_options = ['Both', 'CE', 'PE']
+            st.session_state.chain_side = st.selectbox(
+                "Side", options=side_options, index=side_options.index(st.session_state.chain_side)
+            )
+        with col2:
+            sort_options = ['Strike_Value', 'Volume', 'Spread', 'Bid', 'Ask', 'Bid_Qty', 'Ask_Qty',
+                            'OI', 'Chng_OI', 'LTP', 'Chng', 'IV']
+            st.session_state.chain_sort_by = st.selectbox(
+                "Sort by", options=sort_options, index=sort_options.index(st.session_state.chain_sort_by)
+            )
+        with col3:
+            st.session_state.chain_ascending = st.checkbox("Ascending", value=st.session_state.chain_ascending)
+            st.session_state.chain_only_watched = st.checkbox("Watched only", value=st.session_state.chain_only_watched)
+        with col4:
+            st.session_state.chain_only_quoted = st.checkbox("With Bid/Ask only", value=st.session_state.chain_only_quoted)
+            page_sizes = [25, 50, 100, 200]
+            st.session_state.chain_page_size = st.selectbox(
+                "Rows per page", options=page_sizes, index=page_sizes.index(st.session_state.chain_page_size)
+            )
+        
+        strike_range = None
+        strike_values = frame['Strike_Value'].dropna()
+        if len(strike_values) > 1 and strike_values.min() < strike_values.max():
+            strike_range = st.slider(
+                "Strike range",
+                min_value=float(strike_values.min()),
+                max_value=float(strike_values.max()),
+                value=(float(strike_values.min()), float(strike_values.max()))
+            )
+        
+        filtered = filter_chain_frame(
+            frame,
+            side=st.session_state.chain_side,
+            strike_range=strike_range,
+            only_watched=st.session_state.chain_only_watched,
+            only_quoted=st.session_state.chain_only_quoted,
+            sort_by=st.session_state.chain_sort_by,
+            ascending=st.session_state.chain_ascending
+        )
+        
+        if len(filtered) == 0:
+            st.info("No strikes match the current filters")
+            return
+        
+        total_pages = max(1, -(-len(filtered) // st.session_state.chain_page_size))
+        st.session_state.chain_page = st.number_input(
+            "Page", min_value=1, max_value=total_pages,
+            value=min(st.session_state.chain_page, total_pages), step=1
+        )
+        page_df, page, total_pages = paginate(filtered, st.session_state.chain_page, st.session_state.chain_page_size)
+        
+        if expiry is None:
+            fetched_note = "replayed snapshot"
+        else:
+            fetched_at = chain_store[expiry]['fetched_at'].astimezone(pytz.timezone('Asia/Kolkata')).strftime('%H:%M:%S')
+            fetched_note = f"fetched {fetched_at} IST"
+        start_row = (page - 1) * st.session_state.chain_page_size + 1
+        st.caption(
+            f"Showing rows {start_row}-{start_row + len(page_df) - 1} of {len(filtered)} "
+            f"(page {page}/{total_pages}) | {len(frame) // 2} strikes | {fetched_note}"
+        )
+        
+        st.dataframe(
+            page_df.drop(columns=['Strike_Value']),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Strike": st.column_config.TextColumn("Strike", width="small"),
+                "Type": st.column_config.TextColumn("Type", width="small"),
+                "Volume": st.column_config.NumberColumn("Volume", format="%d"),
+                "Bid_Qty": st.column_config.NumberColumn("Bid Qty", format="%d"),
+                "Bid": st.column_config.NumberColumn("Bid", format="%.2f"),
+                "Ask": st.column_config.NumberColumn("Ask", format="%.2f"),
+                "Ask_Qty": st.column_config.NumberColumn("Ask Qty", format="%d"),
+                "Spread": st.column_config.NumberColumn("Spread", format="%.2f"),
+                "OI": st.column_config.NumberColumn("OI", format="%d"),
+                "Chng_OI": st.column_config.NumberColumn("Chng in OI", format="%d"),
+                "LTP": st.column_config.NumberColumn("LTP", format="%.2f"),
+                "Chng": st.column_config.NumberColumn("Chng", format="%.2f"),
+                "IV": st.column_config.NumberColumn("IV", format="%.2f"),
+                "Watched": st.column_config.CheckboxColumn("⭐ Watched", width="small"),
+            }
+        )
+    
+    def get_oi_analytics(self, all_data=None, data_key=None):
+        """Max pain, PCR and OI build-up for the whole chain, recomputed only when the data changed"""
+        cache_key = st.session_state.data_version if data_key is None else data_key
+        cached = st.session_state.oi_analytics_cache
+        if cached and cached[0] == cache_key:
+            return cached[1]
+        
+        analytics = chain_analytics(st.session_state.option_data if all_data is None else all_data)
+        st.session_state.oi_analytics_cache = (cache_key, analytics)
+        return analytics
+    
+    def render_oi_analytics(self, all_data=None, data_key=None):
+        """Render max pain, put/call ratios and OI build-up across the chain"""
+        analytics = self.get_oi_analytics(all_data, data_key)
+        if not analytics['has_oi']:
+            st.info("🧮 **No open interest in this snapshot. OI columns are captured from the next refresh.**")
+            return
+        
+        def ratio_text(value):
+            return f"{value:.2f}" if value is not None else "NA"
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Max Pain", f"{analytics['max_pain']:,.0f}" if analytics['max_pain'] is not None else "NA")
+        with col2:
+            st.metric("PCR (OI)", ratio_text(analytics['pcr_oi']))
+        with col3:
+            st.metric("PCR (Chng in OI)", ratio_text(analytics['pcr_chng_oi']))
+        with col4:
+            st.metric("PCR (Volume)", ratio_text(analytics['pcr_volume']))
+        
+        frame = analytics['frame']
+        fig = make_subplots(
+            rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+            subplot_titles=('Open Interest / Change in OI', 'Writer payout at expiry (max pain)')
+        )
+        for side, color in (('CE', '#2a5298'), ('PE', '#e74c3c')):
+            fig.add_trace(go.Bar(x=frame['Strike_Value'], y=frame[f'{side}_OI'], name=f'{side} OI',
+                                 marker_color=color, opacity=0.8), row=1, col=1)
+            fig.add_trace(go.Scatter(x=frame['Strike_Value'], y=frame[f'{side}_Chng_OI'], name=f'{side} Chng in OI',
+                                     mode='lines+markers', line=dict(color=color, dash='dot')), row=1, col=1)
+        pain = analytics['pain']
+        fig.add_trace(go.Scatter(x=pain.index, y=pain.values, name='Payout', mode='lines',
+                                 line=dict(color='#27ae60')), row=2, col=1)
+        if analytics['max_pain'] is not None:
+            fig.add_vline(x=analytics['max_pain'], line_dash='dash', line_color='#7f8c8d')
+        fig.update_layout(height=600, barmode='group', legend=dict(orientation='h'))
+        st.plotly_chart(fig, use_container_width=True)
+        
+        counts = analytics['buildup_counts']
+        st.caption(" | ".join(f"{label}: {counts[label]}" for label in BUILDUP_LABELS))
+        
+        buildup = analytics['buildup']
+        label_filter = st.multiselect("Build-up", options=list(BUILDUP_LABELS), default=list(BUILDUP_LABELS))
+        shown = buildup[buildup['Build_Up'].isin(label_filter)].sort_values('OI', ascending=False, na_position='last')
+        st.dataframe(
+            shown.drop(columns=['Strike_Value']),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Strike": st.column_config.TextColumn("Strike", width="small"),
+                "Type": st.column_config.TextColumn("Type", width="small"),
+                "OI": st.column_config.NumberColumn("OI", format="%d"),
+                "Chng_OI": st.column_config.NumberColumn("Chng in OI", format="%d"),
+                "LTP": st.column_config.NumberColumn("LTP", format="%.2f"),
+                "Chng": st.column_config.NumberColumn("Chng", format="%.2f"),
+                "IV": st.column_config.NumberColumn("IV", format="%.2f"),
+                "Build_Up": st.column_config.TextColumn("Build-up"),
+            }
+        )
+    
+    def render_alerts(self):
+        """Render the most recent alerts"""
+        sink = st.session_state.alert_sink
+        if st.session_state.alert_engine is None:
+            st.info("🔔 Load an alert rules file from the sidebar to enable alerts.")
+            return
+        
+        if sink is None or not sink.alerts:
+            st.success("✅ No alerts fired yet")
+            return
+        
+        alerts_df = pd.DataFrame(list(reversed(sink.alerts)))
+        st.dataframe(
+            alerts_df[['timestamp', 'side', 'strike', 'message']],
+            use_container_width=True,
+            hide_index=True
+        )
     
     def render_export_section(self):
         """Render the export/download section"""
@@ -1027,9 +2356,8 @@ PE STRIKE = ['113,750', '113,250', '112,750']""")
             col1, col2, col3 = st.columns([1, 1, 1])
             
             with col2:
-                display_data, _ = self.prepare_display_data()
-                if display_data:
-                    df = pd.DataFrame(display_data)
+                df, _ = self.get_display_frame()
+                if len(df) > 0:
                     report_content = self.generate_text_report(df)
                     
                     st.download_button(
@@ -1056,7 +2384,7 @@ PE STRIKE = ['113,750', '113,250', '112,750']""")
                 if seconds_left > 0:
                     minutes = int(seconds_left // 60)
                     seconds = int(seconds_left % 60)
-                    progress = 1 - (seconds_left / st.session_state.refresh_interval)
+                    progress = max(0.0, 1 - (seconds_left / st.session_state.refresh_interval))
                     
                     st.markdown(
                         f'<div class="auto-refresh-status">⏰ Next refresh in {minutes}:{seconds:02d}</div>',
@@ -1076,26 +2404,33 @@ PE STRIKE = ['113,750', '113,250', '112,750']""")
         """Handle auto-refresh logic"""
         if (st.session_state.auto_refresh and 
             st.session_state.last_fetch_time and 
-            st.session_state.strikes_loaded and
+            (st.session_state.strikes_loaded or st.session_state.full_chain_mode) and
             not st.session_state.is_fetching):
             
             current_time = datetime.now(pytz.UTC)
+            scheduler = self.get_refresh_scheduler()
             
             # Initialize next refresh time if not set
             if not st.session_state.next_refresh_time:
-                st.session_state.next_refresh_time = current_time + timedelta(seconds=st.session_state.refresh_interval)
+                st.session_state.next_refresh_time = scheduler.next_due(
+                    st.session_state.selected_expiry_date, current_time
+                )
             
-            # Check if it's time to refresh
-            if current_time >= st.session_state.next_refresh_time:
-                st.session_state.is_fetching = True
-                try:
-                    success = self.fetch_data()
-                    if success:
-                        st.session_state.next_refresh_time = datetime.now(pytz.UTC) + timedelta(seconds=st.session_state.refresh_interval)
-                        st.session_state.refresh_counter += 1
-                        st.session_state.last_fetch_time = datetime.now(pytz.UTC)
-                finally:
-                    st.session_state.is_fetching = False
+            # Never fetch while the market is closed; wait for the next session open
+            if not scheduler.market_open(current_time):
+                next_open = scheduler.calendar.next_open(current_time)
+                if next_open and (not st.session_state.next_refresh_time or st.session_state.next_refresh_time < next_open):
+                    st.session_state.next_refresh_time = next_open
+                return
+            
+            # Followers pick up the fetch owner's snapshot as soon as it is published
+            if self.shared_update_available():
+                self.fetch_data(priority=PRIORITY_SCHEDULED)
+                return
+            
+            # Check if it's time to refresh (fetch_data schedules the next one)
+            if st.session_state.next_refresh_time and current_time >= st.session_state.next_refresh_time:
+                self.fetch_data(priority=PRIORITY_SCHEDULED)
     
     def render_status_footer(self):
         """Render the status footer with real-time updates"""
@@ -1134,8 +2469,87 @@ PE STRIKE = ['113,750', '113,250', '112,750']""")
             
             st.caption(f"Total refreshes: {st.session_state.refresh_counter}")
     
+    def render_profiles(self):
+        """Render the hottest functions of recent reruns with flamegraph downloads"""
+        buffer = st.session_state.profiles
+        if not st.session_state.profiling or buffer is None:
+            return
+        profiles = buffer.list()
+        if not profiles:
+            return
+        
+        with st.expander("🔬 Rerun Profiles"):
+            ist = pytz.timezone('Asia/Kolkata')
+            labels = [
+                f"#{i + 1} {datetime.fromtimestamp(p.started_at, ist).strftime('%H:%M:%S')} {p.label} - {p.duration * 1000:.0f} ms"
+                for i, p in enumerate(profiles)
+            ]
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                choice = st.selectbox("Profile", options=labels, index=len(labels) - 1)
+            with col2:
+                sort_by = st.radio("Sort by", options=['self', 'total'], horizontal=True)
+            with col3:
+                st.session_state.profile_top_n = st.number_input(
+                    "Top N", min_value=5, max_value=200, value=int(st.session_state.profile_top_n), step=5
+                )
+            
+            profile = profiles[labels.index(choice)]
+            st.caption(f"{profile.sample_count} samples every {profile.interval * 1000:.0f} ms over {profile.duration:.2f}s")
+            top = pd.DataFrame(profile.top_functions(st.session_state.profile_top_n, sort_by=sort_by))
+            if len(top) > 0:
+                st.dataframe(
+                    top,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "self_ms": st.column_config.NumberColumn("Self (ms)", format="%.0f"),
+                        "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.0f"),
+                        "self_pct": st.column_config.NumberColumn("Self %", format="%.1f"),
+                        "total_pct": st.column_config.NumberColumn("Total %", format="%.1f"),
+                    }
+                )
+            
+            stamp = datetime.fromtimestamp(profile.started_at, ist).strftime('%Y%m%d_%H%M%S')
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "📥 Speedscope profile", data=profile.to_speedscope(),
+                    file_name=f"rerun_{stamp}.speedscope.json", mime="application/json",
+                    use_container_width=True
+                )
+            with col2:
+                st.download_button(
+                    "📥 Collapsed stacks (flamegraph)", data=profile.to_collapsed(),
+                    file_name=f"rerun_{stamp}.folded", mime="text/plain",
+                    use_container_width=True
+                )
+    
     def run(self):
-        """Main application entry point"""
+        """Main application entry point, sampled by the profiler when profiling is on"""
+        if not st.session_state.profiling:
+            self.render_page()
+        else:
+            if st.session_state.profiles is None:
+                st.session_state.profiles = ProfileBuffer()
+            fetches = st.session_state.refresh_counter
+            profiler = SamplingProfiler().start()
+            try:
+                self.render_page()
+            finally:
+                label = "rerun+fetch" if st.session_state.refresh_counter != fetches else "rerun"
+                st.session_state.profiles.add(profiler.stop(label))
+        
+        # Force a rerun for real-time updates if auto-refresh or replay playback is running
+        if st.session_state.replay_mode and st.session_state.replay_playing:
+            time.sleep(0.5)
+            st.rerun()
+        elif st.session_state.auto_refresh:
+            time.sleep(1)  # Small delay to prevent excessive reruns
+            st.rerun()
+    
+    def render_page(self):
+        """Render one pass of the dashboard"""
         # Header
         st.markdown("""
             <div class="main-header">
@@ -1162,10 +2576,12 @@ PE STRIKE = ['113,750', '113,250', '112,750']""")
         # Status footer
         self.render_status_footer()
         
-        # Force a rerun for real-time updates if auto-refresh is enabled
-        if st.session_state.auto_refresh:
-            time.sleep(1)  # Small delay to prevent excessive reruns
-            st.rerun()
+        # Profiles of earlier reruns (the current one is still being sampled)
+        self.render_profiles()
+        
+        # Replace restored checkpoint data once the stale view is on screen
+        if st.session_state.pending_warm_refresh and not st.session_state.replay_mode:
+            self.warm_refresh()
 
 # Main function
 def main():
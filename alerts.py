@@ -0,0 +1,326 @@
+"""Rule-based alerting on option chain snapshots.
+
+Rules are declared in a JSON file, for example::
+
+    [
+        {"type": "spread_above", "strike": "112,250", "side": "CE", "threshold": 50},
+        {"type": "bid_vanished", "strike": "113,250", "side": "PE"},
+        {"type": "volume_jump", "strike": "*", "side": "CE", "jump": 100},
+        {"type": "strike_not_found", "strike": "115,000"}
+    ]
+
+The engine indexes rules by strike and only evaluates the strikes that changed
+between two snapshots, so the cost of a refresh scales with the number of
+changes rather than rules x strikes. A strike of ``"*"`` matches every strike.
+``strike_not_found`` rules are a standing condition: their strikes are checked
+on every snapshot and re-fire after each cooldown while they stay missing.
+
+Webhook deliveries run on a background thread, so a slow or unreachable
+endpoint never holds up a rerun; their failures are reported with the next
+evaluation.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+import pytz
+
+from option_snapshot import diff_snapshots, normalize_strike, parse_number, side_fields
+
+WILDCARD = '*'
+
+
+class AlertRule:
+    """Base class for alert rules"""
+
+    rule_type = None
+
+    def __init__(self, strike=WILDCARD, side='CE', rule_id=None):
+        self.strike = strike if strike == WILDCARD else normalize_strike(strike)
+        self.side = side.upper()
+        self.rule_id = rule_id or f"{self.rule_type}:{self.side}:{self.strike}"
+
+    def evaluate(self, strike, before, after):
+        """Return an alert message or None. before/after are side_fields dicts"""
+        raise NotImplementedError
+
+
+class SpreadAboveRule(AlertRule):
+    """Fires when ask - bid is above a threshold"""
+
+    rule_type = 'spread_above'
+
+    def __init__(self, threshold, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = float(threshold)
+
+    def evaluate(self, strike, before, after):
+        bid = parse_number(after.get('Bid'))
+        ask = parse_number(after.get('Ask'))
+        if bid is None or ask is None:
+            return None
+        spread = ask - bid
+        if spread > self.threshold:
+            return f"{self.side} {strike} spread {spread:,.2f} > {self.threshold:,.2f}"
+        return None
+
+
+class BidVanishedRule(AlertRule):
+    """Fires when a bid that was present disappears"""
+
+    rule_type = 'bid_vanished'
+
+    def evaluate(self, strike, before, after):
+        if before.get('Bid', 'NA') != 'NA' and after.get('Bid', 'NA') == 'NA':
+            return f"{self.side} {strike} bid vanished (was {before['Bid']})"
+        return None
+
+
+class VolumeJumpRule(AlertRule):
+    """Fires when volume increases by at least ``jump`` between snapshots"""
+
+    rule_type = 'volume_jump'
+
+    def __init__(self, jump, **kwargs):
+        super().__init__(**kwargs)
+        self.jump = float(jump)
+
+    def evaluate(self, strike, before, after):
+        if not before:
+            # Strike just appeared: there is no previous volume to compare with
+            return None
+        old_volume = parse_number(before.get('Volume')) or 0.0
+        new_volume = parse_number(after.get('Volume'))
+        if new_volume is None:
+            return None
+        if new_volume - old_volume >= self.jump:
+            return f"{self.side} {strike} volume jumped {old_volume:,.0f} -> {new_volume:,.0f}"
+        return None
+
+
+class StrikeNotFoundRule(AlertRule):
+    """Fires when a watched strike is missing from the snapshot"""
+
+    rule_type = 'strike_not_found'
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('side', 'ANY')
+        super().__init__(**kwargs)
+
+    def evaluate(self, strike, before, after):
+        return f"Strike {strike} not found on website"
+
+
+RULE_TYPES = {
+    rule_class.rule_type: rule_class
+    for rule_class in (SpreadAboveRule, BidVanishedRule, VolumeJumpRule, StrikeNotFoundRule)
+}
+
+
+def build_rule(spec):
+    """Build an AlertRule from a dict spec"""
+    spec = dict(spec)
+    rule_type = spec.pop('type', None)
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Unknown alert rule type: {rule_type}")
+    if rule_type == 'strike_not_found' and spec.get('strike', WILDCARD) == WILDCARD:
+        raise ValueError("strike_not_found rules need an explicit strike")
+    return RULE_TYPES[rule_type](**spec)
+
+
+def load_rules(file_path):
+    """Load alert rules from a JSON file"""
+    with open(file_path, 'r') as file:
+        specs = json.load(file)
+    return [build_rule(spec) for spec in specs]
+
+
+class MemorySink:
+    """Keeps the most recent alerts in memory"""
+
+    def __init__(self, max_alerts=200):
+        self.max_alerts = max_alerts
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+        del self.alerts[:-self.max_alerts]
+
+
+class FileSink:
+    """Appends alerts as JSON lines to a file"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def send(self, alert):
+        with open(self.file_path, 'a') as file:
+            file.write(json.dumps(alert) + '\n')
+
+
+class WebhookSink:
+    """POSTs alerts as JSON to a webhook URL from a background thread"""
+
+    def __init__(self, url, timeout=5, max_pending=100, idle_exit=60):
+        self.url = url
+        self.timeout = timeout
+        self.idle_exit = idle_exit
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.errors = []
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def send(self, alert):
+        """Queue an alert for delivery, raises when too many deliveries are pending"""
+        try:
+            self.pending.put_nowait(alert)
+        except queue.Full:
+            raise RuntimeError(f"{self.pending.maxsize} deliveries pending, alert dropped")
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                alert = self.pending.get(timeout=self.idle_exit)
+            except queue.Empty:
+                # Exit when idle; send starts a new thread for the next alert
+                with self.lock:
+                    if self.pending.empty():
+                        self.thread = None
+                        return
+                continue
+            try:
+                self.deliver(alert)
+            except Exception as e:
+                with self.lock:
+                    self.errors.append(str(e))
+                    del self.errors[:-20]
+
+    def drain_errors(self):
+        """Return and clear the delivery failures since the last call"""
+        with self.lock:
+            errors, self.errors = self.errors, []
+        return errors
+
+    def deliver(self, alert):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(alert).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class AlertEngine:
+    """Evaluates alert rules against snapshot deltas"""
+
+    def __init__(self, rules=None, sinks=None, cooldown_seconds=300):
+        self.cooldown_seconds = cooldown_seconds
+        self.sinks = list(sinks or [])
+        self.sink_errors = []
+        self.last_fired = {}
+        self.lock = threading.Lock()
+        self.set_rules(rules or [])
+
+    def set_rules(self, rules):
+        """Replace the rule set and rebuild the strike index"""
+        self.rules = list(rules)
+        self.by_strike = {}
+        self.wildcard_rules = []
+        self.not_found_rules = {}
+        for rule in self.rules:
+            if isinstance(rule, StrikeNotFoundRule):
+                self.not_found_rules.setdefault(rule.strike, []).append(rule)
+            elif rule.strike == WILDCARD:
+                self.wildcard_rules.append(rule)
+            else:
+                self.by_strike.setdefault(rule.strike, []).append(rule)
+
+    def evaluate(self, previous, current, now=None):
+        """Evaluate rules against the change from previous to current snapshot.
+
+        Returns the list of alerts that fired (after cooldown deduplication).
+        """
+        now = now if now is not None else time.time()
+        previous = previous or {}
+        current = current or {}
+        delta = diff_snapshots(previous, current)
+        fired = []
+
+        with self.lock:
+            for strike in list(delta['added']) + list(delta['changed']):
+                rules = self.by_strike.get(normalize_strike(strike), [])
+                for rule in rules + self.wildcard_rules:
+                    before = side_fields(previous.get(strike), rule.side)
+                    after = side_fields(current.get(strike), rule.side)
+                    message = rule.evaluate(strike, before, after)
+                    if message:
+                        self._fire(rule, strike, message, now, fired)
+
+            if self.not_found_rules:
+                # Checked on every snapshot, the cooldown spaces out repeats while a strike stays missing
+                present = {normalize_strike(strike) for strike in current}
+                for key, rules in self.not_found_rules.items():
+                    if key in present:
+                        continue
+                    for rule in rules:
+                        self._fire(rule, key, rule.evaluate(key, {}, {}), now, fired)
+
+        for alert in fired:
+            self._dispatch(alert)
+        for sink in self.sinks:
+            if hasattr(sink, 'drain_errors'):
+                for error in sink.drain_errors():
+                    self._record_sink_error(sink, error)
+        return fired
+
+    def _fire(self, rule, strike, message, now, fired):
+        """Record an alert unless it is still inside its cooldown window"""
+        key = (rule.rule_id, normalize_strike(strike))
+        last = self.last_fired.get(key)
+        if last is not None and now - last < self.cooldown_seconds:
+            return
+        self.last_fired[key] = now
+        fired.append({
+            'rule_id': rule.rule_id,
+            'type': rule.rule_type,
+            'strike': strike,
+            'side': rule.side,
+            'message': message,
+            'timestamp': datetime.fromtimestamp(now, pytz.UTC).isoformat()
+        })
+
+    def _dispatch(self, alert):
+        """Send an alert to every sink, collecting sink failures"""
+        for sink in self.sinks:
+            try:
+                sink.send(alert)
+            except Exception as e:
+                self._record_sink_error(sink, e)
+
+    def _record_sink_error(self, sink, error):
+        self.sink_errors.append(f"{type(sink).__name__}: {error}")
+        del self.sink_errors[:-20]
+
+
+def build_sinks(file_path=None, webhook_url=None, memory_sink=None):
+    """Build the configured notification sinks"""
+    sinks = [memory_sink or MemorySink()]
+    if file_path:
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        sinks.append(FileSink(file_path))
+    if webhook_url:
+        sinks.append(WebhookSink(webhook_url))
+    return sinks
@@ -0,0 +1,255 @@
+"""Incremental OHLC/volume rollups per strike and side.
+
+Every snapshot updates one open bar per (expiry, strike, side, resolution) in
+memory. When a snapshot falls into a later bucket the open bar is closed and
+written to a small SQLite table whose primary key is
+(expiry, resolution, strike, side, start), so reading the bars of one strike
+at any resolution is an index range scan instead of a pass over the day's
+snapshots.
+
+Open bars are also written as they stand every ``flush_interval`` seconds by
+a background thread (bars whose bucket has ended are closed at the same
+time) and once more at interpreter exit, so a restart loses at most one
+interval and other readers of the database see the current bar. A bar that
+was reopened after a restart continues from its stored values.
+
+The engine is shared by every session of the process, so a snapshot is only
+folded in when it is newer than the last one folded for its expiry, and a
+drop in cumulative volume is only taken as the exchange's reset when it
+crosses a trading day (IST date); within a day it is an out-of-order sample
+and trades nothing.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytz
+
+from option_snapshot import SIDES, parse_number
+
+RESOLUTIONS = {'1min': 60, '5min': 300, '15min': 900}
+
+IST = pytz.timezone('Asia/Kolkata')
+
+BAR_COLUMNS = (
+    'start', 'mid_open', 'mid_high', 'mid_low', 'mid_close',
+    'spread_open', 'spread_high', 'spread_low', 'spread_close',
+    'volume', 'samples'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    expiry TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    strike TEXT NOT NULL,
+    side TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    mid_open REAL, mid_high REAL, mid_low REAL, mid_close REAL,
+    spread_open REAL, spread_high REAL, spread_low REAL, spread_close REAL,
+    volume REAL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (expiry, resolution, strike, side, start)
+) WITHOUT ROWID
+"""
+
+
+def _update_ohlc(bar, prefix, value):
+    """Fold one value into the open/high/low/close fields of a bar"""
+    if value is None:
+        return
+    if bar[f"{prefix}_open"] is None:
+        bar[f"{prefix}_open"] = bar[f"{prefix}_high"] = bar[f"{prefix}_low"] = value
+    else:
+        bar[f"{prefix}_high"] = max(bar[f"{prefix}_high"], value)
+        bar[f"{prefix}_low"] = min(bar[f"{prefix}_low"], value)
+    bar[f"{prefix}_close"] = value
+
+
+class RollupEngine:
+    """Maintains open bars in memory and flushes closed bars to SQLite"""
+
+    def __init__(self, db_path, resolutions=None):
+        self.db_path = db_path
+        self.resolutions = dict(resolutions or RESOLUTIONS)
+        self.open_bars = {}
+        # (trading day, highest cumulative volume) per (expiry, strike, side), bar volume is its increase
+        self.last_volume = {}
+        # Fetch timestamp of the last snapshot folded in per expiry
+        self.last_update = {}
+        self.bars_flushed = 0
+        # Bar start already stored per series key, so rewrites are not counted as new rows
+        self.stored_start = {}
+        self.stopped = threading.Event()
+        self.flusher = None
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+        # Counted once here and kept up to date by _write instead of scanning the table per render
+        self.stored_bars = self.connection.execute("SELECT COUNT(*) FROM bars").fetchone()[0]
+
+    def start_flusher(self, interval=30):
+        """Flush bars in a background thread every interval seconds and the open bars at exit"""
+        if self.flusher is None:
+            self.flusher = threading.Thread(target=self._run_flusher, args=(interval,), name="rollup-flusher", daemon=True)
+            self.flusher.start()
+            atexit.register(self.flush_open)
+        return self
+
+    def _run_flusher(self, interval):
+        while not self.stopped.wait(interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Retried on the next interval
+                pass
+
+    def update(self, fetch_time, snapshot, expiry):
+        """Fold a snapshot into the open bars, flushing any bars it closes.
+
+        Snapshots not newer than the last one folded for the expiry are ignored.
+        """
+        timestamp = int(fetch_time.timestamp())
+        day = fetch_time.astimezone(IST).date()
+        closed = []
+        with self.lock:
+            if timestamp <= self.last_update.get(expiry, -1):
+                return 0
+            self.last_update[expiry] = timestamp
+            for strike, row in (snapshot or {}).items():
+                for side in SIDES:
+                    bid = parse_number(row.get(f"{side}_Bid"))
+                    ask = parse_number(row.get(f"{side}_Ask"))
+                    mid = (bid + ask) / 2 if bid is not None and ask is not None else None
+                    spread = ask - bid if bid is not None and ask is not None else None
+
+                    volume = parse_number(row.get(f"{side}_Volume"))
+                    volume_key = (expiry, strike, side)
+                    previous = self.last_volume.get(volume_key)
+                    traded = 0.0
+                    if volume is not None:
+                        if previous is None:
+                            self.last_volume[volume_key] = (day, volume)
+                        elif previous[0] != day:
+                            # Cumulative volume resets at the start of a trading day
+                            traded = volume
+                            self.last_volume[volume_key] = (day, volume)
+                        elif volume > previous[1]:
+                            traded = volume - previous[1]
+                            self.last_volume[volume_key] = (day, volume)
+
+                    for resolution in self.resolutions.values():
+                        start = timestamp - timestamp % resolution
+                        key = (expiry, resolution, strike, side)
+                        bar = self.open_bars.get(key)
+                        if bar is not None and bar['start'] != start:
+                            closed.append(key + (bar,))
+                            bar = None
+                        if bar is None:
+                            bar = self._stored_bar(key, start) if key not in self.stored_start else None
+                            if bar is None:
+                                bar = dict.fromkeys(BAR_COLUMNS)
+                                bar.update(start=start, volume=0.0, samples=0)
+                            self.open_bars[key] = bar
+                        _update_ohlc(bar, 'mid', mid)
+                        _update_ohlc(bar, 'spread', spread)
+                        bar['volume'] += traded
+                        bar['samples'] += 1
+
+            if closed:
+                self._write(closed)
+        return len(closed)
+
+    def _stored_bar(self, key, start):
+        """The stored bar of a series at start, e.g. flushed before a restart (lock held)"""
+        row = self.connection.execute(
+            f"SELECT {', '.join(BAR_COLUMNS)} FROM bars WHERE expiry=? AND resolution=? AND strike=? AND side=? AND start=?",
+            key + (start,)
+        ).fetchone()
+        self.stored_start[key] = start if row is not None else None
+        if row is None:
+            return None
+        return dict(zip(BAR_COLUMNS, row))
+
+    def _write(self, bars):
+        """Upsert bars given as (expiry, resolution, strike, side, bar) tuples (lock held)"""
+        rows = [
+            (expiry, resolution, strike, side) + tuple(bar[column] for column in BAR_COLUMNS)
+            for expiry, resolution, strike, side, bar in bars
+        ]
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO bars (expiry, resolution, strike, side, {', '.join(BAR_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (4 + len(BAR_COLUMNS)))})",
+            rows
+        )
+        self.connection.commit()
+        self.bars_flushed += len(rows)
+        for expiry, resolution, strike, side, bar in bars:
+            key = (expiry, resolution, strike, side)
+            if self.stored_start.get(key) != bar['start']:
+                self.stored_start[key] = bar['start']
+                self.stored_bars += 1
+
+    def flush_open(self):
+        """Write the open bars as they stand (they are rewritten when they close)"""
+        with self.lock:
+            if self.open_bars:
+                self._write([key + (bar,) for key, bar in self.open_bars.items()])
+
+    def flush(self, now=None):
+        """Close the open bars whose bucket has ended and write the rest as they stand"""
+        now = now or time.time()
+        with self.lock:
+            if not self.open_bars:
+                return
+            self._write([key + (bar,) for key, bar in self.open_bars.items()])
+            for key in [key for key, bar in self.open_bars.items() if bar['start'] + key[1] <= now]:
+                del self.open_bars[key]
+
+    def query(self, expiry, strike, side, resolution, start=None, end=None, include_open=True):
+        """Return the bars of one series as a DataFrame indexed by bar start time (IST)"""
+        if isinstance(resolution, str):
+            resolution = self.resolutions[resolution]
+        sql = f"SELECT {', '.join(BAR_COLUMNS)} FROM bars WHERE expiry=? AND resolution=? AND strike=? AND side=?"
+        params = [expiry, resolution, strike, side]
+        if start is not None:
+            sql += " AND start >= ?"
+            params.append(int(start))
+        if end is not None:
+            sql += " AND start <= ?"
+            params.append(int(end))
+        sql += " ORDER BY start"
+
+        with self.lock:
+            rows = self.connection.execute(sql, params).fetchall()
+            open_bar = self.open_bars.get((expiry, resolution, strike, side))
+            if include_open and open_bar is not None:
+                in_range = (start is None or open_bar['start'] >= start) and (end is None or open_bar['start'] <= end)
+                if in_range and (not rows or rows[-1][0] < open_bar['start']):
+                    rows.append(tuple(open_bar[column] for column in BAR_COLUMNS))
+                elif in_range and rows[-1][0] == open_bar['start']:
+                    rows[-1] = tuple(open_bar[column] for column in BAR_COLUMNS)
+
+        frame = pd.DataFrame(rows, columns=list(BAR_COLUMNS))
+        frame['start'] = pd.to_datetime(frame['start'], unit='s', utc=True).dt.tz_convert('Asia/Kolkata')
+        return frame.set_index('start')
+
+    def stats(self):
+        """Return counts for display"""
+        with self.lock:
+            return {'open_bars': len(self.open_bars), 'stored_bars': self.stored_bars, 'flushed': self.bars_flushed}
+
+    def close(self):
+        self.stopped.set()
+        self.flush_open()
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,576 @@
+"""Asyncio controller that drives many option chain tabs in one Chrome.
+
+Talks to Chrome over the DevTools protocol (CDP) on a single browser-level
+websocket with flattened target sessions, so every tab is just a session id
+on the same connection. Tabs run the same navigate / select / extract steps as
+NSEScraper, but as coroutines, and a pool of tabs serves (commodity, expiry)
+jobs concurrently with one browser's memory footprint::
+
+    python cdp_tabs.py --tabs 10 --jobs 40           # against the local stand-in
+    python cdp_tabs.py --url https://www.nseindia.com/option-chain --tabs 4 --jobs 8
+
+The benchmark compares the tab pool with one NSEScraper driver per job.
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from column_schema import SchemaTracker
+from nse_scraper import (
+    DEFAULT_COLUMN_MAP, HEADER_ROWS_JS, LEAN_BLOCKED_URLS, NSE_OPTION_CHAIN_URL,
+    OPTION_CHAIN_TABLE_ID, REQUERY_JS, ScraperError, parse_row
+)
+from resource_monitor import BROWSER_DATA_DIR_PREFIX, ResourceSampler
+
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+# Cell texts of every body row of the option chain table in one call
+TABLE_ROWS_JS = """
+(function (tableId) {
+    var table = document.getElementById(tableId);
+    if (!table) return null;
+    var rows = [];
+    Array.prototype.forEach.call(table.tBodies, function (body) {
+        Array.prototype.forEach.call(body.rows, function (row) {
+            rows.push(Array.prototype.map.call(row.cells, function (cell) { return cell.innerText.trim(); }));
+        });
+    });
+    return rows;
+})(%s)
+"""
+
+# Marks the current rows so a re-render can be detected
+MARK_ROWS_JS = """
+(function (tableId) {
+    var table = document.getElementById(tableId);
+    if (!table || !table.tBodies.length || !table.tBodies[0].rows.length) return false;
+    table.tBodies[0].rows[0].__ocStale = true;
+    return true;
+})(%s)
+"""
+
+ROWS_READY_JS = """
+(function (tableId, minCells) {
+    var table = document.getElementById(tableId);
+    if (!table || !table.tBodies.length) return false;
+    var rows = table.tBodies[0].rows;
+    return rows.length > 0 && !rows[0].__ocStale && rows[0].cells.length >= minCells;
+})(%s, %d)
+"""
+
+SELECT_VALUE_JS = """
+(function (selectId, value) {
+    var select = document.getElementById(selectId);
+    if (!select) return null;
+    if (value === null) {
+        if (select.options.length < 2) return null;
+        value = select.options[1].value;
+    }
+    select.value = value;
+    if (select.value !== value) return null;
+    select.dispatchEvent(new Event('change', {bubbles: true}));
+    return value;
+})(%s, %s)
+"""
+
+EXPIRY_OPTIONS_JS = """
+(function () {
+    var select = document.getElementById('goldmExpirySelect');
+    if (!select) return [];
+    return Array.prototype.slice.call(select.options, 1).map(function (option) { return option.value; })
+        .filter(function (value) { return value; });
+})()
+"""
+
+
+class WebSocketClient:
+    """Minimal RFC 6455 client for the DevTools socket (text frames, client masking)"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, url):
+        parsed = urlparse(url)
+        reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port or 80, limit=2 ** 24)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        writer.write((
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parsed.hostname}:{parsed.port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode('ascii'))
+        await writer.drain()
+        response = await reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in response.split(b"\r\n", 1)[0]:
+            writer.close()
+            raise ScraperError(f"DevTools websocket handshake failed: {response[:80]!r}")
+        return cls(reader, writer)
+
+    async def send(self, text, opcode=0x1):
+        payload = text.encode('utf-8') if isinstance(text, str) else text
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 2 ** 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        mask = os.urandom(4)
+        # XOR the payload with the repeated mask as one big integer
+        repeated = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(length, 'big')
+        self.writer.write(header + mask + masked)
+        await self.writer.drain()
+
+    async def receive(self):
+        """Return the next complete text message, None when the socket closed"""
+        message = b""
+        while True:
+            first, second = await self.reader.readexactly(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            if mask:
+                repeated = (mask * (length // 4 + 1))[:length]
+                payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(length, 'big')
+
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                await self.send(payload, opcode=0xA)
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if first & 0x80:
+                return message.decode('utf-8')
+
+    async def close(self):
+        try:
+            await self.send(b"", opcode=0x8)
+        except Exception:
+            pass
+        self.writer.close()
+
+
+class CDPConnection:
+    """Browser-level DevTools connection multiplexing flattened target sessions"""
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.listeners = {}
+        self.reader_task = asyncio.get_running_loop().create_task(self._read())
+
+    @classmethod
+    async def connect(cls, ws_url):
+        return cls(await WebSocketClient.connect(ws_url))
+
+    async def _read(self):
+        try:
+            while True:
+                text = await self.socket.receive()
+                if text is None:
+                    break
+                message = json.loads(text)
+                if 'id' in message:
+                    future = self.pending.pop(message['id'], None)
+                    if future is not None and not future.done():
+                        if 'error' in message:
+                            future.set_exception(ScraperError(f"CDP error: {message['error'].get('message')}"))
+                        else:
+                            future.set_result(message.get('result', {}))
+                    continue
+                key = (message.get('sessionId'), message.get('method'))
+                for queue in self.listeners.get(key, []):
+                    queue.put_nowait(message.get('params', {}))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ScraperError("DevTools connection closed"))
+            self.pending.clear()
+
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        message_id = next(self.ids)
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message_id] = future
+        await self.socket.send(json.dumps(message))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(message_id, None)
+
+    def listen(self, session_id, method):
+        """Return a queue receiving the params of matching events"""
+        queue = asyncio.Queue()
+        self.listeners.setdefault((session_id, method), []).append(queue)
+        return queue
+
+    def unlisten(self, session_id, method, queue):
+        queues = self.listeners.get((session_id, method), [])
+        if queue in queues:
+            queues.remove(queue)
+
+    async def close(self):
+        self.reader_task.cancel()
+        await self.socket.close()
+
+
+class AsyncTab:
+    """One page target, with async versions of the option chain flow"""
+
+    def __init__(self, connection, target_id, session_id, wait_timeout=20, url=NSE_OPTION_CHAIN_URL):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.wait_timeout = wait_timeout
+        self.url = url
+        self.page_ready = False
+        self.commodity = None
+        self.expiry = None
+        self.schema = SchemaTracker(DEFAULT_COLUMN_MAP)
+
+    async def send(self, method, params=None):
+        return await self.connection.send(method, params, session_id=self.session_id)
+
+    async def evaluate(self, expression):
+        result = await self.send('Runtime.evaluate', {'expression': expression, 'returnByValue': True})
+        if 'exceptionDetails' in result:
+            raise ScraperError(f"Script failed: {result['exceptionDetails'].get('text')}")
+        return result.get('result', {}).get('value')
+
+    async def wait_for(self, expression, timeout=None, interval=0.1):
+        """Poll a JS expression until it is truthy, returns its value"""
+        deadline = time.monotonic() + (timeout or self.wait_timeout)
+        while True:
+            value = await self.evaluate(expression)
+            if value:
+                return value
+            if time.monotonic() >= deadline:
+                raise ScraperError(f"Timed out waiting for: {expression.strip()[:60]}")
+            await asyncio.sleep(interval)
+
+    async def navigate_and_setup(self):
+        """Open the option chain page and switch to the commodities tab"""
+        loaded = self.connection.listen(self.session_id, 'Page.loadEventFired')
+        try:
+            await self.send('Page.navigate', {'url': self.url})
+            await asyncio.wait_for(loaded.get(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise ScraperError("Navigation failed: page load timed out")
+        finally:
+            self.connection.unlisten(self.session_id, 'Page.loadEventFired', loaded)
+
+        await self.wait_for("!!document.getElementById('goldmChain')")
+        await self.evaluate("document.getElementById('goldmChain').click()")
+        await self.wait_for("!!document.getElementById('goldmSelect')")
+        self.page_ready = True
+
+    async def select_commodity(self, commodity_symbol):
+        if await self.evaluate(SELECT_VALUE_JS % (json.dumps('goldmSelect'), json.dumps(commodity_symbol))) is None:
+            raise ScraperError(f"Commodity {commodity_symbol} not available")
+        self.commodity = commodity_symbol
+        self.expiry = None
+        await self.wait_for(f"({EXPIRY_OPTIONS_JS}).length > 0")
+
+    async def fetch_expiry_dates(self, commodity_symbol):
+        if not self.page_ready:
+            await self.navigate_and_setup()
+        await self.select_commodity(commodity_symbol)
+        return await self.evaluate(EXPIRY_OPTIONS_JS)
+
+    async def select_commodity_and_expiry(self, expiry_date, commodity_symbol):
+        """Select commodity and expiry (nearest when None), returns the selected expiry"""
+        if self.commodity != commodity_symbol:
+            await self.select_commodity(commodity_symbol)
+        await self.evaluate(MARK_ROWS_JS % json.dumps(OPTION_CHAIN_TABLE_ID))
+        selected = await self.evaluate(
+            SELECT_VALUE_JS % (json.dumps('goldmExpirySelect'), json.dumps(expiry_date))
+        )
+        if selected is None:
+            raise ScraperError(f"Expiry {expiry_date or '(nearest)'} not available")
+        self.expiry = selected
+        return selected
+
+    async def wait_for_data(self, settle_timeout=None):
+        """Wait until the table has been re-rendered (or settle_timeout passed)"""
+        ready = ROWS_READY_JS % (json.dumps(OPTION_CHAIN_TABLE_ID), DEFAULT_COLUMN_MAP.min_cells)
+        try:
+            await self.wait_for(ready, timeout=settle_timeout)
+        except ScraperError:
+            if settle_timeout is None:
+                raise ScraperError("Data loading timeout")
+
+    async def extract_option_data(self):
+        header = await self.evaluate(f"(function () {{ {HEADER_ROWS_JS} }})()".replace(
+            'arguments[0]', json.dumps(OPTION_CHAIN_TABLE_ID)))
+        column_map = self.schema.column_map(header or [])
+        rows = await self.evaluate(TABLE_ROWS_JS % json.dumps(OPTION_CHAIN_TABLE_ID)) or []
+        data = {}
+        for texts in rows:
+            strike_data = parse_row(texts, column_map)
+            if strike_data is not None:
+                data[strike_data['Strike']] = strike_data
+        return data
+
+    async def fetch_snapshot(self, expiry_date=None, commodity_symbol="SILVER"):
+        """Run the flow for one (commodity, expiry); an already open view is just re-queried"""
+        if not self.page_ready:
+            await self.navigate_and_setup()
+        if self.commodity == commodity_symbol and expiry_date is not None and self.expiry == expiry_date:
+            await self.evaluate(MARK_ROWS_JS % json.dumps(OPTION_CHAIN_TABLE_ID))
+            await self.evaluate(f"(function () {{ {REQUERY_JS} }})()")
+            selected = expiry_date
+            # Pages that patch rows in place never replace them; read after a short settle
+            await self.wait_for_data(settle_timeout=2)
+        else:
+            selected = await self.select_commodity_and_expiry(expiry_date, commodity_symbol)
+            await self.wait_for_data()
+        return selected, await self.extract_option_data()
+
+
+def find_chrome_binary():
+    binary = os.environ.get("CHROME_BINARY")
+    if binary:
+        return binary
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise ScraperError("Chrome binary not found (set CHROME_BINARY)")
+
+
+class AsyncChromeController:
+    """One headless Chrome with a pool of tabs serving option chain jobs concurrently"""
+
+    def __init__(self, tabs=4, url=NSE_OPTION_CHAIN_URL, wait_timeout=20, profile='standard', ws_url=None):
+        self.tab_count = tabs
+        self.url = url
+        self.wait_timeout = wait_timeout
+        self.profile = profile
+        self.ws_url = ws_url
+        self.process = None
+        self.user_data_dir = None
+        self.connection = None
+        self.tabs = []
+        self.idle = None
+        # Jobs for a view that is already open go back to the tab showing it
+        self.views = {}
+
+    async def start(self):
+        if self.ws_url is None:
+            self.ws_url = await self._launch()
+        self.connection = await CDPConnection.connect(self.ws_url)
+        self.idle = asyncio.Queue()
+        for _ in range(self.tab_count):
+            tab = await self.open_tab()
+            self.tabs.append(tab)
+            self.idle.put_nowait(tab)
+        return self
+
+    async def _launch(self):
+        """Start headless Chrome with a free DevTools port, returns the browser websocket URL"""
+        self.user_data_dir = tempfile.mkdtemp(prefix=BROWSER_DATA_DIR_PREFIX)
+        args = [
+            find_chrome_binary(), "--headless=new", "--no-sandbox", "--disable-dev-shm-usage",
+            "--disable-gpu", "--remote-debugging-port=0", f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run", "--disable-extensions", "--disable-background-networking", "about:blank"
+        ]
+        if self.profile == 'lean':
+            args[1:1] = ["--blink-settings=imagesEnabled=false", "--mute-audio", "--disable-sync"]
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            line = await loop.run_in_executor(None, self.process.stderr.readline)
+            if not line and self.process.poll() is not None:
+                break
+            match = re.search(rb"DevTools listening on (ws://\S+)", line)
+            if match:
+                return match.group(1).decode('ascii')
+        raise ScraperError("Chrome did not report a DevTools endpoint")
+
+    async def open_tab(self):
+        target = await self.connection.send('Target.createTarget', {'url': 'about:blank'})
+        attached = await self.connection.send('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        tab = AsyncTab(self.connection, target['targetId'], attached['sessionId'], self.wait_timeout, self.url)
+        await tab.send('Page.enable')
+        await tab.send('Runtime.enable')
+        if self.profile == 'lean':
+            await tab.send('Network.enable')
+            await tab.send('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+        return tab
+
+    def browser_pids(self):
+        return [self.process.pid] if self.process else []
+
+    async def _take_tab(self, key):
+        """Prefer the idle tab already showing this (commodity, expiry)"""
+        tab = self.views.get(key)
+        if tab is not None:
+            waiting = []
+            while not self.idle.empty():
+                candidate = self.idle.get_nowait()
+                if candidate is tab:
+                    for other in waiting:
+                        self.idle.put_nowait(other)
+                    return tab
+                waiting.append(candidate)
+            for other in waiting:
+                self.idle.put_nowait(other)
+        return await self.idle.get()
+
+    async def fetch_snapshot(self, commodity, expiry=None):
+        """Fetch one (commodity, expiry) on a free tab, returns (expiry, snapshot)"""
+        tab = await self._take_tab((commodity, expiry))
+        try:
+            selected, data = await tab.fetch_snapshot(expiry, commodity)
+            self.views = {key: value for key, value in self.views.items() if value is not tab}
+            self.views[(commodity, selected)] = tab
+            return selected, data
+        except Exception:
+            # Reload the page on the next job
+            tab.page_ready = False
+            tab.commodity = None
+            raise
+        finally:
+            self.idle.put_nowait(tab)
+
+    async def fetch_many(self, jobs):
+        """Run (commodity, expiry) jobs concurrently, returns results or exceptions in order"""
+        return await asyncio.gather(*(self.fetch_snapshot(commodity, expiry) for commodity, expiry in jobs),
+                                    return_exceptions=True)
+
+    async def fetch_expiry_dates(self, commodity):
+        tab = await self.idle.get()
+        try:
+            return await tab.fetch_expiry_dates(commodity)
+        finally:
+            self.idle.put_nowait(tab)
+
+    async def close(self):
+        if self.connection is not None:
+            try:
+                await self.connection.send('Browser.close', timeout=5)
+            except Exception:
+                pass
+            await self.connection.close()
+            self.connection = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+
+def build_jobs(commodity, expiries, count):
+    """Cycle through the expiries to build count jobs"""
+    return [(commodity, expiries[i % len(expiries)]) for i in range(count)]
+
+
+async def benchmark_tabs(url, jobs, tabs, profile):
+    controller = AsyncChromeController(tabs=tabs, url=url, profile=profile)
+    started = time.perf_counter()
+    with ResourceSampler(controller.browser_pids) as sampler:
+        await controller.start()
+        try:
+            results = await controller.fetch_many(jobs)
+        finally:
+            await controller.close()
+    failures = sum(1 for result in results if isinstance(result, Exception))
+    return dict(sampler.result, mode=f"{tabs} tabs, 1 browser", jobs=len(jobs), failures=failures,
+                jobs_per_s=len(jobs) / (time.perf_counter() - started))
+
+
+def benchmark_drivers(url, jobs, profile):
+    """One NSEScraper driver started and closed per job, the pre-existing approach"""
+    from nse_scraper import NSEScraper
+
+    started = time.perf_counter()
+    failures = 0
+    scraper = None
+    with ResourceSampler(lambda: scraper.browser_pids() if scraper else []) as sampler:
+        for commodity, expiry in jobs:
+            scraper = NSEScraper(commodity_symbol=commodity, url=url, profile=profile, remote_debugging_port=0)
+            try:
+                scraper.fetch_snapshot(expiry, commodity)
+            except Exception:
+                failures += 1
+            finally:
+                scraper.close()
+    return dict(sampler.result, mode="1 driver per job", jobs=len(jobs), failures=failures,
+                jobs_per_s=len(jobs) / (time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark many tabs in one Chrome against one driver per job")
+    parser.add_argument('--url', default=None, help="Option chain page (defaults to a local stand-in)")
+    parser.add_argument('--commodity', default='SILVER')
+    parser.add_argument('--tabs', type=int, default=10)
+    parser.add_argument('--jobs', type=int, default=20)
+    parser.add_argument('--profile', default='lean', choices=['standard', 'lean'])
+    parser.add_argument('--skip-drivers', action='store_true', help="Only run the tab pool")
+    args = parser.parse_args()
+
+    url = args.url
+    server = None
+    if url is None:
+        from nse_standin_server import expiry_dates, serve_in_thread
+        server, url = serve_in_thread()
+        expiries = expiry_dates()
+    else:
+        async def list_expiries():
+            controller = await AsyncChromeController(tabs=1, url=url).start()
+            try:
+                return await controller.fetch_expiry_dates(args.commodity)
+            finally:
+                await controller.close()
+        expiries = asyncio.run(list_expiries())
+
+    jobs = build_jobs(args.commodity, expiries, args.jobs)
+    rows = [asyncio.run(benchmark_tabs(url, jobs, args.tabs, args.profile))]
+    if not args.skip_drivers:
+        rows.append(benchmark_drivers(url, jobs, args.profile))
+
+    print(f"{'mode':<20} {'jobs':>5} {'fail':>5} {'jobs/s':>7} {'wall s':>7} {'cpu s':>7} {'peak MB':>8}")
+    for row in rows:
+        print(f"{row['mode']:<20} {row['jobs']:>5} {row['failures']:>5} {row['jobs_per_s']:>7.2f} "
+              f"{row['wall_seconds']:>7.1f} {row['cpu_seconds']:>7.1f} {row['peak_rss_mb']:>8.0f}")
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Quote history and downsampled time-series charts.
+
+QuoteHistory keeps bid/ask/mid/volume per (strike, side) as the day goes on.
+Charts never send the raw history to the browser: the visible window is cut
+with a binary search and reduced server-side to a fixed number of points with
+LTTB or min/max bucketing (both keep the extremes visible), drawn with WebGL
+``Scattergl`` traces, and the resulting figure JSON is cached per
+(strike set, side, metric, window, history version).
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from option_snapshot import SIDES, parse_number
+
+METRICS = ('Mid', 'Bid', 'Ask', 'Spread', 'Volume')
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling, returns the kept indices"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    # Bucket edges over the points between the fixed first and last ones
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (or the last point) is the third vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_x = x[next_start:next_end].mean()
+            next_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[previous] - next_x) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        keep[i + 1] = previous
+    return keep
+
+
+def minmax_buckets(y, n_out):
+    """Min/max bucketing, returns the indices of each bucket's min and max in time order"""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        chunk = y[start:end]
+        low = start + int(np.argmin(chunk))
+        high = start + int(np.argmax(chunk))
+        indices.extend(sorted({low, high}))
+    return np.asarray(indices, dtype=np.int64)
+
+
+def downsample(x, y, n_out, method='lttb'):
+    """Reduce a series to at most about n_out points, gaps (NaN) are kept out of the selection"""
+    valid = ~np.isnan(y)
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    if method == 'minmax':
+        keep = minmax_buckets(y, n_out)
+    else:
+        keep = lttb(x, y, n_out)
+    return x[keep], y[keep]
+
+
+class QuoteSeries:
+    """Growable column arrays for one (strike, side)"""
+
+    COLUMNS = ('time', 'bid', 'ask', 'volume')
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.arrays = {column: np.empty(capacity, dtype=np.float64) for column in self.COLUMNS}
+
+    def append(self, values):
+        if self.size == len(self.arrays['time']):
+            for column, array in self.arrays.items():
+                grown = np.empty(len(array) * 2, dtype=np.float64)
+                grown[:self.size] = array[:self.size]
+                self.arrays[column] = grown
+        for column in self.COLUMNS:
+            self.arrays[column][self.size] = values[column]
+        self.size += 1
+
+    def trim(self, max_points):
+        """Drop the oldest points beyond max_points"""
+        if self.size <= max_points:
+            return
+        drop = self.size - max_points
+        for column, array in self.arrays.items():
+            array[:max_points] = array[drop:self.size]
+        self.size = max_points
+
+    def compact(self, max_points):
+        """Keep the newest max_points and shrink the arrays to fit, releasing the spare capacity"""
+        self.trim(max_points)
+        self.arrays = {column: array[:max(self.size, 1)].copy() for column, array in self.arrays.items()}
+
+    def column(self, name):
+        return self.arrays[name][:self.size]
+
+    def metric(self, metric):
+        bid = self.column('bid')
+        ask = self.column('ask')
+        if metric == 'Bid':
+            return bid
+        if metric == 'Ask':
+            return ask
+        if metric == 'Spread':
+            return ask - bid
+        if metric == 'Volume':
+            return self.column('volume')
+        return (bid + ask) / 2
+
+
+class QuoteHistory:
+    """Per-strike quote history fed with every fetched snapshot"""
+
+    def __init__(self, max_points_per_series=50000):
+        self.max_points_per_series = max_points_per_series
+        self.series = {}
+        self.version = 0
+
+    def append(self, fetch_time, snapshot):
+        """Record every strike and side of a snapshot at fetch_time"""
+        timestamp = fetch_time.timestamp()
+        for strike, row in (snapshot or {}).items():
+            for side in SIDES:
+                values = {
+                    'time': timestamp,
+                    'bid': parse_number(row.get(f"{side}_Bid")),
+                    'ask': parse_number(row.get(f"{side}_Ask")),
+                    'volume': parse_number(row.get(f"{side}_Volume")),
+                }
+                values = {key: np.nan if value is None else value for key, value in values.items()}
+                series = self.series.get((strike, side))
+                if series is None:
+                    series = self.series[(strike, side)] = QuoteSeries()
+                series.append(values)
+                series.trim(self.max_points_per_series)
+        self.version += 1
+
+    def strikes(self):
+        return sorted({strike for strike, _ in self.series}, key=lambda strike: parse_number(strike) or 0)
+
+    def point_count(self):
+        return sum(series.size for series in self.series.values())
+
+    def compact(self, max_points):
+        """Cap every series at max_points from now on and release spare array capacity"""
+        self.max_points_per_series = min(self.max_points_per_series, max_points)
+        for series in self.series.values():
+            series.compact(self.max_points_per_series)
+        self.version += 1
+
+    def latest_time(self):
+        """Epoch seconds of the newest recorded snapshot, None when empty"""
+        times = [series.column('time')[-1] for series in self.series.values() if series.size]
+        return max(times) if times else None
+
+    def window(self, strike, side, metric, start=None, end=None):
+        """Return (times, values) of one series between start and end epoch seconds"""
+        series = self.series.get((strike, side))
+        if series is None or series.size == 0:
+            return np.empty(0), np.empty(0)
+        times = series.column('time')
+        lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        hi = series.size if end is None else int(np.searchsorted(times, end, side='right'))
+        return times[lo:hi], series.metric(metric)[lo:hi]
+
+
+def build_timeseries_figure(history, strikes, sides, metric, start=None, end=None,
+                            max_points=1000, method='lttb', timezone='Asia/Kolkata'):
+    """Build a WebGL figure of downsampled series, returns (figure, raw points, plotted points)"""
+    fig = go.Figure()
+    raw_points = 0
+    plotted_points = 0
+
+    for strike in strikes:
+        for side in sides:
+            times, values = history.window(strike, side, metric, start, end)
+            if len(times) == 0:
+                continue
+            raw_points += len(times)
+            times, values = downsample(times, values, max_points, method)
+            plotted_points += len(times)
+            fig.add_trace(go.Scattergl(
+                x=pd.to_datetime(times, unit='s', utc=True).tz_convert(timezone),
+                y=values,
+                mode='lines',
+                name=f"{strike} {side}"
+            ))
+
+    fig.update_layout(
+        height=500,
+        title_text=f"{metric} over time ({timezone})",
+        xaxis_title="Time",
+        yaxis_title=metric,
+        legend_title_text="Strike",
+        margin=dict(l=40, r=20, t=60, b=40)
+    )
+    return fig, raw_points, plotted_points
+
+
+class FigureCache:
+    """Small LRU cache of figure JSON keyed by chart parameters"""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
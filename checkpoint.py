@@ -0,0 +1,129 @@
+"""Warm-start checkpoint of the latest snapshot and session configuration.
+
+The checkpoint is one small binary file::
+
+    b'OCKP' | version (u16) | metadata length (u32) | metadata JSON | encoded snapshot
+
+Metadata carries the strike lists, selected expiry, expiry list and fetch
+time; the snapshot uses option_snapshot.encode_snapshot. Writes go to a
+uniquely named temp file in the same directory that is fsynced and renamed
+over the old one, so neither a crash nor replicas saving at the same time
+leave a torn checkpoint. Reads memory-map the file and only decompress the snapshot
+when it is asked for.
+
+The file is shared by every session of the process, so only the first session
+after process start is restored from it; later sessions start empty instead
+of inheriting another user's strike lists and expiry.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from option_snapshot import decode_snapshot, encode_snapshot
+
+MAGIC = b'OCKP'
+VERSION = 1
+HEADER = struct.Struct('!4sHI')
+
+
+def write_checkpoint(file_path, metadata, snapshot):
+    """Atomically write metadata and a snapshot to file_path"""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    meta_bytes = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+    snapshot_bytes = encode_snapshot(snapshot or {})
+
+    # Every writer (thread or replica process) gets its own temp file
+    fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=os.path.basename(file_path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(meta_bytes)))
+            file.write(meta_bytes)
+            file.write(snapshot_bytes)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class Checkpoint:
+    """A memory-mapped checkpoint file"""
+
+    def __init__(self, mapped, metadata, snapshot_offset):
+        self.mapped = mapped
+        self.metadata = metadata
+        self.snapshot_offset = snapshot_offset
+        self._snapshot = None
+
+    @classmethod
+    def open(cls, file_path):
+        """Map a checkpoint file, None when it is missing, empty or not a valid checkpoint"""
+        try:
+            with open(file_path, 'rb') as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, meta_length = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a checkpoint")
+            start = HEADER.size
+            metadata = json.loads(mapped[start:start + meta_length].decode('utf-8'))
+            return cls(mapped, metadata, start + meta_length)
+        except (struct.error, ValueError):
+            mapped.close()
+            return None
+
+    @property
+    def snapshot(self):
+        """Decoded snapshot, decompressed on first access"""
+        if self._snapshot is None:
+            self._snapshot = decode_snapshot(self.mapped[self.snapshot_offset:])
+        return self._snapshot
+
+    def close(self):
+        self.mapped.close()
+
+
+class CheckpointStore:
+    """Reads and writes the warm-start checkpoint of one data directory"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.restore_pending = True
+
+    def save(self, metadata, snapshot):
+        with self.lock:
+            write_checkpoint(self.file_path, metadata, snapshot)
+
+    def load_once(self):
+        """Return load() for the first caller after process start, (None, None) afterwards"""
+        with self.lock:
+            if not self.restore_pending:
+                return None, None
+            self.restore_pending = False
+        return self.load()
+
+    def load(self):
+        """Return (metadata, snapshot) from the checkpoint, (None, None) when there is none"""
+        with self.lock:
+            checkpoint = Checkpoint.open(self.file_path)
+        if checkpoint is None:
+            return None, None
+        try:
+            return checkpoint.metadata, checkpoint.snapshot
+        except Exception:
+            return None, None
+        finally:
+            checkpoint.close()
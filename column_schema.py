@@ -0,0 +1,162 @@
+"""Header-driven column mapping for the option chain table.
+
+The column positions are derived from the table header instead of being
+hard-coded: labels left of the STRIKE column belong to calls (CE), labels to
+the right to puts (PE). Derived maps are cached by a fingerprint of the header
+text, so a refresh only hashes the header and reuses the cached map; a new
+fingerprint is reported as a schema drift event.
+"""
+
+import hashlib
+import threading
+import time
+
+# Normalized header labels mapped to snapshot field names
+HEADER_FIELDS = {
+    'VOLUME': 'Volume',
+    'BID QTY': 'Bid_Qty',
+    'BID': 'Bid',
+    'BID PRICE': 'Bid',
+    'ASK': 'Ask',
+    'ASK PRICE': 'Ask',
+    'ASK QTY': 'Ask_Qty',
+    'OI': 'OI',
+    'OPEN INTEREST': 'OI',
+    'CHNG IN OI': 'Chng_OI',
+    'CHANGE IN OI': 'Chng_OI',
+    'LTP': 'LTP',
+    'CHNG': 'Chng',
+    'NET CHNG': 'Chng',
+    'IV': 'IV',
+}
+
+STRIKE_LABELS = ('STRIKE', 'STRIKE PRICE')
+
+# Fields the app cannot work without; OI, LTP and IV are mapped when the header has them
+REQUIRED_FIELDS = tuple(f"{side}_{field}" for side in ('CE', 'PE') for field in ('Volume', 'Bid_Qty', 'Bid', 'Ask', 'Ask_Qty'))
+
+
+class SchemaError(Exception):
+    """Raised when the table header does not carry the required columns"""
+
+
+def normalize_label(text):
+    return ' '.join((text or '').replace('\n', ' ').upper().split())
+
+
+def header_fingerprint(header_rows):
+    """Short hash of the normalized header labels"""
+    text = '\u0002'.join('\u0001'.join(normalize_label(label) for label in row) for row in header_rows)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+class ColumnMap:
+    """Cell positions of the strike and quote fields in a table row"""
+
+    def __init__(self, strike_index, columns, min_cells, fingerprint=None):
+        self.strike_index = strike_index
+        self.columns = dict(columns)
+        self.min_cells = min_cells
+        self.fingerprint = fingerprint
+
+    def __eq__(self, other):
+        return (isinstance(other, ColumnMap) and self.strike_index == other.strike_index
+                and self.columns == other.columns and self.min_cells == other.min_cells)
+
+    def __repr__(self):
+        return f"ColumnMap(strike={self.strike_index}, columns={self.columns}, min_cells={self.min_cells})"
+
+
+def derive_column_map(header_rows, fingerprint=None):
+    """Build a ColumnMap from header rows (lists of cell labels)"""
+    for row in header_rows:
+        labels = [normalize_label(label) for label in row]
+        strike_positions = [i for i, label in enumerate(labels) if label in STRIKE_LABELS]
+        if len(strike_positions) != 1:
+            continue
+
+        strike_index = strike_positions[0]
+        columns = {}
+        for index, label in enumerate(labels):
+            field = HEADER_FIELDS.get(label)
+            if field is None:
+                continue
+            side = 'CE' if index < strike_index else 'PE'
+            # Keep the first occurrence per side, the page never repeats a label within a side
+            columns.setdefault(f"{side}_{field}", index)
+
+        missing = [field for field in REQUIRED_FIELDS if field not in columns]
+        if missing:
+            raise SchemaError(f"Option chain header is missing columns: {', '.join(missing)}")
+        return ColumnMap(strike_index, columns, len(labels), fingerprint)
+
+    raise SchemaError("Option chain header has no STRIKE column")
+
+
+class SchemaTracker:
+    """Caches column maps by header fingerprint and records schema drift"""
+
+    def __init__(self, default_map, max_events=50):
+        self.default_map = default_map
+        self.maps = {}
+        # Last header that produced a valid map; fallbacks never replace it
+        self.current = None
+        # Header (or 'no-header') of the fallback in progress, so it is reported once
+        self.fallback_key = None
+        self.events = []
+        self.max_events = max_events
+        self.stats = {'lookups': 0, 'derivations': 0, 'drifts': 0, 'fallbacks': 0}
+        self.lock = threading.Lock()
+
+    def column_map(self, header_rows):
+        """Return the ColumnMap for a header, deriving it only for a new fingerprint"""
+        with self.lock:
+            self.stats['lookups'] += 1
+            if not header_rows:
+                return self._fallback(None, "Option chain header not found")
+
+            fingerprint = header_fingerprint(header_rows)
+            column_map = self.maps.get(fingerprint)
+            if column_map is None:
+                try:
+                    column_map = derive_column_map(header_rows, fingerprint)
+                except SchemaError as e:
+                    return self._fallback(fingerprint, str(e))
+                self.maps[fingerprint] = column_map
+                self.stats['derivations'] += 1
+
+            self.fallback_key = None
+            if fingerprint != self.current:
+                if self.current is not None:
+                    self._record('drift', fingerprint, f"Header changed from {self.current} to {fingerprint}",
+                                 column_map)
+                self.current = fingerprint
+            return column_map
+
+    def _fallback(self, fingerprint, message):
+        """Use the built-in positions, reporting the problem once per header"""
+        key = fingerprint or 'no-header'
+        if key != self.fallback_key:
+            self.stats['fallbacks'] += 1
+            self._record('fallback', fingerprint, message, self.default_map)
+            self.fallback_key = key
+        return self.default_map
+
+    def _record(self, kind, fingerprint, message, column_map):
+        if kind == 'drift':
+            self.stats['drifts'] += 1
+        self.events.append({
+            'time': time.time(),
+            'kind': kind,
+            'fingerprint': fingerprint,
+            'message': message,
+            'columns': dict(column_map.columns),
+            'strike_index': column_map.strike_index
+        })
+        del self.events[:-self.max_events]
+
+    def drain_events(self):
+        """Return and clear the recorded events"""
+        with self.lock:
+            events, self.events = self.events, []
+            return events
@@ -0,0 +1,147 @@
+"""Validation and quarantine stage between extraction and display.
+
+Every check is a column operation over the whole snapshot (one float array
+for all cells), so validating a full chain costs a few milliseconds:
+
+* rows with an unusable strike, a duplicate strike, cell text that is not a
+  number, negative quantities or prices, or a crossed quote (bid > ask) are
+  moved to quarantine with their reasons,
+* whole snapshots that look partially loaded are rejected: no rows, no
+  numbers at all, far fewer rows than the last accepted snapshot of the same
+  expiry, or mostly quarantined rows.
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from option_snapshot import CHAIN_FIELDS, SIDES, normalize_strike, numeric_cells, to_numeric_column
+
+ROW_CHECKS = ('bad_strike', 'duplicate_strike', 'unparsable', 'negative_quantity', 'negative_price', 'crossed_quote')
+
+QUANTITY_FIELDS = ('Volume', 'Bid_Qty', 'Ask_Qty', 'OI')
+PRICE_FIELDS = ('Bid', 'Ask', 'LTP', 'IV')
+MISSING_TEXT = ('NA', '-', '')
+
+
+class ValidationResult:
+    """Outcome of validating one snapshot"""
+
+    def __init__(self, clean, quarantined, row_count, counts, rejected=None):
+        self.clean = clean
+        # strike -> {'row': original row, 'reasons': [check names]}
+        self.quarantined = quarantined
+        self.row_count = row_count
+        self.counts = counts
+        self.rejected = rejected
+
+    @property
+    def accepted(self):
+        return self.rejected is None
+
+
+def check_rows(snapshot):
+    """Return (strike keys, boolean flags array rows x ROW_CHECKS, numeric cell array)"""
+    raw = pd.DataFrame.from_dict(snapshot, orient='index')
+    columns = [f"{side}_{field}" for side in SIDES for field in CHAIN_FIELDS]
+    position = {column: i for i, column in enumerate(columns)}
+    values = numeric_cells(raw, columns)
+
+    cells = pd.Series(raw.reindex(columns=columns).to_numpy(dtype=object).ravel())
+    missing = cells.fillna('NA').astype(str).str.strip().isin(MISSING_TEXT).to_numpy().reshape(values.shape)
+
+    strike_values = to_numeric_column(raw.index.to_series().map(normalize_strike)).to_numpy(dtype=float)
+    bad_strike = np.isnan(strike_values) | (strike_values <= 0)
+    duplicate = pd.Series(strike_values).duplicated(keep='first').to_numpy() & ~bad_strike
+
+    def side_columns(fields):
+        return [position[f"{side}_{field}"] for side in SIDES for field in fields]
+
+    with np.errstate(invalid='ignore'):
+        negative_quantity = (values[:, side_columns(QUANTITY_FIELDS)] < 0).any(axis=1)
+        negative_price = (values[:, side_columns(PRICE_FIELDS)] < 0).any(axis=1)
+        crossed = np.zeros(len(raw), dtype=bool)
+        for side in SIDES:
+            crossed |= values[:, position[f"{side}_Bid"]] > values[:, position[f"{side}_Ask"]]
+    unparsable = (np.isnan(values) & ~missing).any(axis=1)
+
+    flags = np.column_stack([bad_strike, duplicate, unparsable, negative_quantity, negative_price, crossed])
+    return raw.index, flags, values
+
+
+def validate_snapshot(snapshot, previous_rows=None, min_row_ratio=0.5, max_quarantine_ratio=0.5):
+    """Split a snapshot into clean and quarantined rows, or reject it as a whole"""
+    if not snapshot:
+        return ValidationResult({}, {}, 0, {}, rejected="empty snapshot")
+
+    strikes, flags, values = check_rows(snapshot)
+    row_count = len(strikes)
+    counts = {check: int(count) for check, count in zip(ROW_CHECKS, flags.sum(axis=0))}
+    bad = flags.any(axis=1)
+
+    quarantined = {}
+    for row_index in np.flatnonzero(bad):
+        strike = strikes[row_index]
+        reasons = [check for check, flagged in zip(ROW_CHECKS, flags[row_index]) if flagged]
+        quarantined[strike] = {'row': snapshot[strike], 'reasons': reasons}
+    clean = {strike: row for strike, row in snapshot.items() if strike not in quarantined} if quarantined else snapshot
+
+    rejected = None
+    if np.isnan(values).all():
+        rejected = "table has no numeric values (still rendering?)"
+    elif previous_rows and row_count < min_row_ratio * previous_rows:
+        rejected = f"only {row_count} rows, the last accepted snapshot had {previous_rows}"
+    elif len(quarantined) > max_quarantine_ratio * row_count:
+        rejected = f"{len(quarantined)} of {row_count} rows failed validation"
+    return ValidationResult(clean, quarantined, row_count, counts, rejected)
+
+
+class DataQualityMonitor:
+    """Validates snapshots against the last accepted one per expiry and keeps quality counters"""
+
+    def __init__(self, min_row_ratio=0.5, max_quarantine_ratio=0.5, max_recent=200):
+        self.min_row_ratio = min_row_ratio
+        self.max_quarantine_ratio = max_quarantine_ratio
+        self.accepted_rows = {}
+        self.recent = deque(maxlen=max_recent)
+        self.last_rejection = None
+        self.counters = {'snapshots_checked': 0, 'snapshots_rejected': 0, 'rows_checked': 0,
+                         'rows_quarantined': 0, 'check_ms': 0.0}
+        self.check_counts = {check: 0 for check in ROW_CHECKS}
+        self.lock = threading.Lock()
+
+    def validate(self, snapshot, expiry=None):
+        started = time.perf_counter()
+        result = validate_snapshot(snapshot, self.accepted_rows.get(expiry),
+                                   self.min_row_ratio, self.max_quarantine_ratio)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self.lock:
+            self.counters['snapshots_checked'] += 1
+            self.counters['rows_checked'] += result.row_count
+            self.counters['check_ms'] = elapsed_ms
+            if not result.accepted:
+                self.counters['snapshots_rejected'] += 1
+                self.last_rejection = {'time': time.time(), 'expiry': expiry, 'reason': result.rejected}
+                return result
+
+            self.accepted_rows[expiry] = result.row_count
+            self.counters['rows_quarantined'] += len(result.quarantined)
+            for check, count in result.counts.items():
+                self.check_counts[check] += count
+            for strike, entry in result.quarantined.items():
+                self.recent.append({'time': time.time(), 'expiry': expiry, 'strike': strike,
+                                    'reasons': ', '.join(entry['reasons'])})
+        return result
+
+    def stats(self):
+        """Counters and per-check totals for display"""
+        with self.lock:
+            return dict(self.counters, checks=dict(self.check_counts), last_rejection=self.last_rejection)
+
+    def recent_quarantine(self):
+        with self.lock:
+            return list(self.recent)
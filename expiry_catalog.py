@@ -0,0 +1,203 @@
+"""Persisted per-commodity expiry catalog with TTL and background prefetch.
+
+Expiry lists change at most daily, so they are kept in a small JSON file and
+only refetched when a trading session has opened since the last fetch or,
+while the market is open, when older than the TTL. Weekends and holidays
+come from the same TradingCalendar as the refresh scheduler, so no session
+opens on them. A background thread keeps the catalog warm so the sidebar
+never has to start a browser just to fill the expiry dropdown.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from nse_scraper import NSEScraper
+from refresh_scheduler import TradingCalendar
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def last_market_open(now, calendar):
+    """Return the most recent session open (IST) at or before now, None if there is none in 30 days"""
+    day = now.astimezone(IST).date()
+    for _ in range(30):
+        if calendar.is_trading_day(day):
+            session_open, _ = calendar.session_bounds(day)
+            if session_open <= now:
+                return session_open
+        day -= timedelta(days=1)
+    return None
+
+
+def next_market_open(now, calendar):
+    """Return the first session open (IST) after now, None if there is none in 30 days"""
+    day = now.astimezone(IST).date()
+    for _ in range(30):
+        if calendar.is_trading_day(day):
+            session_open, _ = calendar.session_bounds(day)
+            if session_open > now:
+                return session_open
+        day += timedelta(days=1)
+    return None
+
+
+def scraper_expiry_fetcher(dispatcher=None, **scraper_options):
+    """Build a fetcher(commodity) that uses the worker pool or a short-lived browser"""
+    def fetch(commodity):
+        if dispatcher is not None:
+            return dispatcher.fetch_expiry_dates(commodity)
+        scraper = NSEScraper(commodity_symbol=commodity, remote_debugging_port=0, **scraper_options)
+        try:
+            return scraper.fetch_expiry_dates()
+        finally:
+            scraper.close()
+    return fetch
+
+
+class ExpiryCatalog:
+    """Expiry dates per commodity, persisted to a JSON file"""
+
+    def __init__(self, file_path, fetcher=None, ttl_seconds=6 * 3600, calendar=None):
+        self.file_path = file_path
+        self.fetcher = fetcher
+        self.ttl_seconds = ttl_seconds
+        self.calendar = calendar or TradingCalendar()
+        self.entries = {}
+        self.refreshing = set()
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.load()
+
+    def load(self):
+        """Load the catalog from disk, ignoring a missing or corrupt file"""
+        try:
+            with open(self.file_path, 'r') as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write the catalog atomically"""
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # A unique temp file, since every server process prefetches into the same catalog
+        fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=os.path.basename(self.file_path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(self.entries, file)
+            os.replace(temp_path, self.file_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def get(self, commodity):
+        """Return (expiry_dates, fetched_at datetime) or (None, None); stale entries are returned too"""
+        with self.lock:
+            entry = self.entries.get(commodity)
+        if not entry:
+            return None, None
+        return list(entry['expiries']), datetime.fromtimestamp(entry['fetched_at'], pytz.UTC)
+
+    def put(self, commodity, expiry_dates, fetched_at=None):
+        """Store a freshly fetched expiry list"""
+        with self.lock:
+            self.entries[commodity] = {
+                'expiries': list(expiry_dates),
+                'fetched_at': fetched_at if fetched_at is not None else time.time()
+            }
+            self.save()
+
+    def is_fresh(self, commodity, now=None):
+        """True if the entry was fetched after the latest session open and is within the TTL.
+
+        The TTL only applies while a session is open; the list cannot change while the market is closed.
+        """
+        now = now or datetime.now(pytz.UTC)
+        with self.lock:
+            entry = self.entries.get(commodity)
+        if not entry:
+            return False
+        fetched_at = datetime.fromtimestamp(entry['fetched_at'], pytz.UTC)
+        session_open = last_market_open(now, self.calendar)
+        if session_open is not None and fetched_at < session_open:
+            return False
+        return not self.calendar.is_open(now) or (now - fetched_at).total_seconds() <= self.ttl_seconds
+
+    def refresh(self, commodity):
+        """Fetch and store the expiry list for a commodity, returns it"""
+        with self.lock:
+            if commodity in self.refreshing:
+                return None
+            self.refreshing.add(commodity)
+        try:
+            expiry_dates = self.fetcher(commodity)
+            if expiry_dates:
+                self.put(commodity, expiry_dates)
+            self.last_error = None
+            return expiry_dates
+        except Exception as e:
+            self.last_error = str(e)
+            return None
+        finally:
+            with self.lock:
+                self.refreshing.discard(commodity)
+
+    def is_refreshing(self, commodity):
+        with self.lock:
+            return commodity in self.refreshing
+
+    def refresh_async(self, commodity):
+        """Refresh one commodity in a background thread"""
+        thread = threading.Thread(target=self.refresh, args=(commodity,), name="expiry-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def seconds_until_stale(self, commodity, now=None):
+        """Seconds until the entry expires by TTL or the next session open, 0 if already stale"""
+        now = now or datetime.now(pytz.UTC)
+        if not self.is_fresh(commodity, now):
+            return 0
+        with self.lock:
+            fetched_at = datetime.fromtimestamp(self.entries[commodity]['fetched_at'], pytz.UTC)
+        deadline = next_market_open(now, self.calendar)
+        session_close = self.calendar.session_close(now)
+        if session_close is not None:
+            # Open market: the TTL applies until the close, after that the next open
+            ttl_deadline = fetched_at + timedelta(seconds=self.ttl_seconds)
+            if ttl_deadline < session_close:
+                deadline = ttl_deadline if deadline is None else min(ttl_deadline, deadline)
+        if deadline is None:
+            return 0
+        return max(0, (deadline - now).total_seconds())
+
+    def start_background(self, commodities, poll_seconds=900):
+        """Prefetch stale commodities now and keep them fresh in a background thread"""
+        if self.thread is not None or self.fetcher is None:
+            return
+
+        def run():
+            while not self.stopped.is_set():
+                for commodity in commodities:
+                    if not self.is_fresh(commodity):
+                        self.refresh(commodity)
+                wait = min([poll_seconds] + [self.seconds_until_stale(commodity) or poll_seconds
+                                             for commodity in commodities])
+                self.stopped.wait(max(30, wait))
+
+        self.thread = threading.Thread(target=run, name="expiry-prefetch", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,389 @@
+"""Concurrent-session load test for the Streamlit app.
+
+Runs N simulated viewer sessions of SilverAutoCheck_ui.py in one process with
+Streamlit's AppTest, each rerunning once per second the way auto-refresh
+does. The browser layer is replaced by a fixture scraper that replays
+recorded snapshots, so the numbers measure the app itself: rerun latency
+percentiles, process CPU/RSS and how many browsers the sessions would have
+started. Each step of the session ladder becomes one row of a capacity
+curve that is appended to a JSON-lines file for comparison across releases::
+
+    python load_test.py record --fixtures fixtures/ --snapshots 20
+    python load_test.py run --fixtures fixtures/ --sessions 1,2,4,8 --duration 30
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+import nse_scraper
+from column_schema import SchemaTracker
+from option_snapshot import decode_snapshot, encode_snapshot
+from resource_monitor import BROWSER_PROCESS_NAMES, process_tree, tree_usage
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SilverAutoCheck_ui.py")
+
+
+def load_fixtures(directory):
+    """Return (expiries, snapshots) recorded in a fixture directory"""
+    with open(os.path.join(directory, "expiries.json"), 'r') as file:
+        expiries = json.load(file)
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(directory, "snapshot_*.bin"))):
+        with open(path, 'rb') as file:
+            snapshots.append(decode_snapshot(file.read()))
+    if not snapshots:
+        raise ValueError(f"No snapshot fixtures in {directory}")
+    return expiries, snapshots
+
+
+def record_fixtures(directory, count, commodity="SILVER", url=None, standin=False):
+    """Record snapshots from a live page (or the local stand-in market) into a directory"""
+    os.makedirs(directory, exist_ok=True)
+    if standin:
+        from nse_standin_server import StandInMarket, expiry_dates
+        market = StandInMarket()
+        expiries = expiry_dates()
+        fetch = lambda: nse_scraper.parse_option_chain_payload(market.chain(commodity, expiries[0]), expiries[0])
+    else:
+        scraper = nse_scraper.NSEScraper(commodity_symbol=commodity, url=url or nse_scraper.NSE_OPTION_CHAIN_URL)
+        expiries = scraper.fetch_expiry_dates()
+        fetch = lambda: scraper.fetch_snapshot(expiries[0])[1]
+
+    try:
+        with open(os.path.join(directory, "expiries.json"), 'w') as file:
+            json.dump(expiries, file)
+        for i in range(count):
+            with open(os.path.join(directory, f"snapshot_{i:04d}.bin"), 'wb') as file:
+                file.write(encode_snapshot(fetch()))
+            print(f"Recorded snapshot {i + 1}/{count}")
+    finally:
+        if not standin:
+            scraper.close()
+
+
+class FixtureScraper:
+    """Drop-in for NSEScraper that replays recorded snapshots"""
+
+    expiries = []
+    snapshots = []
+    fetch_delay = 0.0
+    started = 0
+    fetches = 0
+    lock = threading.Lock()
+
+    def __init__(self, commodity_symbol="SILVER", wait_timeout=20, capture_mode='dom', profile='standard', **kwargs):
+        self.commodity_symbol = commodity_symbol
+        self.capture_mode = capture_mode
+        self.profile = profile
+        self.page_ready = False
+        self.last_fetch_cost = None
+        self.running = False
+        self.position = 0
+        self.schema = SchemaTracker(nse_scraper.DEFAULT_COLUMN_MAP)
+
+    @classmethod
+    def configure(cls, expiries, snapshots, fetch_delay=0.0):
+        cls.expiries = list(expiries)
+        cls.snapshots = list(snapshots)
+        cls.fetch_delay = fetch_delay
+        cls.started = 0
+        cls.fetches = 0
+
+    @property
+    def is_running(self):
+        return self.running
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            with self.lock:
+                FixtureScraper.started += 1
+
+    def close(self):
+        self.running = False
+        self.page_ready = False
+
+    def browser_pids(self):
+        return []
+
+    def fetch_expiry_dates(self, commodity_symbol=None):
+        return list(self.expiries)
+
+    def fetch_snapshot(self, expiry_date=None, commodity_symbol=None):
+        self.start()
+        self.page_ready = True
+        if self.fetch_delay:
+            threading.Event().wait(self.fetch_delay)
+        snapshot = self.snapshots[self.position % len(self.snapshots)]
+        self.position += 1
+        with self.lock:
+            FixtureScraper.fetches += 1
+        self.last_fetch_cost = {
+            'wall_seconds': self.fetch_delay, 'cpu_seconds': 0.0, 'peak_rss_mb': 0.0,
+            'end_rss_mb': 0.0, 'processes': 0, 'profile': self.profile, 'strikes': len(snapshot)
+        }
+        return expiry_date or self.expiries[0], snapshot
+
+    def fetch_changes(self, previous, expiry_date=None, commodity_symbol=None):
+        expiry, snapshot = self.fetch_snapshot(expiry_date, commodity_symbol)
+        return expiry, snapshot, None
+
+
+def share_test_runtime():
+    """Give all AppTest sessions one mock runtime.
+
+    AppTest installs a mock Runtime singleton for the duration of each run and
+    clears it afterwards, which breaks sessions running in parallel threads.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+
+def install_fixture_layer():
+    """Route the app's browser layer to FixtureScraper and disable its own rerun loop"""
+    import streamlit
+
+    nse_scraper.NSEScraper = FixtureScraper
+    share_test_runtime()
+    # The harness paces reruns itself, one per second per session
+    streamlit.rerun = lambda: None
+
+    real_sleep = time.sleep
+
+    def sleep(seconds):
+        if os.path.basename(sys._getframe(1).f_code.co_filename) == os.path.basename(APP_SCRIPT):
+            return
+        real_sleep(seconds)
+
+    time.sleep = sleep
+
+
+def browser_process_count():
+    """Count chrome/chromedriver processes below this process"""
+    count = 0
+    for pid in process_tree([os.getpid()]):
+        try:
+            with open(f"/proc/{pid}/comm", 'r') as file:
+                name = file.read().strip().lower()
+        except OSError:
+            continue
+        if name.startswith(BROWSER_PROCESS_NAMES):
+            count += 1
+    return count
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class SimulatedSession:
+    """One viewer: loads strikes, enables auto refresh and reruns every interval"""
+
+    def __init__(self, session_id, strikes, interval=1.0, refresh_seconds=5, timeout=60):
+        from streamlit.testing.v1 import AppTest
+
+        self.session_id = session_id
+        self.strikes = strikes
+        self.interval = interval
+        self.refresh_seconds = refresh_seconds
+        self.app = AppTest.from_file(APP_SCRIPT, default_timeout=timeout)
+        self.latencies = []
+        self.errors = []
+        self.thread = None
+
+    def _run_once(self):
+        started = time.perf_counter()
+        self.app.run()
+        self.latencies.append(time.perf_counter() - started)
+        if self.app.exception:
+            self.errors.append(str(self.app.exception[0].value))
+
+    def _configure(self):
+        state = self.app.session_state
+        state['ce_strikes'] = list(self.strikes)
+        state['pe_strikes'] = list(self.strikes)
+        state['strikes_loaded'] = True
+        state['auto_refresh'] = True
+        state['adaptive_refresh'] = False
+        state['last_fetch_time'] = datetime.now(pytz.UTC)
+        state['next_refresh_time'] = datetime.now(pytz.UTC)
+
+    def run(self, stop_event):
+        try:
+            self._run_once()
+            self._configure()
+            while not stop_event.is_set():
+                state = self.app.session_state
+                # Keep fetches on a fixed cadence regardless of the trading calendar
+                if state['next_refresh_time'] is None or (datetime.now(pytz.UTC) - state['last_fetch_time']).total_seconds() >= self.refresh_seconds:
+                    state['next_refresh_time'] = datetime.now(pytz.UTC)
+                    if state['refresh_scheduler'] is not None:
+                        state['refresh_scheduler'].calendar.is_open = lambda now: True
+                self._run_once()
+                stop_event.wait(self.interval)
+        except Exception as e:
+            self.errors.append(repr(e))
+
+    def start(self, stop_event):
+        self.thread = threading.Thread(target=self.run, args=(stop_event,), name=f"session-{self.session_id}", daemon=True)
+        self.thread.start()
+
+
+def run_step(sessions, duration, strikes, interval, refresh_seconds):
+    """Run one ladder step with a given number of sessions, returns a result row"""
+    FixtureScraper.started = 0
+    FixtureScraper.fetches = 0
+    stop_event = threading.Event()
+    simulated = [SimulatedSession(i, strikes, interval, refresh_seconds) for i in range(sessions)]
+
+    _, cpu_before, _ = tree_usage([os.getpid()])
+    wall_start = time.perf_counter()
+    peak_rss = 0
+    peak_browsers = 0
+    for session in simulated:
+        session.start(stop_event)
+
+    while time.perf_counter() - wall_start < duration:
+        rss, _, _ = tree_usage([os.getpid()])
+        peak_rss = max(peak_rss, rss)
+        peak_browsers = max(peak_browsers, browser_process_count())
+        stop_event.wait(0.5)
+
+    stop_event.set()
+    for session in simulated:
+        session.thread.join(timeout=60)
+    wall = time.perf_counter() - wall_start
+    _, cpu_after, _ = tree_usage([os.getpid()])
+
+    latencies = [latency for session in simulated for latency in session.latencies]
+    errors = [error for session in simulated for error in session.errors]
+    return {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'reruns_per_s': len(latencies) / wall,
+        'p50_ms': (percentile(latencies, 0.50) or 0) * 1000,
+        'p95_ms': (percentile(latencies, 0.95) or 0) * 1000,
+        'p99_ms': (percentile(latencies, 0.99) or 0) * 1000,
+        'max_ms': max(latencies, default=0) * 1000,
+        'mean_ms': (statistics.mean(latencies) if latencies else 0) * 1000,
+        'cpu_percent': 100 * (cpu_after - cpu_before) / wall,
+        'peak_rss_mb': peak_rss / (1024 * 1024),
+        'browser_processes': peak_browsers,
+        'browsers_started': FixtureScraper.started,
+        'fetches': FixtureScraper.fetches,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None
+    }
+
+
+def release_label():
+    """Label for the capacity curve, the git revision when available"""
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=os.path.dirname(APP_SCRIPT), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def run_load_test(fixtures, session_ladder, duration, interval, refresh_seconds, fetch_delay, output, label):
+    expiries, snapshots = load_fixtures(fixtures)
+    FixtureScraper.configure(expiries, snapshots, fetch_delay)
+    install_fixture_layer()
+    # The harness reads session state from its own threads, outside any script run
+    logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").addFilter(
+        lambda record: "missing ScriptRunContext" not in record.getMessage()
+    )
+
+    # Every session watches the same handful of strikes near the middle of the chain
+    strikes = list(snapshots[0].keys())
+    middle = len(strikes) // 2
+    strikes = strikes[max(0, middle - 5):middle + 5]
+
+    # One sequential session first, so lazy imports (plotly, orjson) do not race between threads
+    warm_up = threading.Event()
+    threading.Timer(3 * interval, warm_up.set).start()
+    SimulatedSession('warm-up', strikes, interval, 0).run(warm_up)
+
+    label = label or release_label()
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cpu %':>7} {'rss MB':>8} {'browsers':>8} {'errors':>6}")
+    rows = []
+    for sessions in session_ladder:
+        row = run_step(sessions, duration, strikes, interval, refresh_seconds)
+        row.update(label=label, recorded_at=datetime.now(pytz.UTC).isoformat(), duration_s=duration)
+        rows.append(row)
+        print(f"{row['sessions']:>8} {row['reruns']:>7} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} "
+              f"{row['p99_ms']:>8.0f} {row['cpu_percent']:>7.0f} {row['peak_rss_mb']:>8.0f} "
+              f"{row['browsers_started']:>8} {row['errors']:>6}")
+
+    if output:
+        with open(output, 'a') as file:
+            for row in rows:
+                file.write(json.dumps(row) + "\n")
+        print(f"Capacity curve appended to {output}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the option chain app")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help="Record snapshot fixtures")
+    record.add_argument('--fixtures', default='fixtures')
+    record.add_argument('--snapshots', type=int, default=20)
+    record.add_argument('--commodity', default='SILVER')
+    record.add_argument('--url', default=None, help="Option chain page (defaults to NSE)")
+    record.add_argument('--standin', action='store_true', help="Record from the local stand-in market instead of a browser")
+
+    run = subparsers.add_parser('run', help="Run the session ladder")
+    run.add_argument('--fixtures', default='fixtures')
+    run.add_argument('--sessions', default='1,2,4,8', help="Comma-separated session counts")
+    run.add_argument('--duration', type=float, default=30, help="Seconds per ladder step")
+    run.add_argument('--interval', type=float, default=1.0, help="Seconds between reruns of a session")
+    run.add_argument('--refresh-seconds', type=float, default=5, help="Seconds between fetches of a session")
+    run.add_argument('--fetch-delay', type=float, default=0.0, help="Simulated browser time per fetch")
+    run.add_argument('--output', default='capacity_curve.jsonl')
+    run.add_argument('--label', default=None, help="Release label (defaults to git describe)")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_fixtures(args.fixtures, args.snapshots, args.commodity, args.url, args.standin)
+    else:
+        # Keep the sessions' state files away from the real data directory
+        os.environ.setdefault("SILVER_DATA_DIR", os.path.join(os.path.abspath(args.fixtures), "data"))
+        os.environ.setdefault("SCRAPE_WORKERS", "0")
+        # Fixture fetches never reach NSE, so the request budget must not pace them
+        os.environ.setdefault("NSE_REQUESTS_PER_MINUTE", "100000")
+        os.environ.setdefault("NSE_REQUEST_BURST", "1000")
+        ladder = [int(value) for value in args.sessions.split(',') if value.strip()]
+        run_load_test(args.fixtures, ladder, args.duration, args.interval, args.refresh_seconds,
+                      args.fetch_delay, args.output, args.label)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,727 @@
+"""Selenium browser flow for the NSE commodity option chain page.
+
+This module has no Streamlit dependency so the same flow can run inside the
+Streamlit server process or in separate scrape worker processes.
+"""
+
+import base64
+import json
+import re
+import shutil
+import tempfile
+import time
+import weakref
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import Select, WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+from column_schema import ColumnMap, SchemaTracker
+from resource_monitor import BROWSER_DATA_DIR_PREFIX, ResourceSampler, browser_tag_env
+
+NSE_OPTION_CHAIN_URL = "https://www.nseindia.com/option-chain"
+
+BROWSER_PROFILES = ('standard', 'lean')
+
+# dom scrapes the rendered table, network reads the JSON the page fetches
+CAPTURE_MODES = ('dom', 'network')
+
+# Option chain data requests issued by the page
+OPTION_CHAIN_API_PATTERN = r"/api/option-chain"
+
+# JSON side keys mapped to snapshot fields
+PAYLOAD_FIELDS = {
+    'Volume': 'totalTradedVolume',
+    'Bid_Qty': 'bidQty',
+    'Bid': 'bidprice',
+    'Ask': 'askPrice',
+    'Ask_Qty': 'askQty',
+    'OI': 'openInterest',
+    'Chng_OI': 'changeinOpenInterest',
+    'LTP': 'lastPrice',
+    'Chng': 'change',
+    'IV': 'impliedVolatility',
+}
+PAYLOAD_INTEGER_FIELDS = ('Volume', 'Bid_Qty', 'Ask_Qty', 'OI', 'Chng_OI')
+
+# Requests the option chain never needs: images, fonts, media and third-party analytics
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*", "*adservice.google*",
+]
+
+
+OPTION_CHAIN_TABLE_ID = "optionChainTable-goldm"
+
+# Cell positions in an option chain row, used when the header cannot be mapped
+STRIKE_INDEX = 10
+MIN_ROW_CELLS = 21
+COLUMN_INDEX = {
+    'CE_OI': 0,
+    'CE_Chng_OI': 1,
+    'CE_Volume': 2,
+    'CE_IV': 3,
+    'CE_LTP': 4,
+    'CE_Chng': 5,
+    'CE_Bid_Qty': 6,
+    'CE_Bid': 7,
+    'CE_Ask': 8,
+    'CE_Ask_Qty': 9,
+    'PE_Bid_Qty': 11,
+    'PE_Bid': 12,
+    'PE_Ask': 13,
+    'PE_Ask_Qty': 14,
+    'PE_Chng': 15,
+    'PE_LTP': 16,
+    'PE_IV': 17,
+    'PE_Volume': 18,
+    'PE_Chng_OI': 19,
+    'PE_OI': 20,
+}
+DEFAULT_COLUMN_MAP = ColumnMap(STRIKE_INDEX, COLUMN_INDEX, MIN_ROW_CELLS)
+
+# Header cell labels of the option chain table, one list per header row
+HEADER_ROWS_JS = """
+var table = document.getElementById(arguments[0]);
+if (!table || !table.tHead) return [];
+return Array.prototype.map.call(table.tHead.rows, function (row) {
+    return Array.prototype.map.call(row.cells, function (cell) { return cell.innerText.trim(); });
+});
+"""
+
+# Cell texts of every body row of the option chain table, read in one round trip
+TABLE_ROWS_JS = """
+var table = document.getElementById(arguments[0]);
+if (!table) return null;
+var rows = [];
+Array.prototype.forEach.call(table.tBodies, function (body) {
+    Array.prototype.forEach.call(body.rows, function (row) {
+        rows.push(Array.prototype.map.call(row.cells, function (cell) { return cell.innerText.trim(); }));
+    });
+});
+return rows;
+"""
+
+# Installs a MutationObserver on the option chain table that marks rows touched
+# by the page. The last seen text of every row is kept in the page, so a drain
+# only returns rows whose cell text really changed.
+INSTALL_OBSERVER_JS = """
+var tableId = arguments[0], strikeIndex = arguments[1], minCells = arguments[2];
+var table = document.getElementById(tableId);
+if (!table) return false;
+var state = window.__ocObserver;
+if (state && state.table === table) return true;
+if (state) state.observer.disconnect();
+
+function rowTexts(row) {
+    return Array.prototype.map.call(row.cells, function (cell) { return cell.innerText.trim(); });
+}
+state = {table: table, dirty: new Set(), last: {}, removed: false,
+         strikeIndex: strikeIndex, minCells: minCells, rowTexts: rowTexts};
+Array.prototype.forEach.call(table.rows, function (row) {
+    if (row.cells.length < minCells) return;
+    var texts = rowTexts(row);
+    state.last[texts[strikeIndex]] = texts.join('\u0001');
+});
+
+function rowOf(node) {
+    while (node && node.nodeName !== 'TR') node = node.parentNode;
+    return node;
+}
+state.observer = new MutationObserver(function (mutations) {
+    mutations.forEach(function (mutation) {
+        if (mutation.type === 'childList') {
+            mutation.addedNodes.forEach(function (node) {
+                if (node.nodeType !== 1) return;
+                if (node.nodeName === 'TR') state.dirty.add(node);
+                else node.querySelectorAll('tr').forEach(function (row) { state.dirty.add(row); });
+            });
+            if (mutation.removedNodes.length) state.removed = true;
+        }
+        var row = rowOf(mutation.target);
+        if (row) state.dirty.add(row);
+    });
+});
+state.observer.observe(table, {subtree: true, childList: true, characterData: true});
+window.__ocObserver = state;
+return true;
+"""
+
+# Returns the rows changed since the last drain and clears the change log
+DRAIN_CHANGES_JS = """
+var state = window.__ocObserver;
+var table = document.getElementById(arguments[0]);
+if (!state || !table || state.table !== table) return {installed: false, rows: [], removed: [], header: []};
+
+var changed = [];
+state.dirty.forEach(function (row) {
+    if (!row.isConnected || row.cells.length < state.minCells) return;
+    var texts = state.rowTexts(row);
+    var key = texts[state.strikeIndex], joined = texts.join('\u0001');
+    if (state.last[key] !== joined) {
+        state.last[key] = joined;
+        changed.push(texts);
+    }
+});
+
+var removed = [];
+if (state.removed) {
+    var present = {};
+    Array.prototype.forEach.call(table.rows, function (row) {
+        if (row.cells.length >= state.minCells) present[row.cells[state.strikeIndex].innerText.trim()] = true;
+    });
+    Object.keys(state.last).forEach(function (key) {
+        if (!present[key]) { removed.push(key); delete state.last[key]; }
+    });
+}
+state.dirty.clear();
+state.removed = false;
+var header = table.tHead ? Array.prototype.map.call(table.tHead.rows, function (row) {
+    return Array.prototype.map.call(row.cells, function (cell) { return cell.innerText.trim(); });
+}) : [];
+return {installed: true, rows: changed, removed: removed, header: header};
+"""
+
+# Fires a change event on the expiry dropdown so the page re-queries the chain
+REQUERY_JS = """
+var select = document.getElementById('goldmExpirySelect');
+if (!select) return false;
+select.dispatchEvent(new Event('change', {bubbles: true}));
+return true;
+"""
+
+# Marks the rows currently in the table; returns how many were marked
+MARK_ROWS_JS = """
+var table = document.getElementById(arguments[0]);
+if (!table) return 0;
+var rows = table.querySelectorAll('tbody tr');
+for (var i = 0; i < rows.length; i++) rows[i].__ocStale = true;
+return rows.length;
+"""
+
+# True once the table holds rows rendered after MARK_ROWS_JS ran
+ROWS_REFRESHED_JS = """
+var table = document.getElementById(arguments[0]);
+if (!table) return false;
+var rows = table.querySelectorAll('tbody tr');
+return rows.length > 0 && !rows[0].__ocStale;
+"""
+
+# Same as REQUERY_JS, for a dropdown element passed as the first script argument
+CHANGE_EVENT_JS = "arguments[0].dispatchEvent(new Event('change', {bubbles: true}));"
+
+
+def clean_cell_text(text):
+    """Normalize cell text: stripped, with empty and '-' cells as 'NA'"""
+    text = (text or "").strip()
+    return text if text and text != "-" else "NA"
+
+
+def parse_row(texts, column_map=DEFAULT_COLUMN_MAP):
+    """Build the strike data dict from one row's cell texts, None for rows without a strike cell.
+
+    Strike text is kept as shown; rows whose strike is not a usable number are
+    quarantined by the validation stage instead of being dropped here.
+    """
+    if len(texts) < column_map.min_cells:
+        return None
+    strike_text = clean_cell_text(texts[column_map.strike_index])
+    if strike_text == "NA":
+        return None
+    strike_data = {'Strike': strike_text}
+    for field, index in column_map.columns.items():
+        strike_data[field] = clean_cell_text(texts[index])
+    return strike_data
+
+
+def format_payload_value(value, integer=False):
+    """Format a JSON number the way the page renders it ('-' for zero becomes NA)"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return "NA"
+    if number == 0:
+        return "NA"
+    return f"{int(number):,}" if integer else f"{number:,.2f}"
+
+
+def parse_option_chain_payload(payload, expiry_date=None):
+    """Convert the option chain JSON the page fetches into a snapshot dict"""
+    if not isinstance(payload, dict):
+        return {}
+    records = payload.get('records') or {}
+    rows = records.get('data') or (payload.get('filtered') or {}).get('data') or payload.get('data') or []
+
+    all_strikes_data = {}
+    for row in rows:
+        if expiry_date and row.get('expiryDate') and row['expiryDate'] != expiry_date:
+            continue
+        strike_text = format_payload_value(row.get('strikePrice'))
+        if strike_text == "NA":
+            continue
+        strike_data = {'Strike': strike_text}
+        for side in ('CE', 'PE'):
+            side_data = row.get(side) or {}
+            for field, key in PAYLOAD_FIELDS.items():
+                strike_data[f"{side}_{field}"] = format_payload_value(
+                    side_data.get(key), integer=field in PAYLOAD_INTEGER_FIELDS
+                )
+        all_strikes_data[strike_text] = strike_data
+    return all_strikes_data
+
+
+def apply_row_changes(snapshot, changes, column_map=DEFAULT_COLUMN_MAP):
+    """Apply drained row changes to a snapshot, returns (new snapshot, changed strike count)"""
+    updated = dict(snapshot)
+    changed = 0
+    for texts in changes['rows']:
+        strike_data = parse_row(texts, column_map)
+        if strike_data is None:
+            continue
+        if updated.get(strike_data['Strike']) != strike_data:
+            updated[strike_data['Strike']] = strike_data
+            changed += 1
+    for strike in changes['removed']:
+        if updated.pop(clean_cell_text(strike), None) is not None:
+            changed += 1
+    return updated, changed
+
+
+# Scrapers of this process with a running browser, consulted by the orphaned-browser reaper
+RUNNING_SCRAPERS = weakref.WeakSet()
+
+
+def running_browser_pids():
+    """Root pids of every browser started by a live scraper of this process"""
+    return [pid for scraper in list(RUNNING_SCRAPERS) for pid in scraper.browser_pids()]
+
+
+class ScraperError(Exception):
+    """Raised when a step of the option chain browser flow fails"""
+
+
+class NSEScraper:
+    """Drives one Chrome instance through the option chain page"""
+
+    def __init__(self, commodity_symbol="SILVER", wait_timeout=20, remote_debugging_port=9222,
+                 url=NSE_OPTION_CHAIN_URL, profile='standard', memory_cap_mb=None, capture_mode='dom',
+                 api_url_pattern=OPTION_CHAIN_API_PATTERN):
+        if profile not in BROWSER_PROFILES:
+            raise ValueError(f"Unknown browser profile: {profile}")
+        if capture_mode not in CAPTURE_MODES:
+            raise ValueError(f"Unknown capture mode: {capture_mode}")
+        self.commodity_symbol = commodity_symbol
+        self.wait_timeout = wait_timeout
+        self.remote_debugging_port = remote_debugging_port
+        self.url = url
+        self.profile = profile
+        self.memory_cap_mb = memory_cap_mb
+        self.capture_mode = capture_mode
+        self.api_url_pattern = re.compile(api_url_pattern)
+        self.driver = None
+        self.wait = None
+        self.user_data_dir = None
+        self.page_ready = False
+        self.last_fetch_cost = None
+        self.observed_key = None
+        self.schema = SchemaTracker(DEFAULT_COLUMN_MAP)
+        self.column_map = DEFAULT_COLUMN_MAP
+
+    @property
+    def is_running(self):
+        return self.driver is not None
+
+    def build_options(self):
+        """Build the Chrome options for this scraper"""
+        chrome_options = Options()
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument(f"--remote-debugging-port={self.remote_debugging_port}")
+        if self.user_data_dir:
+            # The profile directory name tags the browser as ours for the orphan reaper
+            chrome_options.add_argument(f"--user-data-dir={self.user_data_dir}")
+
+        if self.profile == 'lean':
+            chrome_options.add_argument("--window-size=1280,720")
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--disable-background-networking")
+            chrome_options.add_argument("--disable-component-update")
+            chrome_options.add_argument("--disable-default-apps")
+            chrome_options.add_argument("--disable-sync")
+            chrome_options.add_argument("--mute-audio")
+            chrome_options.add_argument("--no-first-run")
+            chrome_options.add_argument("--renderer-process-limit=1")
+            chrome_options.add_argument("--disable-features=Translate,OptimizationHints,MediaRouter")
+            if self.memory_cap_mb:
+                # Cap the V8 heap; the whole-tree RSS cap is enforced after each fetch
+                chrome_options.add_argument(f"--js-flags=--max-old-space-size={int(self.memory_cap_mb // 2)}")
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.media_stream": 2,
+            })
+        else:
+            chrome_options.add_argument("--window-size=1920,1080")
+
+        if self.capture_mode == 'network':
+            # Network events land in the performance log, response bodies are read over CDP
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        return chrome_options
+
+    def browser_pids(self):
+        """Root pids of the browser process tree (the chromedriver service)"""
+        try:
+            return [self.driver.service.process.pid]
+        except Exception:
+            return []
+
+    def start(self):
+        """Start Chrome if it is not already running"""
+        if self.driver:
+            return
+        try:
+            # Use webdriver-manager to automatically handle ChromeDriver
+            self.user_data_dir = tempfile.mkdtemp(prefix=BROWSER_DATA_DIR_PREFIX)
+            service = Service(ChromeDriverManager().install(), env=browser_tag_env())
+            self.driver = webdriver.Chrome(service=service, options=self.build_options())
+            self.wait = WebDriverWait(self.driver, self.wait_timeout)
+            self.page_ready = False
+        except Exception as e:
+            self._remove_user_data_dir()
+            raise ScraperError(f"WebDriver setup failed: {e}")
+        RUNNING_SCRAPERS.add(self)
+
+        if self.profile == 'lean':
+            try:
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+            except Exception:
+                # Blocking is an optimization only; the flow works without it
+                pass
+
+    def close(self):
+        """Quit Chrome if it is running"""
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        RUNNING_SCRAPERS.discard(self)
+        self.driver = None
+        self.wait = None
+        self.page_ready = False
+        self.observed_key = None
+        self._remove_user_data_dir()
+
+    def _remove_user_data_dir(self):
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+    def navigate_and_setup(self):
+        """Navigate to NSE and setup commodities page"""
+        try:
+            self.driver.get(self.url)
+            time.sleep(3)
+
+            # Click commodities tab
+            commodities_tab = self.wait.until(EC.element_to_be_clickable((By.ID, "goldmChain")))
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", commodities_tab)
+            time.sleep(1)
+
+            try:
+                commodities_tab.click()
+            except Exception:
+                self.driver.execute_script("arguments[0].click();", commodities_tab)
+
+            time.sleep(2)
+            self.page_ready = True
+        except Exception as e:
+            self.page_ready = False
+            raise ScraperError(f"Navigation failed: {e}")
+
+    def ensure_page(self):
+        """Start the browser and open the commodities page if needed"""
+        self.start()
+        if not self.page_ready:
+            self.navigate_and_setup()
+
+    def select_commodity(self, commodity_symbol=None):
+        """Select the commodity in the dropdown"""
+        dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "goldmSelect")))
+        Select(dropdown).select_by_value(commodity_symbol or self.commodity_symbol)
+        time.sleep(2)
+
+    def select_commodity_and_expiry(self, expiry_date=None, commodity_symbol=None):
+        """Select commodity and expiry date, returns the selected expiry"""
+        try:
+            self.select_commodity(commodity_symbol)
+
+            if expiry_date:
+                expiry_dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "goldmExpirySelect")))
+                if expiry_dropdown.get_attribute("value") == expiry_date:
+                    # select_by_value skips an option that is already selected, so no change event fires
+                    self.driver.execute_script(REQUERY_JS)
+                else:
+                    Select(expiry_dropdown).select_by_value(expiry_date)
+                time.sleep(2)
+                return expiry_date
+
+            # Fallback to nearest expiry if no selection
+            selected_expiry = self._select_nearest_expiry()
+            time.sleep(2)
+            return selected_expiry
+        except Exception as e:
+            raise ScraperError(f"Commodity/Expiry selection failed: {e}")
+
+    def _select_nearest_expiry(self):
+        """Select the nearest (first) expiry date"""
+        expiry_selectors = [
+            "select[id*='expiry']", "select[id*='Expiry']",
+            "#goldmExpirySelect", "select:nth-of-type(2)"
+        ]
+
+        for selector in expiry_selectors:
+            try:
+                expiry_dropdown = self.driver.find_element(By.CSS_SELECTOR, selector)
+                select_expiry = Select(expiry_dropdown)
+                options = select_expiry.options[1:] if len(select_expiry.options) > 1 else select_expiry.options
+
+                if options:
+                    nearest_expiry = options[0]
+                    if nearest_expiry.is_selected():
+                        # Clicking the selected option fires no change event; re-query explicitly
+                        self.driver.execute_script(CHANGE_EVENT_JS, expiry_dropdown)
+                    else:
+                        nearest_expiry.click()
+                    return nearest_expiry.text or nearest_expiry.get_attribute("value")
+
+            except Exception:
+                continue
+
+        raise ScraperError("Could not find or select nearest expiry")
+
+    def fetch_expiry_dates(self, commodity_symbol=None):
+        """Return the expiry dates listed for the commodity"""
+        try:
+            self.ensure_page()
+            self.select_commodity(commodity_symbol)
+
+            expiry_dropdown = self.wait.until(EC.presence_of_element_located((By.ID, "goldmExpirySelect")))
+            select_expiry = Select(expiry_dropdown)
+
+            # Extract all expiry options (skip first "Select" option)
+            expiry_dates = []
+            for option in select_expiry.options[1:]:
+                expiry_value = option.get_attribute("value")
+                if expiry_value:
+                    expiry_dates.append(expiry_value)
+            return expiry_dates
+        except ScraperError:
+            raise
+        except Exception as e:
+            raise ScraperError(f"Error fetching expiry dates: {e}")
+
+    def wait_for_data(self):
+        """Wait for option chain data to load"""
+        try:
+            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table, .option-chain-table, [class*='option']")))
+            time.sleep(2)
+        except Exception as e:
+            raise ScraperError(f"Data loading timeout: {e}")
+
+    def mark_table_rows(self):
+        """Mark the rows of a reused page so they are never read back as a later fetch's data"""
+        try:
+            return self.driver.execute_script(MARK_ROWS_JS, OPTION_CHAIN_TABLE_ID) or 0
+        except Exception:
+            return 0
+
+    def wait_for_refresh(self):
+        """Wait until the page replaced the marked rows, returns False on timeout"""
+        try:
+            self.wait.until(lambda driver: driver.execute_script(ROWS_REFRESHED_JS, OPTION_CHAIN_TABLE_ID))
+            return True
+        except Exception:
+            return False
+
+    def read_column_map(self, header_rows=None):
+        """Map columns from the table header, re-deriving only when the header changed"""
+        if header_rows is None:
+            try:
+                header_rows = self.driver.execute_script(HEADER_ROWS_JS, OPTION_CHAIN_TABLE_ID)
+            except Exception:
+                header_rows = []
+        self.column_map = self.schema.column_map(header_rows)
+        return self.column_map
+
+    def extract_option_data(self):
+        """Extract option chain data for all available strikes"""
+        try:
+            column_map = self.read_column_map()
+            # One script call returns every cell, so all mapped columns cost the same as a few
+            rows = self.driver.execute_script(TABLE_ROWS_JS, OPTION_CHAIN_TABLE_ID)
+            if rows is None:
+                raise ScraperError(f"Table {OPTION_CHAIN_TABLE_ID} not found")
+
+            all_strikes_data = {}
+            for texts in rows:
+                strike_data = parse_row(texts, column_map)
+                if strike_data is not None:
+                    all_strikes_data[strike_data['Strike']] = strike_data
+
+            return all_strikes_data
+
+        except Exception as e:
+            raise ScraperError(f"Error extracting data: {e}")
+
+    def drain_performance_log(self):
+        """Read and clear the browser performance log"""
+        try:
+            return self.driver.get_log('performance')
+        except Exception:
+            return []
+
+    def captured_option_chain_payloads(self, log_entries, pending):
+        """Return JSON bodies of finished option chain responses found in log entries"""
+        payloads = []
+        for entry in log_entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+
+            if method == 'Network.responseReceived':
+                url = params.get('response', {}).get('url', '')
+                if self.api_url_pattern.search(url):
+                    pending.add(params.get('requestId'))
+            elif method == 'Network.loadingFinished' and params.get('requestId') in pending:
+                pending.discard(params['requestId'])
+                try:
+                    body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+                    text = body['body']
+                    if body.get('base64Encoded'):
+                        text = base64.b64decode(text).decode('utf-8')
+                    payloads.append(json.loads(text))
+                except Exception:
+                    # Body already evicted or not JSON; a later response may still arrive
+                    continue
+        return payloads
+
+    def capture_option_chain(self, expiry_date=None, commodity_symbol=None):
+        """Select commodity/expiry and read the chain from the page's own JSON response.
+
+        Returns (expiry, snapshot); the snapshot is empty if no response was captured.
+        """
+        self.drain_performance_log()
+        selected_expiry = self.select_commodity_and_expiry(expiry_date, commodity_symbol)
+
+        pending = set()
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            payloads = self.captured_option_chain_payloads(self.drain_performance_log(), pending)
+            # Selecting the commodity can fetch a default expiry first, so the latest match wins
+            for payload in reversed(payloads):
+                data = parse_option_chain_payload(payload, selected_expiry)
+                if data:
+                    return selected_expiry, data
+            if time.monotonic() >= deadline:
+                return selected_expiry, {}
+            time.sleep(0.2)
+
+    def fetch_snapshot(self, expiry_date=None, commodity_symbol=None):
+        """Run the full flow for one (commodity, expiry), returns (expiry, snapshot)"""
+        with ResourceSampler(self.browser_pids) as sampler:
+            self.ensure_page()
+            stale_rows = self.mark_table_rows()
+            data = {}
+            if self.capture_mode == 'network':
+                selected_expiry, data = self.capture_option_chain(expiry_date, commodity_symbol)
+            else:
+                selected_expiry = self.select_commodity_and_expiry(expiry_date, commodity_symbol)
+            if not data:
+                # DOM scrape, also the fallback when no JSON response was captured
+                if stale_rows and not self.wait_for_refresh():
+                    # The reused page kept the previous rows; load it again rather than return them
+                    self.page_ready = False
+                    self.ensure_page()
+                    selected_expiry = self.select_commodity_and_expiry(expiry_date, commodity_symbol)
+                self.wait_for_data()
+                data = self.extract_option_data()
+
+        self.last_fetch_cost = dict(sampler.result, profile=self.profile, strikes=len(data))
+        self.enforce_memory_cap()
+        return selected_expiry, data
+
+    def install_change_observer(self):
+        """Inject the table MutationObserver, returns False if the table is missing"""
+        return bool(self.driver.execute_script(
+            INSTALL_OBSERVER_JS, OPTION_CHAIN_TABLE_ID, self.column_map.strike_index, self.column_map.min_cells
+        ))
+
+    def reset_change_capture(self):
+        """Make the next fetch_changes do a full scrape, e.g. after its result was rejected"""
+        self.observed_key = None
+
+    def drain_changes(self):
+        """Collect and clear the observer's change log with a single script call"""
+        return self.driver.execute_script(DRAIN_CHANGES_JS, OPTION_CHAIN_TABLE_ID)
+
+    def fetch_changes(self, previous, expiry_date=None, commodity_symbol=None):
+        """Refresh through the change observer, returns (expiry, snapshot, changes).
+
+        ``changes`` is None when a full scrape was needed (first fetch, other
+        expiry, or the page replaced the table), otherwise the drained change
+        log; an empty log means nothing changed and ``previous`` is returned.
+        """
+        key = (commodity_symbol or self.commodity_symbol, expiry_date)
+        if not previous or not self.driver or self.observed_key != key:
+            selected_expiry, data = self.fetch_snapshot(expiry_date, commodity_symbol)
+            try:
+                self.observed_key = (key[0], selected_expiry) if self.install_change_observer() else None
+            except Exception:
+                self.observed_key = None
+            return selected_expiry, data, None
+
+        with ResourceSampler(self.browser_pids) as sampler:
+            try:
+                self.driver.execute_script(REQUERY_JS)
+                time.sleep(2)
+                changes = self.drain_changes()
+            except Exception as e:
+                self.observed_key = None
+                raise ScraperError(f"Error reading table changes: {e}")
+
+        if not changes or not changes.get('installed'):
+            # The table was replaced; fall back to a full scrape and re-arm the observer
+            self.observed_key = None
+            return self.fetch_changes(previous, expiry_date, commodity_symbol)
+
+        observed_map = self.column_map
+        if self.read_column_map(changes.get('header') or []) != observed_map:
+            # The header changed under the observer; rescrape with the new column map
+            self.observed_key = None
+            return self.fetch_changes(previous, expiry_date, commodity_symbol)
+
+        data, changed = apply_row_changes(previous, changes, self.column_map)
+        changes['changed'] = changed
+        self.last_fetch_cost = dict(sampler.result, profile=self.profile, strikes=len(data), changed=changed)
+        self.enforce_memory_cap()
+        return expiry_date, (data if changed else previous), changes
+
+    def enforce_memory_cap(self):
+        """Restart the browser on the next fetch if the last one exceeded the RSS cap"""
+        if self.memory_cap_mb and self.last_fetch_cost and self.last_fetch_cost['peak_rss_mb'] > self.memory_cap_mb:
+            self.last_fetch_cost['restarted'] = True
+            self.close()
@@ -0,0 +1,359 @@
+"""Local stand-in for the NSE commodity option chain page.
+
+Serves a page with the same element ids the scraper uses (``goldmChain``,
+``goldmSelect``, ``goldmExpirySelect``, ``optionChainTable-goldm``) and the
+JSON endpoints the page calls, so the DOM, change-observer and network
+capture modes can be exercised without touching nseindia.com::
+
+    python nse_standin_server.py --port 8765
+    NSE_OPTION_CHAIN_URL=http://127.0.0.1:8765/option-chain streamlit run SilverAutoCheck_ui.py
+
+``--check`` scrapes a frozen stand-in chain once in network capture mode and
+once in DOM mode and fails when the two snapshots differ, then captures one
+expiry twice on the same page and fails unless the refresh read a new
+payload; it is skipped when Chrome is not installed::
+
+    python nse_standin_server.py --check
+
+Every chain request moves a few strikes with a seeded random walk, so
+consecutive refreshes produce small, realistic deltas.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BASE_PRICES = {'SILVER': 112000, 'GOLD': 72000}
+STRIKE_STEPS = {'SILVER': 250, 'GOLD': 100}
+
+PAGE_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<title>Option Chain (stand-in)</title>
+<link rel="stylesheet" href="/static/fonts.css">
+<script async src="https://www.googletagmanager.com/gtag/js"></script>
+</head>
+<body>
+<img src="/static/banner.png" alt="">
+<ul><li><a id="equityChain" href="#">Equity</a></li><li><a id="goldmChain" href="#">Commodity</a></li></ul>
+<div id="commoditySection" style="display:none">
+  <select id="goldmSelect">
+    <option value="">Select</option>
+    <option value="SILVER">SILVER</option>
+    <option value="GOLD">GOLD</option>
+  </select>
+  <select id="goldmExpirySelect"><option value="">Select</option></select>
+  <table id="optionChainTable-goldm">
+    <thead>
+      <tr><th colspan="10">CALLS</th><th></th><th colspan="10">PUTS</th></tr>
+      <tr>
+        <th>OI</th><th>CHNG IN OI</th><th>VOLUME</th><th>IV</th><th>LTP</th><th>CHNG</th>
+        <th>BID QTY</th><th>BID</th><th>ASK</th><th>ASK QTY</th><th>STRIKE</th>
+        <th>BID QTY</th><th>BID</th><th>ASK</th><th>ASK QTY</th><th>CHNG</th><th>LTP</th>
+        <th>IV</th><th>VOLUME</th><th>CHNG IN OI</th><th>OI</th>
+      </tr>
+    </thead>
+    <tbody></tbody>
+  </table>
+</div>
+<script>
+var CE = ['openInterest', 'changeinOpenInterest', 'totalTradedVolume', 'impliedVolatility', 'lastPrice',
+          'change', 'bidQty', 'bidprice', 'askPrice', 'askQty'];
+var PE = ['bidQty', 'bidprice', 'askPrice', 'askQty', 'change', 'lastPrice', 'impliedVolatility',
+          'totalTradedVolume', 'changeinOpenInterest', 'openInterest'];
+var INTEGER = {openInterest: 1, changeinOpenInterest: 1, totalTradedVolume: 1, bidQty: 1, askQty: 1};
+
+function fmt(key, value) {
+  if (value === null || value === undefined || value === 0) return '-';
+  var digits = INTEGER[key] ? 0 : 2;
+  return Number(value).toLocaleString('en-US', {minimumFractionDigits: digits, maximumFractionDigits: digits});
+}
+function cells(side, keys) {
+  return keys.map(function (key) { return '<td>' + fmt(key, side ? side[key] : null) + '</td>'; }).join('');
+}
+function loadChain() {
+  var symbol = document.getElementById('goldmSelect').value;
+  var expiry = document.getElementById('goldmExpirySelect').value;
+  if (!symbol || !expiry) return;
+  fetch('/api/option-chain-com?symbol=' + symbol + '&expiry=' + encodeURIComponent(expiry))
+    .then(function (response) { return response.json(); })
+    .then(function (payload) {
+      var rows = payload.records.data.map(function (row) {
+        var strike = Number(row.strikePrice).toLocaleString('en-US', {minimumFractionDigits: 2});
+        return '<tr>' + cells(row.CE, CE) + '<td>' + strike + '</td>' + cells(row.PE, PE) + '</tr>';
+      });
+      document.querySelector('#optionChainTable-goldm tbody').innerHTML = rows.join('');
+    });
+}
+document.getElementById('goldmChain').addEventListener('click', function (event) {
+  event.preventDefault();
+  document.getElementById('commoditySection').style.display = 'block';
+});
+document.getElementById('goldmSelect').addEventListener('change', function () {
+  fetch('/api/expiries?symbol=' + this.value)
+    .then(function (response) { return response.json(); })
+    .then(function (expiries) {
+      var select = document.getElementById('goldmExpirySelect');
+      select.innerHTML = '<option value="">Select</option>' + expiries.map(function (expiry) {
+        return '<option value="' + expiry + '">' + expiry + '</option>';
+      }).join('');
+    });
+});
+document.getElementById('goldmExpirySelect').addEventListener('change', loadChain);
+</script>
+</body>
+</html>
+"""
+
+
+def expiry_dates(count=4, today=None):
+    """Month-end style expiry labels starting next month"""
+    today = today or date.today()
+    labels = []
+    month_start = today.replace(day=1)
+    for _ in range(count):
+        month_start = (month_start + timedelta(days=32)).replace(day=1)
+        expiry = month_start - timedelta(days=4)
+        labels.append(expiry.strftime('%d-%b-%Y'))
+    return labels
+
+
+class StandInMarket:
+    """Seeded random-walk option chains per (symbol, expiry)"""
+
+    def __init__(self, strikes=120, seed=7, moves_per_tick=5):
+        self.strikes = strikes
+        self.seed = seed
+        self.moves_per_tick = moves_per_tick
+        self.chains = {}
+        self.lock = threading.Lock()
+
+    def _new_chain(self, symbol, expiry):
+        rng = random.Random(f"{self.seed}:{symbol}:{expiry}")
+        base = BASE_PRICES.get(symbol, 100000)
+        step = STRIKE_STEPS.get(symbol, 250)
+        first = base - step * (self.strikes // 2)
+        chain = []
+        for i in range(self.strikes):
+            strike = first + step * i
+            chain.append({
+                'strikePrice': strike,
+                'expiryDate': expiry,
+                'CE': self._side(rng, max(5.0, base - strike + 900)),
+                'PE': self._side(rng, max(5.0, strike - base + 900)),
+            })
+        return {'rng': rng, 'rows': chain}
+
+    def _side(self, rng, fair):
+        bid = round(fair * rng.uniform(0.97, 0.995), 2)
+        ask = round(fair * rng.uniform(1.005, 1.03), 2)
+        quoted = rng.random() > 0.15
+        return {
+            'openInterest': rng.randint(0, 5000),
+            'changeinOpenInterest': rng.randint(-200, 200),
+            'totalTradedVolume': rng.randint(0, 3000),
+            'impliedVolatility': round(rng.uniform(12, 35), 2),
+            'lastPrice': round((bid + ask) / 2, 2),
+            'change': round(rng.uniform(-50, 50), 2),
+            'bidQty': rng.randint(1, 60) if quoted else 0,
+            'bidprice': bid if quoted else 0,
+            'askPrice': ask if quoted else 0,
+            'askQty': rng.randint(1, 60) if quoted else 0,
+        }
+
+    def _tick(self, chain):
+        rng = chain['rng']
+        for row in rng.sample(chain['rows'], min(self.moves_per_tick, len(chain['rows']))):
+            side = row[rng.choice(('CE', 'PE'))]
+            side['totalTradedVolume'] += rng.randint(1, 40)
+            if side['bidprice']:
+                move = round(rng.uniform(-5, 5), 2)
+                side['bidprice'] = max(0.05, round(side['bidprice'] + move, 2))
+                side['askPrice'] = max(side['bidprice'] + 0.05, round(side['askPrice'] + move, 2))
+                side['lastPrice'] = round((side['bidprice'] + side['askPrice']) / 2, 2)
+
+    def chain(self, symbol, expiry):
+        """Return the chain payload for one (symbol, expiry), advancing it one tick"""
+        with self.lock:
+            key = (symbol, expiry)
+            if key not in self.chains:
+                self.chains[key] = self._new_chain(symbol, expiry)
+            else:
+                self._tick(self.chains[key])
+            rows = json.loads(json.dumps(self.chains[key]['rows']))
+        return {'records': {'expiryDates': expiry_dates(), 'data': rows}, 'filtered': {'data': rows}}
+
+
+def make_handler(market):
+    """Build a request handler class bound to a market"""
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type):
+            data = body.encode('utf-8') if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            symbol = query.get('symbol', ['SILVER'])[0]
+
+            if url.path in ('/', '/option-chain'):
+                self._send(200, PAGE_HTML, 'text/html; charset=utf-8')
+            elif url.path == '/api/expiries':
+                self._send(200, json.dumps(expiry_dates()), 'application/json')
+            elif url.path == '/api/option-chain-com':
+                expiry = query.get('expiry', [expiry_dates()[0]])[0]
+                self._send(200, json.dumps(market.chain(symbol, expiry)), 'application/json')
+            else:
+                self._send(404, 'not found', 'text/plain')
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def serve_in_thread(host='127.0.0.1', port=0, market=None):
+    """Start the stand-in server in a daemon thread, returns (server, page url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(market or StandInMarket()))
+    thread = threading.Thread(target=server.serve_forever, name="nse-standin", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/option-chain"
+
+
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+
+def chrome_installed():
+    """True when a Chrome/Chromium binary is on PATH (or named by CHROME_BINARY)"""
+    if os.environ.get('CHROME_BINARY'):
+        return os.path.exists(os.environ['CHROME_BINARY'])
+    return any(shutil.which(name) for name in CHROME_BINARIES)
+
+
+def check_network_capture(symbol='SILVER', strikes=40, seed=7):
+    """Compare network-capture and DOM snapshots of one frozen chain, returns the differing strikes.
+
+    Returns None when Chrome is not installed and the check cannot run.
+    """
+    if not chrome_installed():
+        return None
+    from nse_scraper import NSEScraper
+
+    # No moves per tick, so both scrapes see the same chain
+    server, url = serve_in_thread(market=StandInMarket(strikes=strikes, seed=seed, moves_per_tick=0))
+    snapshots = {}
+    try:
+        for mode in ('network', 'dom'):
+            scraper = NSEScraper(commodity_symbol=symbol, url=url, capture_mode=mode)
+            try:
+                scraper.start()
+                if mode == 'network':
+                    # Bypass fetch_snapshot so a silent fallback to the DOM cannot pass the check
+                    scraper.ensure_page()
+                    snapshots[mode] = scraper.capture_option_chain(expiry_dates()[0], symbol)
+                else:
+                    snapshots[mode] = scraper.fetch_snapshot(expiry_dates()[0], symbol)
+            finally:
+                scraper.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    (network_expiry, network), (dom_expiry, dom) = snapshots['network'], snapshots['dom']
+    if network_expiry != dom_expiry:
+        raise AssertionError(f"Expiry differs: network {network_expiry!r}, DOM {dom_expiry!r}")
+    if not network:
+        raise AssertionError("No option chain response was captured in network mode")
+    if not dom:
+        raise AssertionError("DOM capture returned an empty snapshot")
+    return sorted(strike for strike in set(network) | set(dom) if network.get(strike) != dom.get(strike))
+
+
+def check_repeated_capture(symbol='SILVER', strikes=40, seed=7):
+    """Capture the same expiry twice on one reused page, returns the seconds the second capture took.
+
+    The market moves on every chain request, so the second capture must read
+    a new payload rather than time out on an expiry that is already selected.
+    Returns None when Chrome is not installed and the check cannot run.
+    """
+    if not chrome_installed():
+        return None
+    from nse_scraper import NSEScraper
+
+    server, url = serve_in_thread(market=StandInMarket(strikes=strikes, seed=seed))
+    scraper = NSEScraper(commodity_symbol=symbol, url=url, capture_mode='network')
+    try:
+        scraper.ensure_page()
+        _, first = scraper.capture_option_chain(expiry_dates()[0], symbol)
+        started = time.monotonic()
+        _, second = scraper.capture_option_chain(expiry_dates()[0], symbol)
+        elapsed = time.monotonic() - started
+    finally:
+        scraper.close()
+        server.shutdown()
+        server.server_close()
+
+    if not first:
+        raise AssertionError("No option chain response was captured on the first fetch")
+    if not second:
+        raise AssertionError(f"No option chain response was captured when refreshing the same expiry ({elapsed:.1f}s)")
+    if second == first:
+        raise AssertionError("The refresh of the same expiry returned the previous payload")
+    return elapsed
+
+
+def run_check():
+    """CLI entry for --check, returns the process exit code"""
+    try:
+        differing = check_network_capture()
+        if differing is None:
+            print("SKIP: Chrome is not installed")
+            return 0
+        if differing:
+            print(f"FAIL: network and DOM snapshots differ at {len(differing)} strikes: {differing[:10]}")
+            return 1
+        print("OK: network capture matches the DOM snapshot")
+        elapsed = check_repeated_capture()
+    except AssertionError as e:
+        print(f"FAIL: {e}")
+        return 1
+    print(f"OK: refreshing the same expiry captured a new payload in {elapsed:.1f}s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the NSE option chain page")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--strikes', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--check', action='store_true', help="Compare network and DOM capture against the stand-in, then exit")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(run_check())
+
+    market = StandInMarket(strikes=args.strikes, seed=args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(market))
+    print(f"Serving stand-in option chain on http://{args.host}:{args.port}/option-chain")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Open-interest analytics over a full option chain snapshot.
+
+Everything works on one wide frame (a row per strike, CE_/PE_ columns as
+floats) with numpy broadcasting and no per-strike Python loops:
+
+* max pain: the settlement price that minimises the total intrinsic value
+  option writers would pay out,
+* OI build-up: long/short build-up, long unwinding and short covering from
+  the signs of the price change and the change in OI,
+* put/call ratios by open interest, change in OI and volume.
+"""
+
+import numpy as np
+import pandas as pd
+
+from option_snapshot import CHAIN_FIELDS, SIDES, normalize_strike, numeric_cells, to_numeric_column
+
+BUILDUP_LABELS = ('Long Build-up', 'Short Build-up', 'Long Unwinding', 'Short Covering')
+NEUTRAL = 'Neutral'
+
+
+def wide_chain_frame(snapshot):
+    """Typed frame with one row per strike sorted by strike value"""
+    value_columns = [f"{side}_{field}" for side in SIDES for field in CHAIN_FIELDS]
+    if not snapshot:
+        return pd.DataFrame(columns=['Strike', 'Strike_Value'] + value_columns)
+
+    raw = pd.DataFrame.from_dict(snapshot, orient='index')
+    frame = pd.DataFrame(numeric_cells(raw, value_columns), columns=value_columns)
+    frame.insert(0, 'Strike', raw.index.values)
+    frame.insert(1, 'Strike_Value', to_numeric_column(raw.index.to_series().map(normalize_strike)).values)
+    frame = frame.dropna(subset=['Strike_Value'])
+    return frame.sort_values('Strike_Value', kind='stable').reset_index(drop=True)
+
+
+def max_pain(frame):
+    """Return (max pain strike, Series of total writer payout indexed by settlement strike)"""
+    if len(frame) == 0:
+        return None, pd.Series(dtype=float)
+    strikes = frame['Strike_Value'].to_numpy(dtype=float)
+    ce_oi = np.nan_to_num(frame['CE_OI'].to_numpy(dtype=float))
+    pe_oi = np.nan_to_num(frame['PE_OI'].to_numpy(dtype=float))
+    if not ce_oi.any() and not pe_oi.any():
+        return None, pd.Series(dtype=float)
+
+    # settlement[:, None] - strikes[None, :] is the call intrinsic value for every (settlement, strike) pair
+    moneyness = strikes[:, None] - strikes[None, :]
+    payout = np.maximum(moneyness, 0) @ ce_oi + np.maximum(-moneyness, 0) @ pe_oi
+    pain = pd.Series(payout, index=strikes)
+    return float(strikes[int(np.argmin(payout))]), pain
+
+
+def classify_buildup(price_change, oi_change):
+    """Vectorized build-up label per row from price change and OI change"""
+    price_change = np.asarray(price_change, dtype=float)
+    oi_change = np.asarray(oi_change, dtype=float)
+    conditions = [
+        (price_change > 0) & (oi_change > 0),
+        (price_change < 0) & (oi_change > 0),
+        (price_change < 0) & (oi_change < 0),
+        (price_change > 0) & (oi_change < 0),
+    ]
+    return np.select(conditions, BUILDUP_LABELS, default=NEUTRAL)
+
+
+def oi_buildup(frame):
+    """Long frame of build-up per strike and side, with OI and change columns"""
+    frames = []
+    for side in SIDES:
+        frames.append(pd.DataFrame({
+            'Strike': frame['Strike'].values,
+            'Strike_Value': frame['Strike_Value'].values,
+            'Type': side,
+            'OI': frame[f"{side}_OI"].values,
+            'Chng_OI': frame[f"{side}_Chng_OI"].values,
+            'LTP': frame[f"{side}_LTP"].values,
+            'Chng': frame[f"{side}_Chng"].values,
+            'IV': frame[f"{side}_IV"].values,
+            'Build_Up': classify_buildup(frame[f"{side}_Chng"].values, frame[f"{side}_Chng_OI"].values),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _ratio(numerator, denominator):
+    return float(numerator / denominator) if denominator else None
+
+
+def put_call_ratios(frame):
+    """PCR by open interest, change in OI and volume (None when calls are zero)"""
+    totals = frame[[f"{side}_{field}" for side in SIDES for field in ('OI', 'Chng_OI', 'Volume')]].sum()
+    return {
+        'pcr_oi': _ratio(totals['PE_OI'], totals['CE_OI']),
+        'pcr_chng_oi': _ratio(totals['PE_Chng_OI'], totals['CE_Chng_OI']),
+        'pcr_volume': _ratio(totals['PE_Volume'], totals['CE_Volume']),
+        'ce_oi': float(totals['CE_OI']),
+        'pe_oi': float(totals['PE_OI']),
+    }
+
+
+def chain_analytics(snapshot):
+    """Max pain, PCR and build-up for a snapshot; has_oi is False when no OI was captured"""
+    frame = wide_chain_frame(snapshot)
+    has_oi = bool(len(frame)) and (frame['CE_OI'].notna().any() or frame['PE_OI'].notna().any())
+    max_pain_strike, pain = max_pain(frame) if has_oi else (None, pd.Series(dtype=float))
+    buildup = oi_buildup(frame)
+    counts = buildup['Build_Up'].value_counts() if len(buildup) else pd.Series(dtype=int)
+    result = {
+        'has_oi': has_oi,
+        'frame': frame,
+        'max_pain': max_pain_strike,
+        'pain': pain,
+        'buildup': buildup,
+        'buildup_counts': {label: int(counts.get(label, 0)) for label in BUILDUP_LABELS},
+    }
+    result.update(put_call_ratios(frame))
+    return result
@@ -0,0 +1,188 @@
+"""Helpers for working with option chain snapshots.
+
+A snapshot is the dict returned by ``extract_option_data``: the strike text as
+shown on the website mapped to a dict of cell values (strings, ``'NA'`` when
+the cell is empty).
+"""
+
+import json
+import zlib
+
+import pandas as pd
+
+SIDES = ('CE', 'PE')
+
+QUOTE_FIELDS = ('Volume', 'Bid_Qty', 'Bid', 'Ask', 'Ask_Qty')
+
+# Open interest, last traded price, net change and implied volatility, read in the same pass
+MARKET_FIELDS = ('OI', 'Chng_OI', 'LTP', 'Chng', 'IV')
+
+CHAIN_FIELDS = QUOTE_FIELDS + MARKET_FIELDS
+
+
+def parse_number(text):
+    """Convert a cell value like '1,234.50' to float, None for 'NA'/blank"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    cleaned = str(text).replace(',', '').strip()
+    if not cleaned or cleaned in ('NA', '-'):
+        return None
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def normalize_strike(strike):
+    """Normalize strike text ('112,250.00', '112250') to a comparable key"""
+    cleaned = str(strike).replace(',', '').strip()
+    if cleaned.endswith('.00'):
+        cleaned = cleaned[:-3]
+    return cleaned
+
+
+def side_fields(row, side):
+    """Return the quote and market fields of one side (CE/PE) of a snapshot row"""
+    if not row:
+        return {}
+    return {field: row.get(f"{side}_{field}", 'NA') for field in CHAIN_FIELDS}
+
+
+def diff_snapshots(previous, current):
+    """Compute the delta between two snapshots.
+
+    Returns a dict with ``added`` and ``removed`` strike lists and ``changed``,
+    mapping each strike whose cells differ to ``{field: (old, new)}``.
+    """
+    previous = previous or {}
+    current = current or {}
+
+    added = [strike for strike in current if strike not in previous]
+    removed = [strike for strike in previous if strike not in current]
+    changed = {}
+
+    for strike, row in current.items():
+        old_row = previous.get(strike)
+        if old_row is None or old_row is row:
+            continue
+        fields = {}
+        for field, value in row.items():
+            old_value = old_row.get(field)
+            if old_value != value:
+                fields[field] = (old_value, value)
+        if fields:
+            changed[strike] = fields
+
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def delta_is_empty(delta):
+    """True if a delta from diff_snapshots carries no changes"""
+    return not (delta['added'] or delta['removed'] or delta['changed'])
+
+
+def encode_snapshot(snapshot):
+    """Serialize a snapshot into compact bytes: shared column list plus row values, zlib compressed"""
+    columns = []
+    for row in snapshot.values():
+        for field in row:
+            if field not in columns:
+                columns.append(field)
+    payload = {
+        'columns': columns,
+        'keys': list(snapshot),
+        'rows': [[row.get(field, 'NA') for field in columns] for row in snapshot.values()]
+    }
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_snapshot(payload):
+    """Rebuild a snapshot dict from encode_snapshot bytes"""
+    data = json.loads(zlib.decompress(payload).decode('utf-8'))
+    columns = data['columns']
+    return {key: dict(zip(columns, values)) for key, values in zip(data['keys'], data['rows'])}
+
+
+def to_numeric_column(values):
+    """Vectorized conversion of cell text ('1,234.50', 'NA') to floats"""
+    cleaned = values.astype(str).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(cleaned.where(~cleaned.isin(['NA', '-', ''])), errors='coerce')
+
+
+def numeric_cells(raw, columns):
+    """Convert text columns of a frame to a float array in one pass (missing columns are NaN)"""
+    cells = raw.reindex(columns=columns).to_numpy(dtype=object)
+    values = to_numeric_column(pd.Series(cells.ravel()))
+    return values.to_numpy(dtype=float).reshape(cells.shape)
+
+
+def chain_to_frame(snapshot, ce_watch=(), pe_watch=()):
+    """Flatten a full snapshot into a typed frame with one row per strike and side.
+
+    ``ce_watch``/``pe_watch`` are strike lists (any format) flagged as watched.
+    """
+    columns = ['Strike', 'Strike_Value', 'Type'] + list(CHAIN_FIELDS) + ['Spread', 'Watched']
+    if not snapshot:
+        return pd.DataFrame(columns=columns)
+
+    raw = pd.DataFrame.from_dict(snapshot, orient='index')
+    strike_keys = raw.index.to_series().map(normalize_strike)
+    strike_values = to_numeric_column(strike_keys)
+    watch_sets = {
+        'CE': {normalize_strike(strike) for strike in ce_watch},
+        'PE': {normalize_strike(strike) for strike in pe_watch},
+    }
+
+    frames = []
+    for side in SIDES:
+        side_frame = pd.DataFrame({
+            'Strike': raw.index.values,
+            'Strike_Value': strike_values.values,
+            'Type': side,
+        })
+        for field in CHAIN_FIELDS:
+            column = f"{side}_{field}"
+            if column in raw.columns:
+                side_frame[field] = to_numeric_column(raw[column]).values
+            else:
+                side_frame[field] = float('nan')
+        side_frame['Spread'] = side_frame['Ask'] - side_frame['Bid']
+        side_frame['Watched'] = strike_keys.isin(watch_sets[side]).values
+        frames.append(side_frame)
+
+    frame = pd.concat(frames, ignore_index=True)
+    return frame.sort_values(['Strike_Value', 'Type'], kind='stable').reset_index(drop=True)
+
+
+def filter_chain_frame(frame, side='Both', strike_range=None, only_watched=False,
+                       only_quoted=False, sort_by='Strike_Value', ascending=True):
+    """Filter and sort a chain frame with vectorized masks"""
+    mask = None
+
+    def combine(current, condition):
+        return condition if current is None else current & condition
+
+    if side in SIDES:
+        mask = combine(mask, frame['Type'] == side)
+    if strike_range:
+        low, high = strike_range
+        mask = combine(mask, frame['Strike_Value'].between(low, high))
+    if only_watched:
+        mask = combine(mask, frame['Watched'])
+    if only_quoted:
+        mask = combine(mask, frame['Bid'].notna() & frame['Ask'].notna())
+
+    result = frame[mask] if mask is not None else frame
+    if sort_by in result.columns:
+        result = result.sort_values(sort_by, ascending=ascending, kind='stable', na_position='last')
+    return result
+
+
+def paginate(frame, page, page_size):
+    """Return one page of a frame and the total number of pages"""
+    total_pages = max(1, -(-len(frame) // page_size))
+    page = min(max(1, page), total_pages)
+    start = (page - 1) * page_size
+    return frame.iloc[start:start + page_size], page, total_pages
@@ -0,0 +1,426 @@
+"""Local HTTP query API over the stored option chain history.
+
+Serves the snapshot log (and the OHLC bars) to notebooks and other desk
+tools, so they never need the dashboard or a browser of their own::
+
+    python query_api.py --port 8766
+    curl 'http://127.0.0.1:8766/snapshots?expiry=28-Nov-2025&start=2025-11-20T10:00&side=CE&fields=Bid,Ask,OI'
+
+Endpoints:
+
+* ``/health``, ``/expiries``: service status and the stored expiries with
+  their time range,
+* ``/snapshots``: one row per (frame, strike, side), filtered by ``expiry``,
+  ``start``/``end`` (ISO time, IST when no offset is given, or epoch
+  seconds), ``strike_min``/``strike_max``, ``side`` (CE, PE or both),
+  projected to ``fields`` and returned as ``format=json`` (default),
+  ``ndjson`` or ``arrow`` (Arrow IPC stream, needs pyarrow),
+* ``/bars``: OHLC bars of one strike and side at a rollup resolution.
+
+Responses are streamed with chunked transfer encoding while frames are
+decoded, so large ranges never sit in memory as a whole. Responses up to
+``max_cached_bytes`` go into an LRU cache keyed by the query and the log's
+frame count, so new frames invalidate cached answers on their own.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytz
+
+from bar_rollups import RESOLUTIONS, RollupEngine
+from option_snapshot import CHAIN_FIELDS, SIDES, normalize_strike, parse_number
+from snapshot_log import SnapshotLog
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+IST = pytz.timezone('Asia/Kolkata')
+FORMATS = ('json', 'ndjson', 'arrow')
+ARROW_BATCH_ROWS = 5000
+
+
+class QueryError(Exception):
+    """Raised for invalid query parameters, reported as HTTP 400"""
+
+
+def parse_time(text):
+    """Epoch seconds from epoch text or an ISO timestamp (naive times are IST)"""
+    if text is None or text == '':
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        raise QueryError(f"Invalid time: {text}")
+    if moment.tzinfo is None:
+        moment = IST.localize(moment)
+    return moment.timestamp()
+
+
+class ResultCache:
+    """LRU cache of encoded responses bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries=64, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, content_type, body):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key)[1])
+            self.entries[key] = (content_type, body)
+            self.size += len(body)
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+class SnapshotQuery:
+    """Validated /snapshots parameters"""
+
+    def __init__(self, params):
+        def single(name, default=None):
+            return params.get(name, [default])[0]
+
+        self.expiry = single('expiry')
+        if not self.expiry:
+            raise QueryError("expiry is required")
+        self.start = parse_time(single('start'))
+        self.end = parse_time(single('end'))
+        self.strike_min = self._number(single('strike_min'), 'strike_min')
+        self.strike_max = self._number(single('strike_max'), 'strike_max')
+
+        side = (single('side') or 'both').upper()
+        if side not in SIDES + ('BOTH',):
+            raise QueryError(f"side must be CE, PE or both, not {side}")
+        self.sides = SIDES if side == 'BOTH' else (side,)
+
+        fields = single('fields')
+        self.fields = tuple(fields.split(',')) if fields else CHAIN_FIELDS
+        unknown = [field for field in self.fields if field not in CHAIN_FIELDS]
+        if unknown:
+            raise QueryError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(CHAIN_FIELDS)})")
+
+        self.format = single('format', 'json')
+        if self.format not in FORMATS:
+            raise QueryError(f"format must be one of {', '.join(FORMATS)}")
+        self.limit = self._limit(single('limit'))
+
+    @staticmethod
+    def _limit(text):
+        if text is None or text == '':
+            return None
+        try:
+            limit = int(text)
+        except ValueError:
+            raise QueryError("limit must be a positive integer")
+        if limit <= 0:
+            raise QueryError("limit must be a positive integer")
+        return limit
+
+    @staticmethod
+    def _number(text, name):
+        if text is None or text == '':
+            return None
+        value = parse_number(text)
+        if value is None:
+            raise QueryError(f"{name} must be a number")
+        return value
+
+    def key(self):
+        return (self.expiry, self.start, self.end, self.strike_min, self.strike_max,
+                self.sides, self.fields, self.format, self.limit)
+
+
+class QueryService:
+    """Turns queries into row iterators and encoded response chunks"""
+
+    def __init__(self, snapshot_log, rollup_engine=None, cache=None, max_cached_bytes=8 * 1024 * 1024):
+        self.snapshot_log = snapshot_log
+        self.rollup_engine = rollup_engine
+        self.cache = cache or ResultCache()
+        self.max_cached_bytes = max_cached_bytes
+        self.strike_values = {}
+
+    def _strike_value(self, strike):
+        value = self.strike_values.get(strike)
+        if value is None:
+            value = self.strike_values[strike] = parse_number(normalize_strike(strike))
+        return value
+
+    def expiries(self):
+        result = []
+        for expiry in self.snapshot_log.expiries():
+            first, last, frames = self.snapshot_log.time_range(expiry)
+            result.append({'expiry': expiry, 'first': first, 'last': last, 'frames': frames})
+        return result
+
+    def version(self, expiry):
+        """Changes whenever frames are added to an expiry"""
+        return tuple(self.snapshot_log.time_range(expiry))
+
+    def iter_rows(self, query):
+        """Yield row dicts (ts, expiry, strike, strike_value, side, fields...)"""
+        emitted = 0
+        for ts, snapshot in self.snapshot_log.iter_snapshots(query.expiry, query.start, query.end):
+            for strike, data in snapshot.items():
+                strike_value = self._strike_value(strike)
+                if query.strike_min is not None and (strike_value is None or strike_value < query.strike_min):
+                    continue
+                if query.strike_max is not None and (strike_value is None or strike_value > query.strike_max):
+                    continue
+                for side in query.sides:
+                    row = {'ts': ts, 'expiry': query.expiry, 'strike': strike,
+                           'strike_value': strike_value, 'side': side}
+                    for field in query.fields:
+                        row[field] = parse_number(data.get(f"{side}_{field}"))
+                    yield row
+                    emitted += 1
+                    if query.limit is not None and emitted >= query.limit:
+                        return
+
+    def encode(self, query):
+        """Return (content type, iterator of byte chunks) for a snapshots query"""
+        rows = self.iter_rows(query)
+        if query.format == 'ndjson':
+            return 'application/x-ndjson', self._encode_ndjson(rows)
+        if query.format == 'arrow':
+            if pa is None:
+                raise QueryError("format=arrow needs pyarrow, which is not installed")
+            return 'application/vnd.apache.arrow.stream', self._encode_arrow(rows, query)
+        return 'application/json', self._encode_json(rows)
+
+    def _json_batches(self, rows, batch_rows=1000):
+        """Yield lists of JSON-encoded rows"""
+        batch = []
+        for row in rows:
+            batch.append(json.dumps(row, separators=(',', ':')))
+            if len(batch) >= batch_rows:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _encode_ndjson(self, rows):
+        for batch in self._json_batches(rows):
+            yield ('\n'.join(batch) + '\n').encode('utf-8')
+
+    def _encode_json(self, rows):
+        yield b'['
+        separator = ''
+        for batch in self._json_batches(rows):
+            yield (separator + ','.join(batch)).encode('utf-8')
+            separator = ','
+        yield b']'
+
+    def _encode_arrow(self, rows, query):
+        schema = pa.schema(
+            [('ts', pa.timestamp('ms', tz='UTC')), ('expiry', pa.string()), ('strike', pa.string()),
+             ('strike_value', pa.float64()), ('side', pa.string())]
+            + [(field, pa.float64()) for field in query.fields]
+        )
+        sink = io.BytesIO()
+        writer = pa.ipc.new_stream(sink, schema)
+
+        def flush():
+            data = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return data
+
+        columns = {name: [] for name in schema.names}
+        yield flush()
+        for row in rows:
+            for name in schema.names:
+                columns[name].append(int(row['ts'] * 1000) if name == 'ts' else row[name])
+            if len(columns['ts']) >= ARROW_BATCH_ROWS:
+                writer.write_batch(pa.record_batch([columns[name] for name in schema.names], schema=schema))
+                columns = {name: [] for name in schema.names}
+                yield flush()
+        if columns['ts']:
+            writer.write_batch(pa.record_batch([columns[name] for name in schema.names], schema=schema))
+        writer.close()
+        yield flush()
+
+    def bars(self, params):
+        """OHLC bars of one series as a JSON-ready list"""
+        if self.rollup_engine is None:
+            raise QueryError("bars are not available")
+
+        def single(name, default=None):
+            return params.get(name, [default])[0]
+
+        expiry, strike = single('expiry'), single('strike')
+        if not expiry or not strike:
+            raise QueryError("expiry and strike are required")
+        side = (single('side') or 'CE').upper()
+        resolution = single('resolution', '1min')
+        if resolution not in RESOLUTIONS:
+            raise QueryError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+        start, end = parse_time(single('start')), parse_time(single('end'))
+
+        frame = self.rollup_engine.query(expiry, strike, side, resolution, start, end)
+        frame = frame.reset_index()
+        frame['start'] = frame['start'].map(lambda moment: moment.timestamp())
+        records = frame.to_dict(orient='records')
+        for record in records:
+            for key, value in record.items():
+                if isinstance(value, float) and math.isnan(value):
+                    record[key] = None
+        return records
+
+
+def make_handler(service):
+    """Build a request handler class bound to a query service"""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body, content_type='application/json'):
+            data = body if isinstance(body, bytes) else json.dumps(body, separators=(',', ':')).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, content_type, chunks, cache_key):
+            """Send chunks with chunked transfer encoding, caching small responses"""
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('X-Cache', 'MISS')
+            self.end_headers()
+            self.headers_sent = True
+            kept = []
+            size = 0
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                self.wfile.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b"\r\n")
+                if kept is not None:
+                    size += len(chunk)
+                    if size > service.max_cached_bytes:
+                        kept = None
+                    else:
+                        kept.append(chunk)
+            if kept is not None:
+                service.cache.put(cache_key, content_type, b''.join(kept))
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            self.headers_sent = False
+            try:
+                if url.path == '/health':
+                    self._send(200, {'status': 'ok', 'arrow': pa is not None, 'cache': service.cache.stats()})
+                elif url.path == '/expiries':
+                    self._send(200, service.expiries())
+                elif url.path == '/snapshots':
+                    query = SnapshotQuery(params)
+                    cache_key = (query.key(), service.version(query.expiry))
+                    cached = service.cache.get(cache_key)
+                    if cached is not None:
+                        content_type, body = cached
+                        self.send_response(200)
+                        self.send_header('Content-Type', content_type)
+                        self.send_header('Content-Length', str(len(body)))
+                        self.send_header('X-Cache', 'HIT')
+                        self.end_headers()
+                        self.wfile.write(body)
+                        return
+                    content_type, chunks = service.encode(query)
+                    self._stream(content_type, chunks, cache_key)
+                elif url.path == '/bars':
+                    self._send(200, service.bars(params))
+                else:
+                    self._send(404, {'error': f"Unknown path {url.path}"})
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            except Exception as e:
+                if self.headers_sent:
+                    # Mid-stream: leave the chunked body unterminated and drop the connection so
+                    # the client sees a failed transfer rather than a short but valid response
+                    self.close_connection = True
+                    return
+                status = 400 if isinstance(e, QueryError) else 500
+                error = str(e) if isinstance(e, QueryError) else f"{type(e).__name__}: {e}"
+                try:
+                    self._send(status, {'error': error})
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def serve_in_thread(service, host='127.0.0.1', port=0):
+    """Start the query API in a daemon thread, returns (server, base url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="query-api", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    default_dir = os.environ.get("SILVER_DATA_DIR", os.path.join(os.path.expanduser("~"), ".silver_automation"))
+    parser = argparse.ArgumentParser(description="Local HTTP query API over the stored option chain history")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--data-dir', default=default_dir)
+    parser.add_argument('--cache-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    service = QueryService(
+        SnapshotLog(os.path.join(args.data_dir, "snapshots.sqlite")),
+        RollupEngine(os.path.join(args.data_dir, "bars.sqlite")),
+        cache=ResultCache(max_bytes=args.cache_mb * 1024 * 1024)
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"Serving option chain history from {args.data_dir} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Token-bucket politeness limiter for traffic to nseindia.com.
+
+Every page flow (option chain fetch or expiry lookup) takes one token. The
+bucket refills at a fixed rate up to a burst size; callers that find it empty
+wait in a priority queue (manual refresh before scheduled refresh before
+expiry lookups) and give up after their timeout so the caller can serve
+cached data instead. With a lock file the bucket state lives in a small file
+guarded by ``fcntl.flock``, so several server processes share one budget.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+PRIORITY_MANUAL = 0
+PRIORITY_SCHEDULED = 1
+PRIORITY_EXPIRY = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_MANUAL: 'manual',
+    PRIORITY_SCHEDULED: 'scheduled',
+    PRIORITY_EXPIRY: 'expiry',
+}
+
+
+class TokenBucket:
+    """In-process token bucket"""
+
+    def __init__(self, rate_per_minute=6, burst=3):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def _refill(self, tokens, updated, now):
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def try_take(self):
+        """Take a token if one is available, returns 0 or the seconds until the next token"""
+        with self.lock:
+            now = time.time()
+            self.tokens = self._refill(self.tokens, self.updated, now)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def available(self):
+        with self.lock:
+            return self._refill(self.tokens, self.updated, time.time())
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state is shared between processes through a locked file"""
+
+    def __init__(self, file_path, rate_per_minute=6, burst=3):
+        super().__init__(rate_per_minute, burst)
+        self.file_path = file_path
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _update(self, take):
+        with self.lock, open(self.file_path, 'a+') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                try:
+                    state = json.loads(file.read() or '{}')
+                except ValueError:
+                    state = {}
+                now = time.time()
+                tokens = self._refill(state.get('tokens', self.burst), state.get('updated', now), now)
+                wait = 0.0
+                if take:
+                    if tokens >= 1:
+                        tokens -= 1
+                    else:
+                        wait = (1 - tokens) / self.rate
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps({'tokens': tokens, 'updated': now}))
+                file.flush()
+                return tokens, wait
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def try_take(self):
+        return self._update(take=True)[1]
+
+    def available(self):
+        return self._update(take=False)[0]
+
+
+class PolitenessLimiter:
+    """Priority queue in front of a token bucket"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.condition = threading.Condition()
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.stats = {name: {'granted': 0, 'denied': 0, 'waited_s': 0.0} for name in PRIORITY_NAMES.values()}
+
+    def acquire(self, priority=PRIORITY_SCHEDULED, timeout=0.0):
+        """Take a token, waiting up to timeout seconds behind higher-priority callers.
+
+        Returns False when no token became available in time.
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        entry = (priority, next(self.sequence))
+        stats = self.stats[PRIORITY_NAMES[priority]]
+
+        with self.condition:
+            heapq.heappush(self.waiters, entry)
+            try:
+                while True:
+                    wait = None
+                    if self.waiters[0] == entry:
+                        wait = self.bucket.try_take()
+                        if wait == 0:
+                            stats['granted'] += 1
+                            stats['waited_s'] += time.monotonic() - started
+                            return True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        stats['denied'] += 1
+                        return False
+                    # Other processes may take tokens too, so re-check at least every second
+                    self.condition.wait(min(remaining, wait if wait is not None else remaining, 1.0))
+            finally:
+                self.waiters.remove(entry)
+                heapq.heapify(self.waiters)
+                self.condition.notify_all()
+
+    def status(self):
+        """Return the current budget and per-priority counters for display"""
+        with self.condition:
+            queued = len(self.waiters)
+        return {'available': self.bucket.available(), 'burst': self.bucket.burst,
+                'per_minute': self.bucket.rate * 60, 'queued': queued, 'stats': self.stats}
+
+
+def build_limiter(rate_per_minute=6, burst=3, lock_file=None):
+    """Limiter shared by this process, or by all processes using lock_file"""
+    if lock_file and fcntl is not None:
+        return PolitenessLimiter(FileTokenBucket(lock_file, rate_per_minute, burst))
+    return PolitenessLimiter(TokenBucket(rate_per_minute, burst))
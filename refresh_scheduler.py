@@ -0,0 +1,167 @@
+"""Market-hours-aware adaptive refresh scheduling.
+
+TradingCalendar knows the IST commodity trading session and exchange
+holidays. MCX/NSE commodity derivatives trade from 09:00 IST on weekdays
+until 23:55 IST while the US is on standard time (roughly November to
+March) and until 23:30 IST while the US observes daylight saving time, so
+the default close is derived per date from America/New_York. RefreshScheduler keeps one
+adaptive schedule per expiry: the interval shrinks while snapshots keep
+changing and grows while they are quiet, always within configured bounds,
+and no refresh is scheduled while the market is closed.
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+
+import pytz
+
+IST = pytz.timezone('Asia/Kolkata')
+US_EASTERN = pytz.timezone('America/New_York')
+
+US_STANDARD_TIME_CLOSE = time(23, 55)
+US_DAYLIGHT_TIME_CLOSE = time(23, 30)
+
+
+def default_close_time(day):
+    """MCX close for a date: 23:30 IST while New York observes DST, else 23:55 IST"""
+    if US_EASTERN.localize(datetime.combine(day, time(12, 0))).dst():
+        return US_DAYLIGHT_TIME_CLOSE
+    return US_STANDARD_TIME_CLOSE
+
+
+def load_holidays(file_path):
+    """Read holiday dates (YYYY-MM-DD, one per line, # comments) from a file"""
+    holidays = set()
+    if not file_path or not os.path.exists(file_path):
+        return holidays
+    with open(file_path, 'r') as file:
+        for line in file:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                holidays.add(date.fromisoformat(line))
+    return holidays
+
+
+class TradingCalendar:
+    """IST trading session and holiday calendar; close_time=None follows the US DST schedule"""
+
+    def __init__(self, open_time=time(9, 0), close_time=None, holidays=None, weekend_days=(5, 6)):
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = set(holidays or [])
+        self.weekend_days = set(weekend_days)
+
+    def is_trading_day(self, day):
+        return day.weekday() not in self.weekend_days and day not in self.holidays
+
+    def session_bounds(self, day):
+        """Return (open, close) as aware IST datetimes for a day"""
+        return (
+            IST.localize(datetime.combine(day, self.open_time)),
+            IST.localize(datetime.combine(day, self.close_time_for(day)))
+        )
+
+    def close_time_for(self, day):
+        return self.close_time or default_close_time(day)
+
+    def is_open(self, now):
+        now_ist = now.astimezone(IST)
+        if not self.is_trading_day(now_ist.date()):
+            return False
+        session_open, session_close = self.session_bounds(now_ist.date())
+        return session_open <= now_ist < session_close
+
+    def next_open(self, now):
+        """Return the next session open at or after now (now itself if the market is open)"""
+        if self.is_open(now):
+            return now
+        day = now.astimezone(IST).date()
+        for _ in range(30):
+            if self.is_trading_day(day):
+                session_open, _ = self.session_bounds(day)
+                if session_open >= now:
+                    return session_open
+            day += timedelta(days=1)
+        return None
+
+    def session_close(self, now):
+        """Return today's close if the market is open, else None"""
+        if not self.is_open(now):
+            return None
+        return self.session_bounds(now.astimezone(IST).date())[1]
+
+
+class AdaptiveSchedule:
+    """Refresh interval for one expiry that follows how much the data moves"""
+
+    def __init__(self, base_interval=300, min_interval=30, max_interval=900,
+                 busy_ratio=0.05, quiet_ratio=0.005, speed_up=0.5, slow_down=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(base_interval, min_interval), max_interval)
+        self.busy_ratio = busy_ratio
+        self.quiet_ratio = quiet_ratio
+        self.speed_up = speed_up
+        self.slow_down = slow_down
+        self.last_change_ratio = None
+
+    def update(self, change_ratio):
+        """Adjust the interval from the fraction of strikes that changed, returns it"""
+        self.last_change_ratio = change_ratio
+        if change_ratio >= self.busy_ratio:
+            self.interval = max(self.min_interval, self.interval * self.speed_up)
+        elif change_ratio <= self.quiet_ratio:
+            self.interval = min(self.max_interval, self.interval * self.slow_down)
+        return self.interval
+
+    def set_bounds(self, min_interval, max_interval):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min(max(self.interval, self.min_interval), self.max_interval)
+
+
+class RefreshScheduler:
+    """Per-expiry adaptive schedules gated by the trading calendar"""
+
+    def __init__(self, calendar=None, base_interval=300, min_interval=30, max_interval=900, adaptive=True):
+        self.calendar = calendar or TradingCalendar()
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.adaptive = adaptive
+        self.schedules = {}
+
+    def configure(self, min_interval, max_interval, adaptive):
+        """Update bounds and mode for every schedule"""
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.adaptive = adaptive
+        for schedule in self.schedules.values():
+            schedule.set_bounds(self.min_interval, self.max_interval)
+
+    def schedule_for(self, key):
+        if key not in self.schedules:
+            self.schedules[key] = AdaptiveSchedule(self.base_interval, self.min_interval, self.max_interval)
+        return self.schedules[key]
+
+    def interval(self, key):
+        """Current refresh interval in seconds for a key"""
+        if not self.adaptive:
+            return self.base_interval
+        return self.schedule_for(key).interval
+
+    def market_open(self, now):
+        return self.calendar.is_open(now)
+
+    def record_fetch(self, key, now, change_ratio=None):
+        """Record a completed fetch and return when the next one is due"""
+        if self.adaptive and change_ratio is not None:
+            self.schedule_for(key).update(change_ratio)
+        return self.next_due(key, now)
+
+    def next_due(self, key, last_fetch_time):
+        """Next refresh time after a fetch, moved to the next session open if the market is closed"""
+        due = last_fetch_time + timedelta(seconds=self.interval(key))
+        if self.calendar.is_open(due):
+            return due
+        return self.calendar.next_open(due)
@@ -0,0 +1,164 @@
+"""Sampling profiler for Streamlit reruns.
+
+A background thread samples the stack of the script thread every few
+milliseconds with ``sys._current_frames``, so the profiled code runs at full
+speed and Selenium waits, pandas and Plotly all show up by function. Samples
+are aggregated as stack counts and can be exported as collapsed stacks (for
+flamegraph.pl, inferno or speedscope) or as a speedscope JSON profile.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+DEFAULT_INTERVAL = 0.005
+MAX_DEPTH = 128
+
+
+class Profile:
+    """Aggregated samples of one profiled run"""
+
+    def __init__(self, label, started_at, duration, interval, frames, stacks):
+        self.label = label
+        self.started_at = started_at
+        self.duration = duration
+        self.interval = interval
+        # frames: list of (function, file, line); stacks: Counter of frame index tuples, root first
+        self.frames = frames
+        self.stacks = stacks
+
+    @property
+    def sample_count(self):
+        return sum(self.stacks.values())
+
+    def frame_name(self, index):
+        function, file_path, line = self.frames[index]
+        return f"{function} ({os.path.basename(file_path)}:{line})"
+
+    def top_functions(self, n=20, sort_by='self'):
+        """Hottest functions as dicts with self/total time in ms and as a share of samples"""
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for index in set(stack):
+                total_counts[index] += count
+
+        samples = max(1, self.sample_count)
+        key = self_counts if sort_by == 'self' else total_counts
+        rows = []
+        for index in sorted(total_counts, key=lambda i: (key[i], total_counts[i]), reverse=True)[:n]:
+            function, file_path, line = self.frames[index]
+            rows.append({
+                'function': function,
+                'location': f"{file_path}:{line}",
+                'self_ms': self_counts[index] * self.interval * 1000,
+                'total_ms': total_counts[index] * self.interval * 1000,
+                'self_pct': 100.0 * self_counts[index] / samples,
+                'total_pct': 100.0 * total_counts[index] / samples,
+            })
+        return rows
+
+    def to_collapsed(self):
+        """Collapsed stack text: one 'root;...;leaf count' line per distinct stack"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = ';'.join(self.frame_name(index).replace(';', ':') for index in stack)
+            lines.append(f"{names} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def to_speedscope(self):
+        """Speedscope sampled-profile JSON"""
+        stacks = list(self.stacks.items())
+        interval_ms = self.interval * 1000
+        document = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': self.label,
+            'exporter': 'rerun_profiler',
+            'shared': {'frames': [{'name': function, 'file': file_path, 'line': line}
+                                  for function, file_path, line in self.frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': self.label,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': self.duration * 1000,
+                'samples': [list(stack) for stack, _ in stacks],
+                'weights': [count * interval_ms for _, count in stacks],
+            }],
+        }
+        return json.dumps(document, separators=(',', ':'))
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread from a background thread"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_depth=MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.frame_index = {}
+        self.frames = []
+        self.stacks = Counter()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started_at = None
+        self.started = None
+
+    def start(self, thread_id=None):
+        """Start sampling thread_id (default: the calling thread)"""
+        self.target = thread_id or threading.get_ident()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._sample_loop, name="rerun-profiler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, label='rerun'):
+        """Stop sampling and return the Profile"""
+        duration = time.perf_counter() - self.started
+        self.stop_event.set()
+        self.thread.join()
+        return Profile(label, self.started_at, duration, self.interval, self.frames, self.stacks)
+
+    def _sample_loop(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._intern(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+
+    def _intern(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+
+class ProfileBuffer:
+    """The last N profiles"""
+
+    def __init__(self, max_profiles=20):
+        self.profiles = deque(maxlen=max_profiles)
+        self.lock = threading.Lock()
+
+    def add(self, profile):
+        with self.lock:
+            self.profiles.append(profile)
+
+    def list(self):
+        with self.lock:
+            return list(self.profiles)
+
+    def clear(self):
+        with self.lock:
+            self.profiles.clear()
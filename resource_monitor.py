@@ -0,0 +1,299 @@
+"""RSS/CPU sampling for browser process trees.
+
+Uses psutil when it is installed and falls back to reading /proc on Linux.
+A ResourceSampler wraps one fetch and reports what it cost: wall time, CPU
+seconds and peak resident memory of the whole process tree (chromedriver,
+Chrome and its renderers). find_orphaned_browsers and terminate_tree let a
+long-running server clean up browsers whose owner is gone.
+"""
+
+import os
+import signal
+import statistics
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+BROWSER_PROCESS_NAMES = ('chrome', 'chromedriver', 'chromium', 'headless_shell')
+
+# Tags on every browser this application launches, the only ones the orphan reaper may kill:
+# Chrome runs with a --user-data-dir made by mkdtemp(prefix=BROWSER_DATA_DIR_PREFIX) and
+# chromedriver (and the Chrome it starts) inherits BROWSER_TAG_ENV
+BROWSER_DATA_DIR_PREFIX = "oc-chrome-"
+BROWSER_TAG_ENV = "OC_BROWSER_TAG"
+
+
+def _read_proc_stat(pid):
+    """Return (ppid, cpu_seconds) from /proc/<pid>/stat"""
+    with open(f"/proc/{pid}/stat", 'r') as file:
+        stat = file.read()
+    # The command name can contain spaces, so split after its closing parenthesis
+    fields = stat[stat.rindex(')') + 2:].split()
+    ppid = int(fields[1])
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return ppid, cpu_seconds
+
+
+def _read_proc_rss(pid):
+    """Return resident memory of a process in bytes from /proc/<pid>/statm"""
+    with open(f"/proc/{pid}/statm", 'r') as file:
+        return int(file.read().split()[1]) * PAGE_SIZE
+
+
+def process_tree(root_pids):
+    """Return the pids of the given processes and all their descendants"""
+    root_pids = [pid for pid in root_pids if pid]
+    if psutil is not None:
+        pids = set()
+        for pid in root_pids:
+            try:
+                process = psutil.Process(pid)
+                pids.add(pid)
+                pids.update(child.pid for child in process.children(recursive=True))
+            except psutil.Error:
+                continue
+        return sorted(pids)
+
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            ppid, _ = _read_proc_stat(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids = []
+    stack = list(root_pids)
+    while stack:
+        pid = stack.pop()
+        if pid in pids or not os.path.exists(f"/proc/{pid}"):
+            continue
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return sorted(pids)
+
+
+def tree_usage(root_pids):
+    """Return (rss_bytes, cpu_seconds, process_count) summed over a process tree"""
+    rss_total = 0
+    cpu_total = 0.0
+    count = 0
+    for pid in process_tree(root_pids):
+        try:
+            if psutil is not None:
+                process = psutil.Process(pid)
+                rss = process.memory_info().rss
+                times = process.cpu_times()
+                cpu = times.user + times.system
+            else:
+                rss = _read_proc_rss(pid)
+                _, cpu = _read_proc_stat(pid)
+        except Exception:
+            continue
+        rss_total += rss
+        cpu_total += cpu
+        count += 1
+    return rss_total, cpu_total, count
+
+
+def list_pids():
+    if psutil is not None:
+        return psutil.pids()
+    try:
+        return [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return []
+
+
+def process_info(pid):
+    """Return {'name', 'ppid', 'uid', 'cmdline'} of a process, None when it is gone or unreadable"""
+    try:
+        if psutil is not None:
+            process = psutil.Process(pid)
+            return {'name': process.name(), 'ppid': process.ppid(), 'uid': process.uids().real,
+                    'cmdline': process.cmdline()}
+        with open(f"/proc/{pid}/comm", 'r') as file:
+            name = file.read().strip()
+        with open(f"/proc/{pid}/cmdline", 'rb') as file:
+            cmdline = [arg for arg in file.read().decode('utf-8', 'replace').split('\0') if arg]
+        ppid, _ = _read_proc_stat(pid)
+        return {'name': name, 'ppid': ppid, 'uid': os.stat(f"/proc/{pid}").st_uid, 'cmdline': cmdline}
+    except Exception:
+        return None
+
+
+def is_browser_process(name):
+    return name.lower().startswith(BROWSER_PROCESS_NAMES)
+
+
+def browser_tag_env():
+    """Environment for launching a tagged chromedriver"""
+    return dict(os.environ, **{BROWSER_TAG_ENV: str(os.getpid())})
+
+
+def _process_environ(pid):
+    try:
+        if psutil is not None:
+            return psutil.Process(pid).environ()
+        with open(f"/proc/{pid}/environ", 'rb') as file:
+            entries = file.read().decode('utf-8', 'replace').split('\0')
+        return dict(entry.split('=', 1) for entry in entries if '=' in entry)
+    except Exception:
+        return {}
+
+
+def is_tagged_browser(pid, info):
+    """True for browsers launched by this application (see BROWSER_DATA_DIR_PREFIX and BROWSER_TAG_ENV)"""
+    for arg in info['cmdline']:
+        if arg.startswith('--user-data-dir=') and os.path.basename(arg.split('=', 1)[1].rstrip('/')).startswith(BROWSER_DATA_DIR_PREFIX):
+            return True
+    return BROWSER_TAG_ENV in _process_environ(pid)
+
+
+def find_orphaned_browsers(known_pids, parent_pid=None):
+    """Root pids of browser process trees that no running scraper owns.
+
+    Only browsers carrying this application's tag are considered. Two cases
+    count as orphaned: ones started directly by this process (parent_pid)
+    that are not part of any known tree, and ones of this user that were
+    re-parented to init because the process that started them died.
+    Browsers of other tools on the host are never tagged and left alone.
+    """
+    parent_pid = parent_pid or os.getpid()
+    known = set(process_tree(known_pids))
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    orphans = []
+    for pid in list_pids():
+        if pid in known:
+            continue
+        info = process_info(pid)
+        if info is None or not is_browser_process(info['name']):
+            continue
+        orphaned = info['ppid'] == parent_pid or (info['ppid'] == 1 and info['uid'] == uid)
+        if orphaned and is_tagged_browser(pid, info):
+            orphans.append(pid)
+    return sorted(orphans)
+
+
+def terminate_tree(root_pids, timeout=5.0):
+    """SIGTERM process trees, SIGKILL what is left after timeout; returns the number of processes signalled"""
+    pids = process_tree(root_pids)
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            continue
+
+    deadline = time.monotonic() + timeout
+    alive = list(pids)
+    while alive and time.monotonic() < deadline:
+        time.sleep(0.1)
+        alive = [pid for pid in alive if _reap_or_alive(pid)]
+    for pid in alive:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            continue
+        _reap_or_alive(pid)
+    return len(pids)
+
+
+def _reap_or_alive(pid):
+    """Collect the exit status of our own children; True while the process still exists"""
+    try:
+        if os.waitpid(pid, os.WNOHANG)[0] == pid:
+            return False
+    except ChildProcessError:
+        pass
+    except OSError:
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+class ResourceSampler:
+    """Samples a process tree in a background thread while a block of work runs"""
+
+    def __init__(self, root_pids_fn, interval=0.25):
+        self.root_pids_fn = root_pids_fn
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+        self.peak_rss = 0
+        self.peak_processes = 0
+        self.start_cpu = 0.0
+        self.start_time = None
+        self.result = None
+
+    def _sample(self):
+        rss, cpu, count = tree_usage(self.root_pids_fn())
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_processes = max(self.peak_processes, count)
+        return rss, cpu, count
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        _, self.start_cpu, _ = self._sample()
+        self.thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stopped.set()
+        self.thread.join()
+        rss, cpu, count = self._sample()
+        self.result = {
+            'wall_seconds': time.perf_counter() - self.start_time,
+            # Processes that exit during the block drop out of the total, so clamp at zero
+            'cpu_seconds': max(0.0, cpu - self.start_cpu),
+            'peak_rss_mb': self.peak_rss / (1024 * 1024),
+            'end_rss_mb': rss / (1024 * 1024),
+            'processes': max(count, self.peak_processes)
+        }
+        return False
+
+
+class FetchCostLog:
+    """Bounded log of per-fetch resource costs, summarized per browser profile"""
+
+    def __init__(self, max_records=200):
+        self.records = deque(maxlen=max_records)
+
+    def add(self, cost):
+        if cost:
+            self.records.append(dict(cost))
+
+    def summary(self):
+        """Return per-profile medians of wall time, CPU and peak RSS"""
+        by_profile = {}
+        for record in self.records:
+            by_profile.setdefault(record.get('profile', 'standard'), []).append(record)
+
+        rows = []
+        for profile, records in by_profile.items():
+            rows.append({
+                'profile': profile,
+                'fetches': len(records),
+                'median_wall_s': statistics.median(r['wall_seconds'] for r in records),
+                'median_cpu_s': statistics.median(r['cpu_seconds'] for r in records),
+                'median_peak_rss_mb': statistics.median(r['peak_rss_mb'] for r in records),
+                'max_peak_rss_mb': max(r['peak_rss_mb'] for r in records)
+            })
+        return rows
@@ -0,0 +1,230 @@
+"""Pool of scrape worker processes fed by a queue-based job dispatcher.
+
+Each worker process owns its own Chrome (through NSEScraper) and serves
+``(commodity, expiry)`` jobs sent by the dispatcher. Snapshots travel back as
+compact encoded bytes. A worker that exceeds the job timeout is killed and
+replaced, so a hung browser only fails its own job.
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from nse_scraper import NSEScraper
+from option_snapshot import decode_snapshot, encode_snapshot
+
+
+def _worker_main(worker_id, job_queue, result_queue, scraper_options):
+    """Worker process loop: run jobs with a private browser until told to stop"""
+    scraper = NSEScraper(**scraper_options)
+    try:
+        while True:
+            job = job_queue.get()
+            if job is None:
+                break
+
+            result_queue.put(('started', worker_id, job['job_id'], None))
+            try:
+                if job['kind'] == 'expiries':
+                    payload = scraper.fetch_expiry_dates(job['commodity'])
+                else:
+                    expiry, data = scraper.fetch_snapshot(job['expiry'], job['commodity'])
+                    payload = {
+                        'expiry': expiry,
+                        'snapshot': encode_snapshot(data),
+                        'cost': dict(scraper.last_fetch_cost or {}, worker_id=worker_id),
+                        'schema_events': scraper.schema.drain_events()
+                    }
+                result_queue.put(('done', worker_id, job['job_id'], payload))
+            except Exception as e:
+                # Start from a fresh browser after any failure
+                scraper.close()
+                result_queue.put(('error', worker_id, job['job_id'], str(e)))
+    finally:
+        scraper.close()
+
+
+class ScrapeDispatcher:
+    """Dispatches fetch jobs to a pool of worker processes"""
+
+    def __init__(self, pool_size=2, job_timeout=120, scraper_options=None):
+        self.pool_size = max(1, int(pool_size))
+        self.job_timeout = job_timeout
+        # Every worker runs its own Chrome, so let each pick a free debugging port
+        self.scraper_options = dict(scraper_options or {})
+        self.scraper_options.setdefault('remote_debugging_port', 0)
+
+        self.context = multiprocessing.get_context('spawn')
+        self.result_queue = self.context.Queue()
+        self.workers = {}
+        self.pending = []
+        self.futures = {}
+        self.job_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.stats = {'completed': 0, 'failed': 0, 'timed_out': 0, 'restarts': 0}
+        self.schema_events = []
+
+    def start(self):
+        """Start the worker processes and the dispatcher thread"""
+        with self.lock:
+            for worker_id in range(self.pool_size):
+                self._spawn_worker(worker_id)
+        self.thread = threading.Thread(target=self._run, name="scrape-dispatcher", daemon=True)
+        self.thread.start()
+
+    def _spawn_worker(self, worker_id):
+        """Start (or replace) the worker process with the given id"""
+        job_queue = self.context.Queue()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker_id, job_queue, self.result_queue, self.scraper_options),
+            name=f"scrape-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self.workers[worker_id] = {
+            'process': process,
+            'queue': job_queue,
+            'job_id': None,
+            'assigned_at': None,
+            'jobs_done': 0
+        }
+
+    def _kill_worker(self, worker_id):
+        """Terminate a worker process and start a replacement"""
+        process = self.workers[worker_id]['process']
+        process.terminate()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout=5)
+        self.stats['restarts'] += 1
+        self._spawn_worker(worker_id)
+
+    def submit(self, kind, commodity, expiry=None):
+        """Queue a job, returns a Future for its result"""
+        future = Future()
+        job = {'job_id': next(self.job_ids), 'kind': kind, 'commodity': commodity, 'expiry': expiry}
+        with self.lock:
+            self.futures[job['job_id']] = future
+            self.pending.append(job)
+            self._assign_pending()
+        return future
+
+    def fetch_snapshot(self, commodity, expiry=None, timeout=None):
+        """Fetch one (commodity, expiry) snapshot, returns (expiry, snapshot, resource cost)"""
+        payload = self.submit('snapshot', commodity, expiry).result(timeout=timeout or self.job_timeout + 10)
+        with self.lock:
+            self.schema_events.extend(payload.get('schema_events') or [])
+        return payload['expiry'], decode_snapshot(payload['snapshot']), payload.get('cost')
+
+    def drain_schema_events(self):
+        """Return and clear the table schema events reported by the workers"""
+        with self.lock:
+            events, self.schema_events = self.schema_events, []
+            return events
+
+    def fetch_expiry_dates(self, commodity, timeout=None):
+        """Fetch the expiry dates for a commodity"""
+        return self.submit('expiries', commodity).result(timeout=timeout or self.job_timeout + 10)
+
+    def _assign_pending(self):
+        """Hand pending jobs to idle workers (called with the lock held)"""
+        for worker in self.workers.values():
+            if not self.pending:
+                return
+            if worker['job_id'] is None and worker['process'].is_alive():
+                job = self.pending.pop(0)
+                worker['job_id'] = job['job_id']
+                worker['assigned_at'] = time.monotonic()
+                worker['queue'].put(job)
+
+    def _run(self):
+        """Collect results, enforce job timeouts and keep the pool full"""
+        while not self.stopped.is_set():
+            try:
+                message = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                break
+
+            with self.lock:
+                if message:
+                    self._handle_message(*message)
+                self._check_workers()
+                self._assign_pending()
+
+    def _handle_message(self, status, worker_id, job_id, payload):
+        """Resolve the future of a finished job"""
+        worker = self.workers.get(worker_id)
+        if status == 'started' or worker is None or worker['job_id'] != job_id:
+            return
+
+        worker['job_id'] = None
+        worker['assigned_at'] = None
+        future = self.futures.pop(job_id, None)
+        if future is None:
+            return
+
+        if status == 'done':
+            worker['jobs_done'] += 1
+            self.stats['completed'] += 1
+            future.set_result(payload)
+        else:
+            self.stats['failed'] += 1
+            future.set_exception(RuntimeError(payload))
+
+    def _check_workers(self):
+        """Replace workers that died or exceeded the job timeout"""
+        now = time.monotonic()
+        for worker_id, worker in list(self.workers.items()):
+            job_id = worker['job_id']
+            hung = job_id is not None and now - worker['assigned_at'] > self.job_timeout
+            dead = not worker['process'].is_alive()
+            if not (hung or dead):
+                continue
+
+            future = self.futures.pop(job_id, None) if job_id is not None else None
+            if future is not None:
+                if hung:
+                    self.stats['timed_out'] += 1
+                    future.set_exception(TimeoutError(f"Scrape job timed out after {self.job_timeout}s"))
+                else:
+                    self.stats['failed'] += 1
+                    future.set_exception(RuntimeError("Scrape worker exited unexpectedly"))
+            self._kill_worker(worker_id)
+
+    def status(self):
+        """Return a summary of the pool for display"""
+        with self.lock:
+            return {
+                'pool_size': self.pool_size,
+                'alive': sum(1 for worker in self.workers.values() if worker['process'].is_alive()),
+                'busy': sum(1 for worker in self.workers.values() if worker['job_id'] is not None),
+                'queued': len(self.pending),
+                **self.stats
+            }
+
+    def shutdown(self):
+        """Stop the dispatcher and all worker processes"""
+        self.stopped.set()
+        with self.lock:
+            for worker in self.workers.values():
+                try:
+                    worker['queue'].put(None)
+                except Exception:
+                    pass
+            for worker in self.workers.values():
+                worker['process'].join(timeout=10)
+                if worker['process'].is_alive():
+                    worker['process'].terminate()
+            for future in self.futures.values():
+                future.set_exception(RuntimeError("Scrape dispatcher shut down"))
+            self.futures.clear()
+            self.pending.clear()
@@ -0,0 +1,233 @@
+"""Lifecycle tracking for Streamlit sessions and the resources they hold.
+
+Every rerun touches its session in a process-wide SessionRegistry. A sweeper
+thread then, once per ``sweep_interval``:
+
+* evicts sessions that have not rerun for ``idle_timeout`` seconds, or whose
+  tab has been gone (unknown to the Streamlit runtime) for
+  ``disconnect_grace`` seconds: ``release`` quits their browser and drops
+  their large session values,
+* measures the bytes each live session holds and calls ``trim`` on sessions
+  above ``max_session_bytes``,
+* reaps orphaned chromedriver/Chrome trees. A tree is only terminated when
+  it was orphaned in two consecutive sweeps, so a browser that is still
+  starting up is never mistaken for one.
+
+The callbacks receive the session's state object and run on the sweeper
+thread; they must only assign keys, never delete them, because the session
+may rerun at any moment.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from resource_monitor import find_orphaned_browsers, process_tree, terminate_tree, tree_usage
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTAINER_TYPES = (dict, list, tuple, set, frozenset, deque)
+
+
+def _is_app_object(value):
+    """True for instances of classes defined in this application's modules"""
+    module = sys.modules.get(type(value).__module__)
+    module_file = getattr(module, '__file__', None)
+    return bool(module_file) and os.path.dirname(os.path.abspath(module_file)) == APP_DIR
+
+
+def estimate_bytes(value, max_objects=500000):
+    """Approximate memory held by a value.
+
+    Follows containers, numpy arrays, pandas objects and the attributes of
+    this application's own classes; third-party objects (browsers, locks,
+    connections) only count their own size.
+    """
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack and len(seen) < max_objects:
+        item = stack.pop()
+        if item is None or id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            total += item.nbytes
+        elif isinstance(item, (pd.DataFrame, pd.Series, pd.Index)):
+            usage = item.memory_usage(deep=True)
+            total += int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+        elif isinstance(item, dict):
+            total += sys.getsizeof(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, CONTAINER_TYPES):
+            total += sys.getsizeof(item)
+            stack.extend(item)
+        elif _is_app_object(item) and hasattr(item, '__dict__'):
+            total += sys.getsizeof(item)
+            stack.append(vars(item))
+        else:
+            total += sys.getsizeof(item)
+    return total
+
+
+class SessionRegistry:
+    """Process-wide record of live sessions with idle eviction, memory caps and browser reaping"""
+
+    def __init__(self, release, trim=None, browser_pids=None, is_connected=None, known_browser_pids=None,
+                 idle_timeout=1800, disconnect_grace=120, max_session_bytes=None,
+                 sweep_interval=60, reap_orphans=True):
+        self.release = release
+        self.trim = trim
+        self.browser_pids = browser_pids or (lambda state: [])
+        self.is_connected = is_connected or (lambda session_id: True)
+        self.known_browser_pids = known_browser_pids or (lambda: [])
+        self.idle_timeout = idle_timeout
+        self.disconnect_grace = disconnect_grace
+        self.max_session_bytes = max_session_bytes
+        self.sweep_interval = sweep_interval
+        self.reap_orphans = reap_orphans
+
+        # session id -> {'state', 'first_seen', 'last_seen', 'disconnected_at', 'bytes', 'browsers'}
+        self.sessions = {}
+        self.orphan_candidates = set()
+        self.counters = {'evicted_idle': 0, 'evicted_closed': 0, 'trimmed': 0,
+                         'orphans_reaped': 0, 'processes_reaped': 0, 'sweeps': 0}
+        self.last_sweep = None
+        self.usage = {'bytes': 0, 'browsers': 0, 'browser_processes': 0, 'browser_rss': 0, 'sweep_ms': 0.0}
+        self.stopped = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def touch(self, session_id, state):
+        """Mark a session as active now (called on every rerun)"""
+        now = time.time()
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                entry = self.sessions[session_id] = {'first_seen': now, 'bytes': 0, 'browsers': 0}
+            entry['state'] = state
+            entry['last_seen'] = now
+            entry['disconnected_at'] = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception:
+                # A failed sweep is retried on the next interval
+                pass
+
+    def _expired(self, session_id, entry, now):
+        """Eviction reason for a session, None while it should be kept"""
+        if now - entry['last_seen'] > self.idle_timeout:
+            return 'idle'
+        if self.is_connected(session_id):
+            entry['disconnected_at'] = None
+            return None
+        if entry['disconnected_at'] is None:
+            entry['disconnected_at'] = now
+        if now - entry['disconnected_at'] > self.disconnect_grace:
+            return 'closed'
+        return None
+
+    def sweep(self, now=None):
+        """Evict expired sessions, enforce the memory cap and reap orphans; returns the evicted session ids"""
+        started = time.perf_counter()
+        now = now or time.time()
+        with self.lock:
+            expired = []
+            for session_id, entry in list(self.sessions.items()):
+                reason = self._expired(session_id, entry, now)
+                if reason:
+                    expired.append((session_id, entry['state'], reason))
+                    del self.sessions[session_id]
+            live = list(self.sessions.values())
+
+        for session_id, state, reason in expired:
+            try:
+                self.release(state, reason)
+            except Exception:
+                pass
+            with self.lock:
+                self.counters['evicted_idle' if reason == 'idle' else 'evicted_closed'] += 1
+
+        total_bytes = 0
+        browser_roots = []
+        for entry in live:
+            state = entry['state']
+            entry['bytes'] = self._measure(state, entry['bytes'])
+            if self.trim is not None and self.max_session_bytes and entry['bytes'] > self.max_session_bytes:
+                try:
+                    self.trim(state)
+                    entry['bytes'] = self._measure(state, entry['bytes'])
+                except Exception:
+                    pass
+                with self.lock:
+                    self.counters['trimmed'] += 1
+            try:
+                pids = list(self.browser_pids(state))
+            except Exception:
+                pids = []
+            entry['browsers'] = len(pids)
+            browser_roots.extend(pids)
+            total_bytes += entry['bytes']
+
+        reaped_trees = reaped_processes = 0
+        if self.reap_orphans:
+            reaped_trees, reaped_processes = self._reap()
+
+        known = process_tree(self.known_browser_pids())
+        rss, _, count = tree_usage(known) if known else (0, 0.0, 0)
+        with self.lock:
+            self.counters['sweeps'] += 1
+            self.counters['orphans_reaped'] += reaped_trees
+            self.counters['processes_reaped'] += reaped_processes
+            self.usage = {'bytes': total_bytes, 'browsers': len(browser_roots), 'browser_processes': count,
+                          'browser_rss': rss, 'sweep_ms': (time.perf_counter() - started) * 1000}
+            self.last_sweep = now
+        return [session_id for session_id, _, _ in expired]
+
+    def _measure(self, state, previous):
+        try:
+            return estimate_bytes(state.filtered_state if hasattr(state, 'filtered_state') else dict(state))
+        except RuntimeError:
+            # The session changed a container while it was being walked; keep the previous figure
+            return previous
+
+    def _reap(self):
+        """Terminate browser trees that were orphaned in this and the previous sweep"""
+        orphans = set(find_orphaned_browsers(self.known_browser_pids()))
+        confirmed = sorted(orphans & self.orphan_candidates)
+        self.orphan_candidates = orphans - set(confirmed)
+        if not confirmed:
+            return 0, 0
+        return len(confirmed), terminate_tree(confirmed)
+
+    def stats(self):
+        """Live sessions, browsers and bytes held as of the last sweep, plus lifetime counters"""
+        now = time.time()
+        with self.lock:
+            sessions = [{
+                'session': session_id[:8],
+                'idle_s': round(now - entry['last_seen']),
+                'age_min': round((now - entry['first_seen']) / 60, 1),
+                'connected': entry['disconnected_at'] is None,
+                'bytes': entry['bytes'],
+                'browsers': entry['browsers'],
+            } for session_id, entry in self.sessions.items()]
+            return dict(self.usage, live_sessions=len(sessions), sessions=sessions,
+                        last_sweep=self.last_sweep, **self.counters)
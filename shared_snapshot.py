@@ -0,0 +1,259 @@
+"""Latest-snapshot exchange between Streamlit replicas on one host.
+
+One replica holds the fetch-owner lock (``fcntl.flock`` on a lock file) and
+publishes every accepted snapshot into a memory-mapped file per expiry. The
+other replicas map the same file and only read the header until its version
+changes, then decode the payload once per process; all sessions of a
+replica share that decoded snapshot.
+
+File layout (big endian)::
+
+    magic 'OSHM' | format u16 | reserved u16 | seq u64 | version u64 |
+    published_at f64 | meta length u32 | payload length u32 | padding to 64 |
+    metadata JSON | encoded snapshot
+
+``seq`` is a seqlock: the writer makes it odd before touching the data and
+even again afterwards, and a reader retries when it saw an odd value or the
+value changed while it copied. When a snapshot outgrows the file the writer
+builds a larger file and renames it over the old one; readers notice the new
+inode and remap.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+from option_snapshot import decode_snapshot, encode_snapshot
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAGIC = b'OSHM'
+FORMAT = 1
+HEADER = struct.Struct('!4sHHQQdII')
+SEQ_OFFSET = 8
+PUBLISHED_AT_OFFSET = 24
+DATA_OFFSET = 64
+MIN_CAPACITY = 1024 * 1024
+
+
+def segment_name(expiry):
+    return "latest_" + re.sub(r'[^A-Za-z0-9_-]', '_', expiry or 'default') + ".snap"
+
+
+class SnapshotSegment:
+    """One memory-mapped latest-snapshot file"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.mapped = None
+        self.inode = None
+        self.lock = threading.Lock()
+
+    def _map(self):
+        """(Re)map the file when it was replaced, returns False when it does not exist yet"""
+        try:
+            inode = os.stat(self.file_path).st_ino
+        except FileNotFoundError:
+            return False
+        if self.mapped is not None and inode == self.inode:
+            return True
+        with open(self.file_path, 'r+b') as file:
+            mapped = mmap.mmap(file.fileno(), 0)
+        if self.mapped is not None:
+            self.mapped.close()
+        self.mapped, self.inode = mapped, inode
+        return True
+
+    def header(self):
+        """(seq, version, published_at, meta length, payload length), None when unpublished"""
+        with self.lock:
+            if not self._map():
+                return None
+            magic, fmt, _, seq, version, published_at, meta_length, payload_length = HEADER.unpack_from(self.mapped, 0)
+        if magic != MAGIC or fmt != FORMAT or version == 0:
+            return None
+        return seq, version, published_at, meta_length, payload_length
+
+    def version(self):
+        header = self.header()
+        return header[1] if header else None
+
+    def read(self, retries=100):
+        """Consistent (version, published_at, metadata, payload bytes), None when unpublished"""
+        for _ in range(retries):
+            with self.lock:
+                if not self._map():
+                    return None
+                magic, fmt, _, seq, version, published_at, meta_length, payload_length = HEADER.unpack_from(self.mapped, 0)
+                if magic != MAGIC or fmt != FORMAT:
+                    return None
+                if seq % 2 == 0:
+                    start = DATA_OFFSET
+                    meta = self.mapped[start:start + meta_length]
+                    payload = self.mapped[start + meta_length:start + meta_length + payload_length]
+                    if struct.unpack_from('!Q', self.mapped, SEQ_OFFSET)[0] == seq:
+                        return version, published_at, json.loads(meta.decode('utf-8')), payload
+            # A publish is in progress
+            time.sleep(0.001)
+        return None
+
+    def publish(self, metadata, payload):
+        """Write a new version, growing the file when needed; returns the version"""
+        meta = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+        needed = DATA_OFFSET + len(meta) + len(payload)
+        with self.lock:
+            exists = self._map()
+            version = 1
+            if exists:
+                magic, fmt, _, _, previous, _, _, _ = HEADER.unpack_from(self.mapped, 0)
+                if magic == MAGIC and fmt == FORMAT:
+                    version = previous + 1
+            if not exists or len(self.mapped) < needed:
+                self._replace(max(needed * 2, MIN_CAPACITY), version)
+
+            mapped = self.mapped
+            seq = struct.unpack_from('!Q', mapped, SEQ_OFFSET)[0]
+            # A freshly built file starts odd, so readers wait for its first publish
+            writing = seq if seq % 2 else seq + 1
+            struct.pack_into('!Q', mapped, SEQ_OFFSET, writing)
+            mapped[DATA_OFFSET:DATA_OFFSET + len(meta)] = meta
+            mapped[DATA_OFFSET + len(meta):needed] = payload
+            HEADER.pack_into(mapped, 0, MAGIC, FORMAT, 0, writing, version, time.time(), len(meta), len(payload))
+            struct.pack_into('!Q', mapped, SEQ_OFFSET, writing + 1)
+            return version
+
+    def touch(self):
+        """Refresh published_at without a new version (the data is unchanged)"""
+        with self.lock:
+            if not self._map():
+                return
+            seq = struct.unpack_from('!Q', self.mapped, SEQ_OFFSET)[0]
+            if seq % 2:
+                return
+            struct.pack_into('!Q', self.mapped, SEQ_OFFSET, seq + 1)
+            struct.pack_into('!d', self.mapped, PUBLISHED_AT_OFFSET, time.time())
+            struct.pack_into('!Q', self.mapped, SEQ_OFFSET, seq + 2)
+
+    def _replace(self, capacity, version):
+        """Create a larger empty segment and rename it over the old one (lock held)"""
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.truncate(capacity)
+            file.write(HEADER.pack(MAGIC, FORMAT, 0, 1, version - 1, 0.0, 0, 0))
+        os.replace(temp_path, self.file_path)
+        self._map()
+
+
+class FetchOwnership:
+    """Non-blocking fcntl lock naming the one replica that scrapes and publishes"""
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.file = None
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Become the owner if no other live process is; the lock is held until exit"""
+        with self.lock:
+            if self.file is not None:
+                return True
+            if fcntl is None:
+                self.file = True
+                return True
+            directory = os.path.dirname(self.lock_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file = open(self.lock_path, 'a+')
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                file.close()
+                return False
+            file.seek(0)
+            file.truncate()
+            file.write(str(os.getpid()))
+            file.flush()
+            self.file = file
+            return True
+
+    @property
+    def is_owner(self):
+        return self.file is not None
+
+
+class SharedSnapshotHub:
+    """Per-expiry segments plus the fetch-owner election of one shared directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.ownership = FetchOwnership(os.path.join(directory, "fetch_owner.lock"))
+        self.segments = {}
+        # Decoded snapshot per expiry shared by all sessions of this process: (version, record)
+        self.decoded = {}
+        self.stats = {'published': 0, 'decoded': 0, 'header_checks': 0}
+        self.lock = threading.Lock()
+
+    def segment(self, expiry):
+        with self.lock:
+            segment = self.segments.get(expiry)
+            if segment is None:
+                segment = self.segments[expiry] = SnapshotSegment(os.path.join(self.directory, segment_name(expiry)))
+            return segment
+
+    def publish(self, expiry, snapshot, metadata=None):
+        """Publish a snapshot for an expiry (owner only), returns the new version"""
+        version = self.segment(expiry).publish(dict(metadata or {}, expiry=expiry), encode_snapshot(snapshot))
+        with self.lock:
+            self.stats['published'] += 1
+        return version
+
+    def touch(self, expiry):
+        """Mark the published snapshot of an expiry as still current"""
+        self.segment(expiry).touch()
+
+    def owner_pid(self):
+        """Pid written by the current fetch owner, None when unknown"""
+        try:
+            with open(self.ownership.lock_path, 'r') as file:
+                return int(file.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    def version(self, expiry):
+        """Current published version of an expiry, a header read only"""
+        with self.lock:
+            self.stats['header_checks'] += 1
+        return self.segment(expiry).version()
+
+    def latest(self, expiry):
+        """Return {'version', 'published_at', 'metadata', 'snapshot'} or None; decodes once per version"""
+        segment = self.segment(expiry)
+        header = segment.header()
+        if header is None:
+            return None
+        with self.lock:
+            cached = self.decoded.get(expiry)
+        if cached and cached[0] == header[1]:
+            # Same data; published_at moves on with every touch
+            return dict(cached[1], published_at=header[2])
+
+        result = segment.read()
+        if result is None:
+            return None
+        version, published_at, metadata, payload = result
+        record = {'version': version, 'published_at': published_at, 'metadata': metadata,
+                  'snapshot': decode_snapshot(payload)}
+        with self.lock:
+            self.decoded[expiry] = (version, record)
+            self.stats['decoded'] += 1
+        return record
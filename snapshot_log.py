@@ -0,0 +1,208 @@
+"""Indexed snapshot log for replaying a trading day.
+
+Snapshots are stored per expiry as a keyframe (the full encoded snapshot)
+followed by deltas that hold only the rows that changed. The table's primary
+key is (expiry, ts), so seeking to a timestamp is one index lookup for the
+nearest frame and its keyframe plus at most ``keyframe_every`` delta applies.
+Sequential playback reuses the last decoded position and only applies the
+deltas between it and the new time.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from option_snapshot import decode_snapshot, diff_snapshots, encode_snapshot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    expiry TEXT NOT NULL,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    keyframe_ts REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (expiry, ts)
+) WITHOUT ROWID
+"""
+
+
+def encode_delta(previous, current):
+    """Encode the rows that changed or disappeared between two snapshots"""
+    delta = diff_snapshots(previous, current)
+    rows = {strike: current[strike] for strike in list(delta['changed']) + delta['added']}
+    if not rows and not delta['removed']:
+        return None
+    payload = {'rows': rows, 'removed': delta['removed']}
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+
+def apply_delta(snapshot, payload):
+    """Apply an encode_delta payload to a snapshot in place"""
+    delta = json.loads(zlib.decompress(payload).decode('utf-8'))
+    snapshot.update(delta['rows'])
+    for strike in delta['removed']:
+        snapshot.pop(strike, None)
+    return snapshot
+
+
+class SnapshotLog:
+    """Keyframe + delta snapshot log in SQLite"""
+
+    def __init__(self, db_path, keyframe_every=30):
+        self.db_path = db_path
+        self.keyframe_every = keyframe_every
+        # Last appended snapshot per expiry: (ts, keyframe_ts, deltas since keyframe, snapshot)
+        self.heads = {}
+        # Last decoded position for sequential reads: (expiry, ts, keyframe_ts, snapshot)
+        self.cursor = None
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def append(self, fetch_time, snapshot, expiry):
+        """Store a snapshot as a keyframe or as a delta from the previous one, returns the kind"""
+        if not snapshot:
+            return None
+        ts = fetch_time.timestamp()
+        with self.lock:
+            head = self.heads.get(expiry)
+            if head is None:
+                head = self._load_head(expiry)
+
+            kind = 'key'
+            payload = None
+            keyframe_ts = ts
+            if head is not None and head[0] < ts and head[2] < self.keyframe_every:
+                payload = encode_delta(head[3], snapshot)
+                if payload is None:
+                    # Nothing changed, the previous frame already describes this moment
+                    return None
+                kind = 'delta'
+                keyframe_ts = head[1]
+            if payload is None:
+                payload = encode_snapshot(snapshot)
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO frames (expiry, ts, kind, keyframe_ts, payload) VALUES (?, ?, ?, ?, ?)",
+                (expiry, ts, kind, keyframe_ts, payload)
+            )
+            self.connection.commit()
+            deltas = head[2] + 1 if kind == 'delta' else 0
+            self.heads[expiry] = (ts, keyframe_ts, deltas, dict(snapshot))
+            return kind
+
+    def _load_head(self, expiry):
+        """Rebuild the append position of an expiry from disk (lock held)"""
+        row = self.connection.execute(
+            "SELECT ts, keyframe_ts FROM frames WHERE expiry=? ORDER BY ts DESC LIMIT 1", (expiry,)
+        ).fetchone()
+        if row is None:
+            return None
+        ts, keyframe_ts = row
+        snapshot = self._materialize(expiry, keyframe_ts, ts)
+        deltas = self.connection.execute(
+            "SELECT COUNT(*) FROM frames WHERE expiry=? AND ts>? AND ts<=?", (expiry, keyframe_ts, ts)
+        ).fetchone()[0]
+        return (ts, keyframe_ts, deltas, snapshot)
+
+    def _materialize(self, expiry, keyframe_ts, ts, start=None):
+        """Decode the keyframe (or continue from start=(ts, snapshot)) and apply deltas up to ts"""
+        if start is not None:
+            from_ts, snapshot = start
+            rows = self.connection.execute(
+                "SELECT payload FROM frames WHERE expiry=? AND ts>? AND ts<=? ORDER BY ts",
+                (expiry, from_ts, ts)
+            ).fetchall()
+            for (payload,) in rows:
+                apply_delta(snapshot, payload)
+            return snapshot
+
+        rows = self.connection.execute(
+            "SELECT kind, payload FROM frames WHERE expiry=? AND ts>=? AND ts<=? ORDER BY ts",
+            (expiry, keyframe_ts, ts)
+        ).fetchall()
+        snapshot = {}
+        for kind, payload in rows:
+            if kind == 'key':
+                snapshot = decode_snapshot(payload)
+            else:
+                apply_delta(snapshot, payload)
+        return snapshot
+
+    def seek(self, expiry, timestamp):
+        """Return (frame ts, snapshot) as of timestamp, (None, {}) before the first frame"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT ts, keyframe_ts FROM frames WHERE expiry=? AND ts<=? ORDER BY ts DESC LIMIT 1",
+                (expiry, timestamp)
+            ).fetchone()
+            if row is None:
+                return None, {}
+            ts, keyframe_ts = row
+
+            cursor = self.cursor
+            if cursor and cursor[0] == expiry and cursor[2] == keyframe_ts and cursor[1] <= ts:
+                # Same keyframe group and moving forward: only apply the deltas in between
+                if cursor[1] == ts:
+                    return ts, cursor[3]
+                snapshot = self._materialize(expiry, keyframe_ts, ts, start=(cursor[1], dict(cursor[3])))
+            else:
+                snapshot = self._materialize(expiry, keyframe_ts, ts)
+
+            self.cursor = (expiry, ts, keyframe_ts, snapshot)
+            return ts, snapshot
+
+    def iter_snapshots(self, expiry, start=None, end=None):
+        """Yield (ts, snapshot) for every frame of an expiry between start and end (inclusive).
+
+        Reads on its own connection so long scans do not hold the log lock or
+        move the replay cursor. Yielded snapshots are shared, copy before changing.
+        """
+        connection = sqlite3.connect(self.db_path)
+        try:
+            start_ts = float('-inf') if start is None else start
+            end_ts = float('inf') if end is None else end
+            # Begin at the keyframe that the first frame in range is built on
+            row = connection.execute(
+                "SELECT keyframe_ts FROM frames WHERE expiry=? AND ts<=? ORDER BY ts DESC LIMIT 1",
+                (expiry, start_ts)
+            ).fetchone()
+            first_ts = row[0] if row else start_ts
+
+            snapshot = {}
+            rows = connection.execute(
+                "SELECT ts, kind, payload FROM frames WHERE expiry=? AND ts>=? AND ts<=? ORDER BY ts",
+                (expiry, first_ts, end_ts)
+            )
+            for ts, kind, payload in rows:
+                if kind == 'key':
+                    snapshot = decode_snapshot(payload)
+                else:
+                    apply_delta(snapshot, payload)
+                if ts >= start_ts:
+                    yield ts, snapshot
+        finally:
+            connection.close()
+
+    def expiries(self):
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT DISTINCT expiry FROM frames ORDER BY expiry")]
+
+    def time_range(self, expiry):
+        """Return (first ts, last ts, frame count) for an expiry"""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT MIN(ts), MAX(ts), COUNT(*) FROM frames WHERE expiry=?", (expiry,)
+            ).fetchone()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()